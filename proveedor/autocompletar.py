@@ -0,0 +1,269 @@
+"""
+Autocompletado de proveedores, categorías y productos desde un índice de
+prefijos en memoria del proceso.
+
+El índice tiene una lista ordenada de tuplas (clave, id) por tipo, con una
+entrada por cada palabra desde la que se puede empezar a escribir el nombre
+('bebida coca cola', 'coca cola', 'cola'). Una consulta es, por tipo, un
+bisect al primer elemento >= prefijo y un recorrido mientras las claves
+empiecen con él, así que no toca la base de datos en cada tecla. Cada tipo
+revisa a lo más MAX_REVISADAS entradas: los miles de productos que empiezan
+igual no dejan sin lugar a proveedores ni categorías. La búsqueda no toma el
+bloqueo: lee esas entradas con un solo slice, que una inserción o un borrado
+concurrente no deja a medias.
+
+Se carga una vez por proceso (tres consultas) y se corrige con las señales:
+al guardar una ficha del directorio, una categoría o un producto se quitan
+sus claves viejas y se insertan las nuevas con bisect en la misma lista
+(sin copiarla), y al borrarlo solo se olvida el elemento. Una importación
+rehace las entradas de productos del proveedor de una vez, mezclando dos
+listas ordenadas. Los demás procesos recargan al vencer AUTOCOMPLETAR_TTL,
+como el árbol de geografía.
+"""
+import bisect
+import heapq
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.urls import reverse
+
+from .models import CategoriaProveedor, DirectorioProveedor, ProductoServicio
+from .texto import normalizar
+
+# Orden en que se muestran los tipos
+TIPOS = ('proveedor', 'categoria', 'producto')
+
+MIN_CARACTERES = 2
+LIMITE = 8
+# Entradas de cada tipo que se revisan como máximo por consulta (prefijos muy cortos)
+MAX_REVISADAS = 300
+# Palabras de un nombre desde las que se indexa
+MAX_PALABRAS = 6
+
+_bloqueo = threading.RLock()
+_indice = None
+_cargado_en = 0.0
+
+
+def ttl():
+    return getattr(settings, 'AUTOCOMPLETAR_TTL', 300)
+
+
+def claves(texto):
+    """Claves de un nombre: el nombre normalizado desde cada una de sus primeras palabras."""
+    palabras = normalizar(texto).split()
+    return {' '.join(palabras[i:]) for i in range(min(len(palabras), MAX_PALABRAS))}
+
+
+class IndicePrefijos:
+    """Listas ordenadas de (clave, id) por tipo y el texto y destino de cada elemento."""
+
+    def __init__(self):
+        self.entradas = {tipo: [] for tipo in TIPOS}
+        self.elementos = {}            # (tipo, id) -> (etiqueta, url, nombre normalizado)
+        self.claves_de = {}            # (tipo, id) -> claves indexadas
+        self.proveedores_activos = set()
+        self.url_productos = reverse('proveedores:buscar_productos')
+        self.url_directorio = reverse('proveedores:directorio_proveedores')
+
+    @classmethod
+    def cargar(cls):
+        indice = cls()
+        proveedores, categorias, productos = (indice.entradas[tipo] for tipo in TIPOS)
+        for ficha in fichas_indexables():
+            proveedores.extend(indice._registrar('proveedor', ficha.id, ficha.nombre, ficha.get_absolute_url()))
+            if ficha.proveedor_id:
+                indice.proveedores_activos.add(ficha.proveedor_id)
+        for categoria_id, nombre in CategoriaProveedor.objects.filter(activo=True).values_list('id', 'nombre'):
+            url = indice._url_categoria(categoria_id)
+            categorias.extend(indice._registrar('categoria', categoria_id, nombre, url))
+        filas = ProductoServicio.objects.filter(
+            activo=True, proveedor_id__in=indice.proveedores_activos
+        ).values_list('id', 'nombre')
+        for producto_id, nombre in filas.iterator(chunk_size=2000):
+            productos.extend(indice._registrar('producto', producto_id, nombre))
+        for entradas in indice.entradas.values():
+            entradas.sort()
+        return indice
+
+    def _url_categoria(self, categoria_id):
+        return f'{self.url_directorio}?categoria={categoria_id}'
+
+    def _registrar(self, tipo, objeto_id, etiqueta, url=None):
+        """Guarda el elemento y devuelve sus entradas (clave, id), sin insertarlas en la lista."""
+        clave_objeto = (tipo, objeto_id)
+        self.elementos[clave_objeto] = (etiqueta, url, normalizar(etiqueta))
+        self.claves_de[clave_objeto] = nuevas = claves(etiqueta)
+        return [(clave, objeto_id) for clave in nuevas]
+
+    def _quitar(self, tipo, objeto_id):
+        entradas = self.entradas[tipo]
+        for clave in self.claves_de.pop((tipo, objeto_id), ()):
+            entrada = (clave, objeto_id)
+            i = bisect.bisect_left(entradas, entrada)
+            if i < len(entradas) and entradas[i] == entrada:
+                del entradas[i]
+        self.elementos.pop((tipo, objeto_id), None)
+
+    def aplicar(self, quitar=(), poner=()):
+        """
+        Quita los (tipo, id) de `quitar` y agrega o reemplaza los (tipo, id,
+        etiqueta, url) de `poner`.
+
+        Quitar solo borra el elemento: sus entradas quedan en la lista hasta
+        la próxima carga y `buscar` las salta, así un borrado masivo no
+        reescribe la lista por cada fila. Poner inserta y borra en la misma
+        lista; una búsqueda concurrente lee su tramo con un slice, así que a
+        lo más ve el tramo corrido en una entrada (salta o repite una, y se
+        deduplican), nunca un índice fuera de la lista.
+        """
+        for tipo, objeto_id in quitar:
+            self.elementos.pop((tipo, objeto_id), None)
+        for tipo, objeto_id, etiqueta, url in poner:
+            self._quitar(tipo, objeto_id)
+            for entrada in self._registrar(tipo, objeto_id, etiqueta, url):
+                bisect.insort(self.entradas[tipo], entrada)
+
+    def reemplazar(self, tipo, ids, poner):
+        """
+        Rehace de una vez las entradas de los elementos `ids`: los que vienen
+        en `poner` (id, etiqueta, url) quedan con sus claves nuevas y el resto
+        se quita. Filtra la lista una vez, ordena solo las entradas nuevas y
+        mezcla ambas; la lista nueva reemplaza a la anterior al final.
+        """
+        ids = set(ids)
+        for objeto_id in ids:
+            self.claves_de.pop((tipo, objeto_id), None)
+            self.elementos.pop((tipo, objeto_id), None)
+        restantes = [entrada for entrada in self.entradas[tipo] if entrada[1] not in ids]
+        nuevas = sorted(
+            entrada
+            for objeto_id, etiqueta, url in poner
+            for entrada in self._registrar(tipo, objeto_id, etiqueta, url)
+        )
+        self.entradas[tipo] = list(heapq.merge(restantes, nuevas))
+
+    def buscar(self, texto, limite=LIMITE):
+        prefijo = normalizar(texto)
+        if len(prefijo) < MIN_CARACTERES:
+            return []
+        resultado = []
+        for tipo in TIPOS:
+            if len(resultado) >= limite:
+                break
+            entradas, elementos = self.entradas[tipo], self.elementos
+            i = bisect.bisect_left(entradas, (prefijo,))
+            # Un slice no falla aunque otro hilo acorte la lista entre medio
+            encontrados = {}
+            for clave, objeto_id in entradas[i:i + MAX_REVISADAS]:
+                if not clave.startswith(prefijo):
+                    break
+                elemento = elementos.get((tipo, objeto_id))
+                if elemento is None:
+                    continue
+                # Mejor el calce al comienzo del nombre que a mitad de él
+                orden = (clave != elemento[2], len(elemento[0]))
+                anterior = encontrados.get(objeto_id)
+                if anterior is None or orden < anterior[0]:
+                    encontrados[objeto_id] = (orden, elemento)
+
+            mejores = sorted(encontrados.values(), key=lambda par: par[0])[:limite - len(resultado)]
+            for _, (etiqueta, url, _) in mejores:
+                if url is None:
+                    url = f"{self.url_productos}?{urlencode({'q': etiqueta})}"
+                resultado.append({'tipo': tipo, 'texto': etiqueta, 'url': url})
+        return resultado
+
+
+def fichas_indexables():
+    return DirectorioProveedor.objects.filter(activo=True).only(
+        'id', 'nombre', 'origen', 'proveedor_id', 'proveedor_legado_id'
+    )
+
+
+def indice(cargar=True):
+    """El índice vigente; lo carga si no existe o si venció el TTL (None si `cargar` es False)."""
+    global _indice, _cargado_en
+    actual = _indice
+    if actual is not None and time.monotonic() - _cargado_en < ttl():
+        return actual
+    if not cargar:
+        return None
+    with _bloqueo:
+        if _indice is None or time.monotonic() - _cargado_en >= ttl():
+            _indice = IndicePrefijos.cargar()
+            _cargado_en = time.monotonic()
+        return _indice
+
+
+def invalidar():
+    global _indice
+    with _bloqueo:
+        _indice = None
+
+
+def sugerencias(texto, limite=LIMITE):
+    return indice().buscar(texto, limite)
+
+
+# ---------- Cambios incrementales (desde las señales) ----------
+# Si el proceso todavía no cargó el índice no hay nada que corregir.
+
+def ficha_modificada(ficha, borrada=False):
+    actual = indice(cargar=False)
+    if actual is None:
+        return
+    with _bloqueo:
+        if borrada or not ficha.activo:
+            actual.aplicar(quitar=[('proveedor', ficha.id)])
+        else:
+            actual.aplicar(poner=[('proveedor', ficha.id, ficha.nombre, ficha.get_absolute_url())])
+        # Activar o desactivar un proveedor cambia qué productos se muestran
+        if ficha.proveedor_id:
+            activo = ficha.activo and not borrada
+            if activo != (ficha.proveedor_id in actual.proveedores_activos):
+                invalidar()
+
+
+def categoria_modificada(categoria, borrada=False):
+    actual = indice(cargar=False)
+    if actual is None:
+        return
+    with _bloqueo:
+        if borrada or not categoria.activo:
+            actual.aplicar(quitar=[('categoria', categoria.id)])
+        else:
+            url = actual._url_categoria(categoria.id)
+            actual.aplicar(poner=[('categoria', categoria.id, categoria.nombre, url)])
+
+
+def producto_modificado(producto, borrado=False):
+    actual = indice(cargar=False)
+    if actual is None:
+        return
+    with _bloqueo:
+        if borrado or not producto.activo or producto.proveedor_id not in actual.proveedores_activos:
+            actual.aplicar(quitar=[('producto', producto.id)])
+        else:
+            actual.aplicar(poner=[('producto', producto.id, producto.nombre, None)])
+
+
+def productos_importados(proveedor_id):
+    """
+    Rehace las entradas de los productos de un proveedor tras una importación
+    masiva (sin señales): entran los activos con su nombre actual y salen los
+    que la importación desactivó.
+    """
+    actual = indice(cargar=False)
+    if actual is None or proveedor_id not in actual.proveedores_activos:
+        return
+    ids, activos = [], []
+    filas = ProductoServicio.objects.filter(proveedor_id=proveedor_id).values_list('id', 'nombre', 'activo')
+    for producto_id, nombre, activo in filas.iterator(chunk_size=2000):
+        ids.append(producto_id)
+        if activo:
+            activos.append((producto_id, nombre, None))
+    with _bloqueo:
+        actual.reemplazar('producto', ids, activos)
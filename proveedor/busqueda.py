@@ -0,0 +1,91 @@
+"""
+Búsqueda de texto sobre el catálogo.
+
+En MySQL se usa un índice FULLTEXT (el de producto_servicio (nombre,
+descripcion) o el de directorio_proveedor (texto)) con MATCH ... AGAINST en
+modo booleano, donde cada palabra se busca como prefijo (`palabra*`).
+En otros motores (SQLite en desarrollo) la misma expresión se traduce a LIKE:
+cada palabra debe ser prefijo de alguna palabra separada por espacios de
+algún campo, y la relevancia cuenta los calces (el primer campo pesa el
+doble). Se parece al modo booleano pero no es igual: no hay índice, no se
+ignoran stopwords ni palabras cortas y el puntaje no es el de MySQL.
+"""
+import re
+from functools import reduce
+from operator import add, or_
+
+from django.db.models import Case, FloatField, Func, Q, Value, When
+
+# Operadores del modo booleano de MySQL que no deben llegar desde el usuario
+_OPERADORES_BOOLEANOS = re.compile(r'[+\-<>()~*"@]+')
+
+
+def palabras_busqueda(termino):
+    """Separa el término en palabras limpias (sin operadores de MySQL)."""
+    if not termino:
+        return []
+    return [p for p in _OPERADORES_BOOLEANOS.sub(' ', termino).split() if p]
+
+
+def consulta_booleana(termino):
+    """'leche entera' -> '+leche* +entera*' para MATCH ... IN BOOLEAN MODE."""
+    return ' '.join(f'+{p}*' for p in palabras_busqueda(termino))
+
+
+class CoincidenciaTexto(Func):
+    """
+    MATCH (campos) AGAINST (consulta IN BOOLEAN MODE).
+    Devuelve el puntaje de relevancia (0 si no calza); fuera de MySQL se
+    calcula con LIKE (ver el docstring del módulo).
+    """
+    output_field = FloatField()
+
+    def __init__(self, consulta, *campos):
+        super().__init__(*campos, Value(consulta))
+        self.consulta = consulta
+        self.campos = campos
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return compiler.compile(self.equivalente_portable().resolve_expression(compiler.query))
+
+    def equivalente_portable(self):
+        """Case con la relevancia por LIKE; 0 si alguna palabra no aparece."""
+        pesos = [2.0] + [1.0] * (len(self.campos) - 1)
+        todas = Q()
+        puntajes = []
+        for palabra in palabras_busqueda(self.consulta):
+            por_campo = [
+                Q(**{f'{campo}__istartswith': palabra}) | Q(**{f'{campo}__icontains': f' {palabra}'})
+                for campo in self.campos
+            ]
+            todas &= reduce(or_, por_campo)
+            puntajes.extend(
+                Case(When(condicion, then=Value(peso)), default=Value(0.0), output_field=FloatField())
+                for condicion, peso in zip(por_campo, pesos)
+            )
+        if not puntajes:
+            return Value(0.0, output_field=FloatField())
+        return Case(When(todas, then=reduce(add, puntajes)), default=Value(0.0), output_field=FloatField())
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        *campos, consulta = self.get_source_expressions()
+        sql_campos, params = [], []
+        for campo in campos:
+            sql, campo_params = compiler.compile(campo)
+            sql_campos.append(sql)
+            params.extend(campo_params)
+        sql_consulta, consulta_params = compiler.compile(consulta)
+        params.extend(consulta_params)
+        return (
+            f"MATCH ({', '.join(sql_campos)}) AGAINST ({sql_consulta} IN BOOLEAN MODE)",
+            params,
+        )
+
+
+def filtrar_productos(queryset, termino):
+    """Filtra un queryset de ProductoServicio por texto y anota su `relevancia`."""
+    if not palabras_busqueda(termino):
+        return queryset
+    return queryset.annotate(
+        relevancia=CoincidenciaTexto(consulta_booleana(termino), 'nombre', 'descripcion')
+    ).filter(relevancia__gt=0)
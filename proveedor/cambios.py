@@ -0,0 +1,139 @@
+"""
+Registro de cambios del catálogo y sincronización incremental.
+
+Cada alta, modificación, desactivación o borrado de productos y promociones
+agrega una fila a CambioCatalogo; los inicios y fines de vigencia de las
+promociones los anota el comando `actualizar_promociones` cuando cambia su
+estado. Un cliente guarda el último cursor recibido (el id de la fila) y
+pide solo lo posterior (rango sobre el índice (proveedor, id)).
+
+Para que el id siga el orden de commit, las filas se insertan recién tras
+el commit de la transacción que hizo el cambio (on_commit), en inserciones
+cortas. Así una importación larga no reserva ids bajos que se confirman
+después de que un cliente ya leyó ids mayores. Como dos inserciones
+concurrentes igual pueden confirmarse desordenadas por milisegundos, solo
+se entregan las filas con más de MARGEN_CONFIRMACION de antigüedad.
+
+Los objetos desactivados o eliminados se entregan sin `datos` (solo su id).
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .exportacion import CAMPOS_PRODUCTO, CAMPOS_PROMOCION
+from .models import CambioCatalogo, ProductoServicio, Promocion
+from .paginacion import codificar_cursor, decodificar_cursor
+
+MAX_CAMBIOS_POR_PAGINA = 500
+TAMANO_LOTE = 1000
+MARGEN_CONFIRMACION = timedelta(seconds=5)
+
+MODELOS = {
+    'producto': (ProductoServicio, CAMPOS_PRODUCTO),
+    'promocion': (Promocion, CAMPOS_PROMOCION),
+}
+
+
+def accion_guardado(instancia, creado):
+    if creado:
+        return 'creado'
+    return 'actualizado' if instancia.activo else 'desactivado'
+
+
+def registrar_cambio(instancia, entidad, accion):
+    # Los valores se leen ahora: tras un borrado la instancia pierde su pk
+    registrar_cambios(instancia.proveedor_id, entidad, [(instancia.pk, accion)])
+
+
+def registrar_cambios(proveedor_id, entidad, cambios):
+    """
+    Versión masiva: `cambios` son pares (objeto_id, accion). Las filas se
+    insertan al confirmar la transacción en curso (de inmediato si no hay).
+    """
+    cambios = list(cambios)
+    if cambios:
+        transaction.on_commit(lambda: _insertar_cambios(proveedor_id, entidad, cambios))
+    return len(cambios)
+
+
+def _insertar_cambios(proveedor_id, entidad, cambios):
+    # Un lote por inserción, con su propia fecha: cada una se confirma sola
+    for inicio in range(0, len(cambios), TAMANO_LOTE):
+        fecha = timezone.now()
+        CambioCatalogo.objects.bulk_create([
+            CambioCatalogo(
+                proveedor_id=proveedor_id,
+                entidad=entidad,
+                objeto_id=objeto_id,
+                accion=accion,
+                fecha=fecha,
+            )
+            for objeto_id, accion in cambios[inicio:inicio + TAMANO_LOTE]
+        ])
+
+
+def _cambios_confirmados():
+    """Cambios con antigüedad suficiente para que ninguno anterior siga pendiente."""
+    return CambioCatalogo.objects.filter(fecha__lte=timezone.now() - MARGEN_CONFIRMACION)
+
+
+def cursor_actual(proveedor_id):
+    """
+    Cursor del último cambio confirmado del proveedor. Los cambios más
+    nuevos se vuelven a entregar, y aplicarlos sobre el snapshot no altera nada.
+    """
+    ultimo = (
+        _cambios_confirmados()
+        .filter(proveedor_id=proveedor_id)
+        .order_by('-id')
+        .values_list('id', flat=True)
+        .first()
+    )
+    return codificar_cursor([ultimo or 0])
+
+
+def cambios_desde(proveedor_ids, cursor=None, limite=MAX_CAMBIOS_POR_PAGINA):
+    """
+    Cambios posteriores a `cursor` para los proveedores indicados.
+
+    Devuelve (cambios, cursor_siguiente, hay_mas). Cada cambio trae el
+    estado actual del objeto en `datos` (None si fue eliminado o está
+    desactivado), leído con una sola consulta por entidad.
+    """
+    valores = decodificar_cursor(cursor)
+    desde_id = valores[-1] if valores and type(valores[-1]) is int else 0
+
+    filas = list(
+        _cambios_confirmados()
+        .filter(proveedor_id__in=proveedor_ids, id__gt=desde_id)
+        .order_by('id')
+        .values('id', 'proveedor_id', 'entidad', 'objeto_id', 'accion', 'fecha')[:limite + 1]
+    )
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    ids_por_entidad = {}
+    for fila in filas:
+        ids_por_entidad.setdefault(fila['entidad'], set()).add(fila['objeto_id'])
+
+    datos = {}
+    for entidad, ids in ids_por_entidad.items():
+        modelo, campos = MODELOS[entidad]
+        for objeto in modelo.objects.filter(id__in=ids, activo=True).values(*campos):
+            datos[(entidad, objeto['id'])] = objeto
+
+    cambios = []
+    for fila in filas:
+        cambios.append({
+            'cursor': codificar_cursor([fila['id']]),
+            'proveedor': fila['proveedor_id'],
+            'entidad': fila['entidad'],
+            'id': fila['objeto_id'],
+            'accion': fila['accion'],
+            'fecha': fila['fecha'],
+            'datos': datos.get((fila['entidad'], fila['objeto_id'])),
+        })
+
+    siguiente = codificar_cursor([filas[-1]['id'] if filas else desde_id])
+    return cambios, siguiente, hay_mas
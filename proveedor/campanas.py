@@ -0,0 +1,163 @@
+"""
+Campañas de contacto: solicitudes a todo un segmento de comercios.
+
+La vista solo guarda la campaña con el tamaño estimado del segmento; las
+solicitudes las crea el comando `procesar_campanas` (cron) por lotes con
+bulk_create, nunca una fila por INSERT ni dentro de una petición web.
+
+Cada lote, en una transacción:
+- toma la campaña con SELECT ... FOR UPDATE SKIP LOCKED (dos workers no
+  procesan la misma) y bloquea la fila del proveedor, para que dos campañas
+  suyas no se salten el cupo a la vez,
+- se limita a lo que le queda del cupo diario del proveedor (últimas 24
+  horas, contando también las solicitudes enviadas a mano),
+- recorre el segmento por id desde `ultimo_comercio_id`, sin los comercios
+  que ya tienen una solicitud del proveedor,
+- suma `contactos_enviados` una sola vez.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .comercios import comercios_qs
+from .models import CampanaContacto, Proveedor, SolicitudContacto
+
+ESTADOS_ABIERTOS = ('pendiente', 'en_proceso')
+TAMANO_INSERCION = 1000
+
+
+def max_contactos_diarios():
+    return getattr(settings, 'CAMPANAS_MAX_CONTACTOS_DIARIOS', 500)
+
+
+def tamano_lote():
+    return getattr(settings, 'CAMPANAS_TAMANO_LOTE', 200)
+
+
+def segmento(campana, usuario_id=None):
+    """Comercios del segmento que el proveedor todavía no ha contactado."""
+    if usuario_id is None:
+        usuario_id = campana.proveedor.usuario_id
+    comercios = comercios_qs(
+        comuna=campana.comuna,
+        region=campana.region_id,
+        tipo_negocio=campana.tipo_negocio,
+        intereses=campana.codigos_intereses(),
+        excluir=usuario_id,
+    )
+    return comercios.exclude(Exists(
+        SolicitudContacto.objects.filter(proveedor_id=campana.proveedor_id, comercio=OuterRef('pk'))
+    ))
+
+
+def cupo_disponible(proveedor_id, ahora=None):
+    """Solicitudes que el proveedor aún puede enviar en la ventana de 24 horas."""
+    ahora = ahora or timezone.now()
+    enviadas = SolicitudContacto.objects.filter(
+        proveedor_id=proveedor_id,
+        fecha_solicitud__gte=ahora - timedelta(days=1),
+    ).count()
+    return max(max_contactos_diarios() - enviadas, 0)
+
+
+def procesar_lote(campana_id, tamano=None):
+    """
+    Crea el siguiente lote de solicitudes de la campaña y devuelve cuántas
+    creó: 0 si otro worker la tiene tomada, si al proveedor no le queda cupo
+    o si el segmento se agotó (en ese caso la campaña queda completada).
+    """
+    tamano = tamano or tamano_lote()
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        campana = (
+            CampanaContacto.objects
+            .select_for_update(skip_locked=True)
+            .filter(pk=campana_id, estado__in=ESTADOS_ABIERTOS)
+            .first()
+        )
+        if campana is None:
+            return 0
+
+        usuario_id = (
+            Proveedor.objects
+            .select_for_update()
+            .values_list('usuario_id', flat=True)
+            .get(pk=campana.proveedor_id)
+        )
+        limite = min(tamano, cupo_disponible(campana.proveedor_id, ahora))
+        if limite <= 0:
+            return 0
+
+        ids = list(
+            segmento(campana, usuario_id)
+            .filter(id__gt=campana.ultimo_comercio_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:limite]
+        )
+        SolicitudContacto.objects.bulk_create(
+            [
+                SolicitudContacto(
+                    proveedor_id=campana.proveedor_id,
+                    comercio_id=comercio_id,
+                    campana=campana,
+                    mensaje=campana.mensaje,
+                )
+                for comercio_id in ids
+            ],
+            batch_size=TAMANO_INSERCION,
+        )
+
+        if ids:
+            Proveedor(pk=campana.proveedor_id).sumar_contactos(enviados=len(ids))
+            campana.ultimo_comercio_id = ids[-1]
+            campana.enviadas += len(ids)
+        campana.fecha_inicio = campana.fecha_inicio or ahora
+        if len(ids) < limite:
+            campana.estado = 'completada'
+            campana.fecha_fin = ahora
+        else:
+            campana.estado = 'en_proceso'
+        campana.save(update_fields=[
+            'ultimo_comercio_id', 'enviadas', 'estado', 'fecha_inicio', 'fecha_fin',
+        ])
+    return len(ids)
+
+
+def procesar_campanas(max_lotes=100, tamano=None):
+    """
+    Reparte el trabajo entre las campañas abiertas: un lote por campaña en
+    cada vuelta, hasta que ninguna avance o se llegue a `max_lotes`.
+    Devuelve (lotes, solicitudes creadas).
+    """
+    lotes = creadas = 0
+    while lotes < max_lotes:
+        abiertas = list(
+            CampanaContacto.objects
+            .filter(estado__in=ESTADOS_ABIERTOS)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        avance = False
+        for campana_id in abiertas:
+            if lotes >= max_lotes:
+                break
+            cantidad = procesar_lote(campana_id, tamano)
+            if cantidad:
+                lotes += 1
+                creadas += cantidad
+                avance = True
+        if not avance:
+            break
+    return lotes, creadas
+
+
+def cancelar(campana):
+    """Detiene la campaña; las solicitudes ya enviadas se mantienen."""
+    actualizadas = CampanaContacto.objects.filter(
+        pk=campana.pk, estado__in=ESTADOS_ABIERTOS
+    ).update(estado='cancelada', fecha_fin=timezone.now())
+    return bool(actualizadas)
@@ -0,0 +1,104 @@
+"""
+Índice de cobertura: qué comunas atiende cada proveedor.
+
+`Proveedor.cobertura` es una etiqueta; aquí se traduce a comunas concretas
+usando la jerarquía País > Región > Comuna:
+- internacional: todas las comunas registradas,
+- nacional: las comunas de su país (o de su región si no indicó país),
+- regional: las comunas de su región,
+- local / comunal: su propia comuna.
+
+El resultado vive en CoberturaComuna y se mantiene con señales al guardar
+el proveedor o crear una comuna, así que "quién atiende esta comuna" es un
+join por el índice (comuna, proveedor) y no una reinterpretación de la
+etiqueta en cada consulta.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .models import CoberturaComuna, Comuna, Proveedor, Region
+
+TAMANO_LOTE = 1000
+CAMPOS_COBERTURA = {'cobertura', 'pais', 'region', 'comuna'}
+
+
+def comunas_servidas(cobertura, pais_id, region_id, comuna_id):
+    """Conjunto de ids de comuna que corresponde a una cobertura."""
+    if cobertura == 'internacional':
+        comunas = Comuna.objects.all()
+    elif cobertura == 'nacional' and pais_id:
+        comunas = Comuna.objects.filter(region__pais_id=pais_id)
+    elif cobertura in ('nacional', 'regional') and region_id:
+        comunas = Comuna.objects.filter(region_id=region_id)
+    else:
+        return {comuna_id} if comuna_id else set()
+    return set(comunas.values_list('id', flat=True))
+
+
+def _clave(proveedor):
+    return (proveedor.cobertura, proveedor.pais_id, proveedor.region_id, proveedor.comuna_id)
+
+
+def actualizar_cobertura(proveedor):
+    """Ajusta las filas del proveedor a su cobertura actual (solo la diferencia)."""
+    nuevas = comunas_servidas(*_clave(proveedor))
+    with transaction.atomic():
+        actuales = set(
+            CoberturaComuna.objects
+            .filter(proveedor_id=proveedor.pk)
+            .values_list('comuna_id', flat=True)
+        )
+        sobrantes = actuales - nuevas
+        if sobrantes:
+            CoberturaComuna.objects.filter(proveedor_id=proveedor.pk, comuna_id__in=sobrantes).delete()
+        CoberturaComuna.objects.bulk_create(
+            [CoberturaComuna(proveedor_id=proveedor.pk, comuna_id=c) for c in nuevas - actuales],
+            batch_size=TAMANO_LOTE,
+            ignore_conflicts=True,
+        )
+
+
+def agregar_comuna(comuna):
+    """Suma una comuna nueva a los proveedores cuya cobertura la incluye."""
+    pais_id = Region.objects.filter(pk=comuna.region_id).values_list('pais_id', flat=True).first()
+    proveedores = Proveedor.objects.filter(
+        Q(cobertura='internacional') |
+        Q(cobertura='nacional', pais_id=pais_id) |
+        Q(cobertura='nacional', pais__isnull=True, region_id=comuna.region_id) |
+        Q(cobertura='regional', region_id=comuna.region_id) |
+        Q(cobertura__in=['local', 'comunal'], comuna_id=comuna.pk)
+    ).values_list('id', flat=True)
+    CoberturaComuna.objects.bulk_create(
+        [CoberturaComuna(proveedor_id=p, comuna_id=comuna.pk) for p in proveedores.iterator()],
+        batch_size=TAMANO_LOTE,
+        ignore_conflicts=True,
+    )
+
+
+def reconstruir_cobertura():
+    """
+    Recalcula la tabla completa. Los proveedores con la misma cobertura,
+    país, región y comuna comparten el cálculo. Devuelve las filas escritas.
+    """
+    resueltas = {}
+    filas = []
+    escritas = 0
+    with transaction.atomic():
+        CoberturaComuna.objects.all().delete()
+        for proveedor in Proveedor.objects.only(*CAMPOS_COBERTURA).iterator(chunk_size=TAMANO_LOTE):
+            clave = _clave(proveedor)
+            if clave not in resueltas:
+                resueltas[clave] = comunas_servidas(*clave)
+            filas.extend(CoberturaComuna(proveedor_id=proveedor.pk, comuna_id=c) for c in resueltas[clave])
+            if len(filas) >= TAMANO_LOTE:
+                CoberturaComuna.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+                escritas += len(filas)
+                filas = []
+        CoberturaComuna.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+    return escritas + len(filas)
+
+
+def proveedores_que_atienden(comuna_id, queryset=None):
+    """Proveedores cuya cobertura incluye la comuna (un join indexado)."""
+    queryset = Proveedor.objects.all() if queryset is None else queryset
+    return queryset.filter(comunas_atendidas__comuna_id=comuna_id)
@@ -0,0 +1,64 @@
+"""
+Directorio de comercios para proveedores.
+
+Solo expone datos públicos del negocio (nunca email, WhatsApp ni nombre de
+la persona). Los filtros usan los índices (rol, comuna_oficial, tipo_negocio,
+id) y (rol, tipo_negocio, id) de Comerciante: la comuna escrita en el filtro
+se resuelve a su id y la región es un join con Comuna. Los intereses se
+buscan en la tabla InteresComerciante con EXISTS. La paginación es por cursor sobre id,
+así que cada página es una sola consulta acotada por LIMIT.
+"""
+from django.db.models import Exists, OuterRef
+
+from usuarios.models import Comerciante, InteresComerciante
+
+from .geografia import buscar_comuna
+from .paginacion import paginar_por_cursor
+
+COMERCIOS_POR_PAGINA = 30
+CAMPOS_PUBLICOS = ['id', 'nombre_negocio', 'tipo_negocio', 'comuna', 'intereses']
+
+
+def comercios_qs(comuna='', region=None, tipo_negocio='', intereses=(), excluir=None):
+    """Comercios que cumplen todos los filtros; `intereses` basta con uno."""
+    comercios = Comerciante.objects.filter(rol='COMERCIANTE')
+    if comuna:
+        comuna_id = buscar_comuna(comuna)
+        # Un texto que no es una comuna conocida solo calza consigo mismo
+        comercios = comercios.filter(comuna_oficial_id=comuna_id) if comuna_id else comercios.filter(comuna=comuna)
+    if region:
+        comercios = comercios.filter(comuna_oficial__region_id=region)
+    if tipo_negocio:
+        comercios = comercios.filter(tipo_negocio=tipo_negocio)
+    if intereses:
+        comercios = comercios.filter(Exists(
+            InteresComerciante.objects.filter(comerciante=OuterRef('pk'), codigo__in=intereses)
+        ))
+    if excluir is not None:
+        comercios = comercios.exclude(pk=excluir)
+    return comercios
+
+
+def filtros_desde_get(datos):
+    return {
+        'comuna': datos.get('comuna', '').strip(),
+        'region': int(datos['region']) if datos.get('region', '').isdigit() else None,
+        'tipo_negocio': datos.get('tipo_negocio', ''),
+        'intereses': [c for c in datos.getlist('intereses') if c],
+    }
+
+
+def buscar_comercios(filtros, cursor=None, tamano=COMERCIOS_POR_PAGINA, excluir=None):
+    """Devuelve (comercios, cursor_siguiente) con solo los campos públicos."""
+    comercios = comercios_qs(excluir=excluir, **filtros).only(*CAMPOS_PUBLICOS)
+    return paginar_por_cursor(comercios, 'id', cursor, tamano)
+
+
+def datos_publicos(comercio):
+    return {
+        'id': comercio.id,
+        'nombre_negocio': comercio.nombre_negocio,
+        'tipo_negocio': comercio.tipo_negocio,
+        'comuna': comercio.comuna,
+        'intereses': comercio.codigos_intereses(),
+    }
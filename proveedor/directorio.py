@@ -0,0 +1,233 @@
+"""
+Fichas del directorio de proveedores (DirectorioProveedor).
+
+Conviven dos modelos de proveedor: el de la plataforma (Proveedor, con
+categorías, región, comuna y cobertura) y el del directorio antiguo
+(usuarios.Proveedor, cuyos rubros y zona vienen en sus Propuesta). Ambos se
+aplanan a una fila por proveedor y los dos directorios leen esa tabla:
+- categorías y rubros se filtran con un semijoin por tablas indexadas: la
+  intermedia de Proveedor.categorias y RubroPropuesta (los rubros de la
+  plataforma salen de los nombres de sus categorías); la ficha guarda solo
+  los nombres para mostrar,
+- el texto se busca con el índice FULLTEXT de `texto` en MySQL (ver
+  proveedor/busqueda.py),
+- región y comuna van con su id (indexados junto a `activo` y al orden del
+  directorio) y con su nombre ya copiado,
+- contadores y coordenadas, que cambian sin save(), se copian con un UPDATE.
+
+Las señales rehacen la ficha al guardar el proveedor, sus categorías o sus
+propuestas; `reconstruir_directorio` la regenera entera.
+"""
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from usuarios.models import Proveedor as ProveedorLegado
+from usuarios.models import RubroPropuesta, codigos_rubro
+
+from . import autocompletar, geografia, trigramas
+from .busqueda import CoincidenciaTexto, consulta_booleana, palabras_busqueda
+from .models import CategoriaProveedor, CoberturaComuna, Comuna, DirectorioProveedor, Proveedor, Region
+from .ranking import calcular_ranking
+from .texto import normalizar
+
+TAMANO_LOTE = 1000
+CONTADORES = ('visitas', 'contactos_enviados', 'contactos_aceptados')
+COORDENADAS = ('latitud', 'longitud', 'geohash')
+
+
+def _texto(*partes):
+    return normalizar(' '.join(p for p in partes if p))
+
+
+def valores_plataforma(proveedor):
+    """Campos de la ficha de un Proveedor de la plataforma (usa el prefetch de categorías)."""
+    arbol = geografia.arbol()
+    region = arbol.region_por_id.get(proveedor.region_id)
+    comuna = arbol.comuna_por_id.get(proveedor.comuna_id)
+    categorias = sorted(proveedor.categorias.all(), key=lambda c: (c.nombre, c.id))
+    nombres = [c.nombre for c in categorias]
+    return {
+        'origen': 'plataforma',
+        'proveedor_legado_id': None,
+        'nombre': proveedor.nombre_empresa,
+        'titulo': '',
+        'descripcion': proveedor.descripcion,
+        'foto': proveedor.foto.name or '',
+        'categorias_nombres': ', '.join(nombres),
+        'region_id': proveedor.region_id,
+        'region_nombre': region.nombre if region else '',
+        'comuna_id': proveedor.comuna_id,
+        'comuna_nombre': comuna.nombre if comuna else '',
+        'zona': '',
+        'cobertura': proveedor.cobertura,
+        'latitud': proveedor.latitud,
+        'longitud': proveedor.longitud,
+        'geohash': proveedor.geohash,
+        'activo': proveedor.activo,
+        'verificado': proveedor.verificado,
+        'destacado': proveedor.destacado,
+        'visitas': proveedor.visitas,
+        'contactos_enviados': proveedor.contactos_enviados,
+        'contactos_aceptados': proveedor.contactos_aceptados,
+        'texto': _texto(proveedor.nombre_empresa, proveedor.descripcion),
+        'fecha_registro': proveedor.fecha_registro,
+    }
+
+
+def valores_legado(proveedor):
+    """
+    Campos de la ficha de un proveedor del directorio antiguo (usa el
+    prefetch de propuestas). Sin propuestas no aparece en el directorio.
+    """
+    propuestas = sorted(proveedor.propuestas.all(), key=lambda p: p.id)
+    principal = propuestas[0] if propuestas else None
+    rubros = list(dict.fromkeys(
+        r.strip() for p in propuestas for r in p.rubros_ofertados.split(',') if r.strip()
+    ))
+    return {
+        'origen': 'legado',
+        'proveedor_id': None,
+        'nombre': proveedor.nombre,
+        'titulo': principal.titulo if principal else '',
+        'descripcion': proveedor.descripcion,
+        'foto': proveedor.foto_perfil.name or '',
+        'categorias_nombres': ', '.join(rubros),
+        'region_id': None,
+        'region_nombre': '',
+        'comuna_id': None,
+        'comuna_nombre': '',
+        'zona': principal.zona_geografica if principal else '',
+        'cobertura': '',
+        'latitud': None,
+        'longitud': None,
+        'geohash': '',
+        'activo': principal is not None,
+        'verificado': False,
+        'destacado': False,
+        'visitas': 0,
+        'contactos_enviados': 0,
+        'contactos_aceptados': 0,
+        'texto': _texto(proveedor.nombre, principal.titulo if principal else '', proveedor.descripcion),
+        'fecha_registro': proveedor.fecha_registro,
+    }
+
+
+def actualizar_ficha(proveedor):
+    """Rehace la ficha de un Proveedor de la plataforma."""
+    DirectorioProveedor.objects.update_or_create(
+        proveedor_id=proveedor.pk, defaults=valores_plataforma(proveedor)
+    )
+
+
+def actualizar_ficha_legado(proveedor_id):
+    """Rehace la ficha de un proveedor del directorio antiguo (por id)."""
+    proveedor = ProveedorLegado.objects.prefetch_related('propuestas').filter(pk=proveedor_id).first()
+    if proveedor is None:
+        return
+    DirectorioProveedor.objects.update_or_create(
+        proveedor_legado_id=proveedor.pk, defaults=valores_legado(proveedor)
+    )
+
+
+def actualizar_fichas(proveedor_ids):
+    """Rehace las fichas de varios proveedores de la plataforma (p. ej. al renombrar una categoría)."""
+    proveedores = Proveedor.objects.filter(pk__in=list(proveedor_ids)).prefetch_related('categorias')
+    for proveedor in proveedores.iterator(chunk_size=TAMANO_LOTE):
+        actualizar_ficha(proveedor)
+
+
+def copiar_campos(campos, proveedor_ids=None):
+    """
+    Copia campos desde Proveedor a sus fichas con un UPDATE, para los
+    cambios que no pasan por save() (contadores con F(), coordenadas).
+    """
+    fichas = DirectorioProveedor.objects.filter(proveedor__isnull=False)
+    if proveedor_ids is not None:
+        fichas = fichas.filter(proveedor_id__in=list(proveedor_ids))
+    proveedor = Proveedor.objects.filter(pk=OuterRef('proveedor_id'))
+    return fichas.update(**{c: Subquery(proveedor.values(c)[:1]) for c in campos})
+
+
+def copiar_nombres_geografia():
+    """
+    Copia el nombre de región y comuna a las fichas (dos UPDATE), tras
+    cargas masivas del territorio que no pasan por save().
+    """
+    fichas = DirectorioProveedor.objects.all()
+    fichas.filter(region__isnull=False).update(
+        region_nombre=Subquery(Region.objects.filter(pk=OuterRef('region_id')).values('nombre')[:1])
+    )
+    fichas.filter(comuna__isnull=False).update(
+        comuna_nombre=Subquery(Comuna.objects.filter(pk=OuterRef('comuna_id')).values('nombre')[:1])
+    )
+
+
+def reconstruir_directorio():
+    """Regenera todas las fichas y su puntaje. Devuelve (plataforma, legado)."""
+    fichas = [
+        DirectorioProveedor(proveedor_id=p.pk, **valores_plataforma(p))
+        for p in Proveedor.objects.order_by('id').prefetch_related('categorias').iterator(chunk_size=TAMANO_LOTE)
+    ]
+    plataforma = len(fichas)
+    fichas.extend(
+        DirectorioProveedor(proveedor_legado_id=p.pk, **valores_legado(p))
+        for p in ProveedorLegado.objects.order_by('id').prefetch_related('propuestas').iterator(chunk_size=TAMANO_LOTE)
+    )
+    with transaction.atomic():
+        DirectorioProveedor.objects.all().delete()
+        DirectorioProveedor.objects.bulk_create(fichas, batch_size=TAMANO_LOTE)
+    calcular_ranking()
+    trigramas.reindexar('proveedor')
+    autocompletar.invalidar()
+    return plataforma, len(fichas) - plataforma
+
+
+# ---------- Consultas ----------
+
+def fichas_activas():
+    return DirectorioProveedor.objects.filter(activo=True)
+
+
+def con_categoria(fichas, categoria_id):
+    """Fichas de proveedores con la categoría (semijoin por la tabla intermedia)."""
+    asignadas = Proveedor.categorias.through.objects.filter(categoriaproveedor_id=categoria_id)
+    return fichas.filter(proveedor_id__in=asignadas.values('proveedor_id'))
+
+
+def categorias_del_rubro(codigo):
+    """Ids de las categorías cuyo nombre corresponde al rubro (la tabla es chica)."""
+    return [
+        categoria_id
+        for categoria_id, nombre in CategoriaProveedor.objects.values_list('id', 'nombre')
+        if codigo in codigos_rubro(nombre)
+    ]
+
+
+def con_rubro(fichas, codigo):
+    """
+    Fichas con el rubro: las de la plataforma por sus categorías y las del
+    directorio antiguo por RubroPropuesta (índice codigo, propuesta).
+    """
+    asignadas = Proveedor.categorias.through.objects.filter(categoriaproveedor_id__in=categorias_del_rubro(codigo))
+    legado = RubroPropuesta.objects.filter(codigo=codigo)
+    return fichas.filter(
+        Q(proveedor_id__in=asignadas.values('proveedor_id')) |
+        Q(proveedor_legado_id__in=legado.values('propuesta__proveedor_id'))
+    )
+
+
+def que_atienden(fichas, comuna_id):
+    """Fichas cuya cobertura incluye la comuna (semijoin por el índice de CoberturaComuna)."""
+    return fichas.filter(
+        proveedor_id__in=CoberturaComuna.objects.filter(comuna_id=comuna_id).values('proveedor_id')
+    )
+
+
+def con_texto(fichas, busqueda):
+    """Fichas cuyo texto tiene cada palabra de la búsqueda como prefijo de alguna palabra."""
+    busqueda = normalizar(busqueda)
+    if not palabras_busqueda(busqueda):
+        return fichas
+    return fichas.annotate(
+        coincidencia=CoincidenciaTexto(consulta_booleana(busqueda), 'texto')
+    ).filter(coincidencia__gt=0)
@@ -0,0 +1,169 @@
+"""
+Exportación del catálogo de un proveedor.
+
+Los CSV/JSON se generan como streams sobre `.iterator(chunk_size=...)`, sin
+materializar el catálogo en memoria. El snapshot público es un JSON
+comprimido con gzip que se regenera solo cuando cambia el catálogo o el
+perfil del proveedor; las descargas repetidas sirven el archivo tal cual.
+Al escribir una versión se borran solo las anteriores: otra petición puede
+estar por abrir una igual o más nueva. Si aun así el archivo desaparece
+antes de abrirlo (la versión leída ya quedó vieja), abrir_snapshot relee el
+proveedor y lo vuelve a generar.
+"""
+import csv
+import gzip
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ProductoServicio, Promocion
+
+TAMANO_CHUNK = 2000
+INTENTOS_SNAPSHOT = 3
+
+CAMPOS_PRODUCTO = [
+    'id', 'nombre', 'descripcion', 'categoria', 'precio_referencia',
+    'destacado', 'activo', 'fecha_creacion', 'fecha_actualizacion',
+]
+CAMPOS_PROMOCION = [
+    'id', 'titulo', 'descripcion', 'fecha_inicio', 'fecha_fin', 'activo', 'estado', 'fecha_creacion',
+]
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de escribirla."""
+    def write(self, valor):
+        return valor
+
+
+def productos_qs(proveedor, solo_activos=False):
+    productos = ProductoServicio.objects.filter(proveedor=proveedor)
+    if solo_activos:
+        productos = productos.filter(activo=True)
+    return productos.order_by('id').values(*CAMPOS_PRODUCTO)
+
+
+def promociones_qs(proveedor, solo_activas=False):
+    promociones = Promocion.objects.filter(proveedor=proveedor)
+    if solo_activas:
+        promociones = promociones.filter(activo=True)
+    return promociones.order_by('id').values(*CAMPOS_PROMOCION)
+
+
+def datos_contacto(proveedor):
+    return {
+        'id': proveedor.id,
+        'nombre_empresa': proveedor.nombre_empresa,
+        'descripcion': proveedor.descripcion,
+        'region': proveedor.region.nombre if proveedor.region_id else None,
+        'comuna': proveedor.comuna.nombre if proveedor.comuna_id else None,
+        'direccion': proveedor.direccion,
+        'cobertura': proveedor.cobertura,
+        'telefono': proveedor.telefono,
+        'whatsapp': proveedor.whatsapp,
+        'email': proveedor.email,
+        'sitio_web': proveedor.sitio_web,
+    }
+
+
+def csv_stream(filas, campos):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(campos)
+    for fila in filas.iterator(chunk_size=TAMANO_CHUNK):
+        yield escritor.writerow([fila[c] for c in campos])
+
+
+def json_stream(proveedor, publico=False):
+    """Genera el catálogo completo como JSON, por fragmentos."""
+    yield '{"proveedor": '
+    yield json.dumps(datos_contacto(proveedor), cls=DjangoJSONEncoder, ensure_ascii=False)
+
+    secciones = (
+        ('productos', productos_qs(proveedor, solo_activos=publico)),
+        ('promociones', promociones_qs(proveedor, solo_activas=publico)),
+    )
+    for nombre, filas in secciones:
+        yield f', "{nombre}": ['
+        separador = ''
+        for fila in filas.iterator(chunk_size=TAMANO_CHUNK):
+            yield separador + json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False)
+            separador = ', '
+        yield ']'
+    yield '}'
+
+
+# ---------- Snapshot comprimido ----------
+
+def _directorio_snapshots():
+    directorio = settings.CATALOGO_SNAPSHOTS_ROOT
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def version_catalogo(proveedor):
+    """Marca de versión: cambia cuando cambia el catálogo o el perfil."""
+    marcas = [m for m in (proveedor.catalogo_actualizado, proveedor.fecha_actualizacion) if m]
+    return int(max(marcas).timestamp() * 1_000_000) if marcas else 0
+
+
+def obtener_snapshot(proveedor):
+    """
+    Devuelve (ruta, version) del snapshot gzip vigente del proveedor,
+    generándolo solo si la versión actual todavía no existe en disco.
+    """
+    directorio = _directorio_snapshots()
+    version = version_catalogo(proveedor)
+    prefijo = f'proveedor_{proveedor.id}_'
+    ruta = os.path.join(directorio, f'{prefijo}{version}.json.gz')
+
+    if os.path.exists(ruta):
+        return ruta, version
+
+    fd, ruta_tmp = tempfile.mkstemp(dir=directorio, prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as destino:
+            with gzip.GzipFile(fileobj=destino, mode='wb') as comprimido:
+                for fragmento in json_stream(proveedor, publico=True):
+                    comprimido.write(fragmento.encode('utf-8'))
+        os.replace(ruta_tmp, ruta)
+    except Exception:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+
+    # Borrar versiones anteriores del mismo proveedor (nunca las más nuevas)
+    with os.scandir(directorio) as entradas:
+        for entrada in entradas:
+            if not entrada.name.startswith(prefijo) or not entrada.name.endswith('.json.gz'):
+                continue
+            try:
+                anterior = int(entrada.name[len(prefijo):-len('.json.gz')])
+            except ValueError:
+                continue
+            if anterior < version:
+                try:
+                    os.remove(entrada.path)
+                except FileNotFoundError:
+                    pass
+
+    return ruta, version
+
+
+def abrir_snapshot(proveedor):
+    """
+    Devuelve (archivo, version) con el snapshot vigente ya abierto. Si el
+    archivo se borró entre generarlo y abrirlo, otra petición escribió una
+    versión más nueva: se relee el proveedor y se intenta de nuevo.
+    """
+    for intento in range(INTENTOS_SNAPSHOT):
+        if intento:
+            proveedor.refresh_from_db(fields=['catalogo_actualizado', 'fecha_actualizacion'])
+        ruta, version = obtener_snapshot(proveedor)
+        try:
+            return open(ruta, 'rb'), version
+        except FileNotFoundError:
+            if intento == INTENTOS_SNAPSHOT - 1:
+                raise
@@ -1,7 +1,11 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+
+from usuarios.models import INTERESTS_CHOICES, TIPO_NEGOCIO_CHOICES
+
 from .models import (
+    CampanaContacto,
     Proveedor,
     ProductoServicio,
     Promocion,
@@ -10,6 +14,14 @@ from .models import (
     Region,
     Comuna
 )
+from . import geografia
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
 
 
 class ProveedorForm(forms.ModelForm):
@@ -27,6 +39,8 @@ class ProveedorForm(forms.ModelForm):
             'region',
             'comuna',
             'direccion',
+            'latitud',
+            'longitud',
             'cobertura',
             'telefono',
             'whatsapp',
@@ -70,6 +84,16 @@ class ProveedorForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Dirección de tu negocio'
             }),
+            'latitud': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'step': 'any',
+                'placeholder': '-33.4372'
+            }),
+            'longitud': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'step': 'any',
+                'placeholder': '-70.6506'
+            }),
             'cobertura': forms.Select(attrs={
                 'class': 'form-control'
             }),
@@ -112,6 +136,8 @@ class ProveedorForm(forms.ModelForm):
             'region': 'Región',
             'comuna': 'Comuna',
             'direccion': 'Dirección',
+            'latitud': 'Latitud',
+            'longitud': 'Longitud',
             'cobertura': 'Zona de Cobertura *',
             'telefono': 'Teléfono',
             'whatsapp': 'WhatsApp *',
@@ -125,6 +151,7 @@ class ProveedorForm(forms.ModelForm):
             'descripcion': 'Describe qué productos o servicios ofreces y qué te hace especial.',
             'categorias': 'Selecciona todos los rubros que apliquen a tu negocio.',
             'cobertura': 'Área geográfica donde ofreces tus servicios.',
+            'latitud': 'Opcional. Si la dejas vacía se usa el centro de tu comuna.',
             'whatsapp': 'Principal medio de contacto para los comerciantes.',
             'instagram': 'Ingresa solo el nombre de usuario sin @',
             'twitter': 'Ingresa solo el nombre de usuario sin @',
@@ -133,17 +160,27 @@ class ProveedorForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Si hay una instancia, filtrar comunas por región
-        if self.instance.pk and self.instance.region:
-            self.fields['comuna'].queryset = Comuna.objects.filter(
-                region=self.instance.region
-            )
+        # Comunas de la región enviada (o de la guardada). Las opciones salen
+        # del árbol en memoria; el queryset solo se usa para validar el POST.
+        region_id = self.instance.region_id if self.instance.pk else None
+        if self.is_bound:
+            region_id = _entero(self.data.get('region'))
+        if region_id:
+            self.fields['comuna'].queryset = Comuna.objects.filter(region_id=region_id)
+            self.fields['comuna'].choices = geografia.opciones_comunas(region_id)
         else:
             self.fields['comuna'].queryset = Comuna.objects.none()
+        self.fields['pais'].choices = geografia.opciones_paises()
+        self.fields['region'].choices = geografia.opciones_regiones()
         
         # Hacer que la imagen no sea requerida en edición
         if self.instance.pk:
             self.fields['foto'].required = False
+        
+        # Las coordenadas copiadas de la comuna no se muestran como propias
+        if self.instance.pk and not self.instance.ubicacion_exacta:
+            self.initial['latitud'] = None
+            self.initial['longitud'] = None
 
     def clean_instagram(self):
         """Limpiar el campo Instagram para quitar @ si lo incluye"""
@@ -177,6 +214,15 @@ class ProveedorForm(forms.ModelForm):
             if comuna.region != region:
                 raise ValidationError('La comuna seleccionada no pertenece a la región.')
         
+        # Coordenadas: ambas o ninguna, y dentro de rango
+        latitud = cleaned_data.get('latitud')
+        longitud = cleaned_data.get('longitud')
+        if (latitud is None) != (longitud is None):
+            raise ValidationError('Ingresa latitud y longitud, o deja ambas vacías.')
+        if latitud is not None and not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+            raise ValidationError('Las coordenadas están fuera de rango.')
+        self.instance.ubicacion_exacta = latitud is not None
+        
         return cleaned_data
 
 
@@ -251,6 +297,29 @@ class ProductoServicioForm(forms.ModelForm):
         return precio
 
 
+class ImportarProductosForm(forms.Form):
+    """
+    Formulario para la carga masiva del catálogo desde CSV o XLSX
+    """
+    EXTENSIONES_PERMITIDAS = ('.csv', '.xlsx')
+
+    archivo = forms.FileField(
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,.xlsx'
+        }),
+        label='Archivo CSV o XLSX *',
+        help_text='Columnas: nombre, descripcion, categoria, precio_referencia, destacado, activo.'
+    )
+
+    def clean_archivo(self):
+        """Validar la extensión del archivo"""
+        archivo = self.cleaned_data.get('archivo')
+        if archivo and not archivo.name.lower().endswith(self.EXTENSIONES_PERMITIDAS):
+            raise ValidationError('El archivo debe ser .csv o .xlsx.')
+        return archivo
+
+
 class PromocionForm(forms.ModelForm):
     """
     Formulario para crear y editar promociones
@@ -365,6 +434,76 @@ class SolicitudContactoForm(forms.ModelForm):
         return mensaje.strip()
 
 
+class CampanaContactoForm(forms.ModelForm):
+    """
+    Formulario para crear una campaña de contacto a un segmento de comercios
+    """
+    tipo_negocio = forms.ChoiceField(
+        required=False,
+        choices=[('', 'Todos los tipos')] + TIPO_NEGOCIO_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label='Tipo de negocio',
+    )
+    intereses = forms.MultipleChoiceField(
+        required=False,
+        choices=INTERESTS_CHOICES,
+        widget=forms.CheckboxSelectMultiple,
+        label='Intereses',
+        help_text='Se incluyen los comercios con al menos uno de los intereses marcados.',
+    )
+
+    class Meta:
+        model = CampanaContacto
+        fields = ['nombre', 'mensaje', 'comuna', 'region', 'tipo_negocio', 'intereses']
+        widgets = {
+            'nombre': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Ej: Lanzamiento bebidas Providencia',
+                'required': True
+            }),
+            'mensaje': forms.Textarea(attrs={
+                'class': 'form-control',
+                'rows': 6,
+                'placeholder': 'Mensaje de presentación que recibirá cada comercio...',
+                'required': True
+            }),
+            'comuna': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Todas las comunas'
+            }),
+            'region': forms.Select(attrs={
+                'class': 'form-control'
+            }),
+        }
+        labels = {
+            'nombre': 'Nombre de la Campaña *',
+            'mensaje': 'Mensaje de Presentación *',
+            'comuna': 'Comuna',
+            'region': 'Región',
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['region'].choices = geografia.opciones_regiones('Todas las regiones')
+        if self.instance.pk and not self.is_bound:
+            self.initial['intereses'] = self.instance.codigos_intereses()
+
+    def clean_mensaje(self):
+        """Mismas reglas que una solicitud individual"""
+        mensaje = self.cleaned_data.get('mensaje', '')
+        if len(mensaje.strip()) < 20:
+            raise ValidationError('El mensaje debe tener al menos 20 caracteres.')
+        if len(mensaje) > 1000:
+            raise ValidationError('El mensaje no puede superar los 1000 caracteres.')
+        return mensaje.strip()
+
+    def clean_comuna(self):
+        return self.cleaned_data.get('comuna', '').strip()
+
+    def clean_intereses(self):
+        return ','.join(self.cleaned_data.get('intereses', []))
+
+
 class BusquedaProveedorForm(forms.Form):
     """
     Formulario de búsqueda y filtros para el directorio de proveedores
@@ -422,15 +561,15 @@ class BusquedaProveedorForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
+        self.fields['region'].choices = geografia.opciones_regiones('Todas las regiones')
+
         # Si hay una región seleccionada, filtrar comunas
-        if 'region' in self.data:
-            try:
-                region_id = int(self.data.get('region'))
-                self.fields['comuna'].queryset = Comuna.objects.filter(
-                    region_id=region_id
-                ).order_by('nombre')
-            except (ValueError, TypeError):
-                pass
+        region_id = _entero(self.data.get('region'))
+        if region_id:
+            self.fields['comuna'].queryset = Comuna.objects.filter(
+                region_id=region_id
+            ).order_by('nombre')
+            self.fields['comuna'].choices = geografia.opciones_comunas(region_id, 'Todas las comunas')
 
 
 class ContactoProveedorForm(forms.Form):
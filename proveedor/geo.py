@@ -0,0 +1,131 @@
+"""
+Búsqueda por cercanía sin PostGIS ni geocodificador externo.
+
+Las comunas (y opcionalmente los proveedores) guardan latitud, longitud y
+su geohash. Una búsqueda "a menos de X km" se resuelve en tres pasos:
+
+1. celdas: los prefijos de geohash que cubren la caja del radio, buscados
+   con LIKE 'prefijo%' sobre el índice de `geohash`;
+2. caja: rango de latitud y longitud alrededor del punto (descarta las
+   esquinas de las celdas);
+3. haversine exacto solo sobre los candidatos que sobreviven.
+
+Este módulo no depende de los modelos: trabaja sobre cualquier queryset con
+campos `latitud`, `longitud` y `geohash`.
+"""
+import math
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO_LATITUD = 111.32
+PRECISION_GEOHASH = 9
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def codificar_geohash(latitud, longitud, precision=PRECISION_GEOHASH):
+    """Geohash estándar (base32, bits intercalados empezando por longitud)."""
+    if latitud is None or longitud is None:
+        return ''
+    rango_lat, rango_lon = [-90.0, 90.0], [-180.0, 180.0]
+    resultado, bits, caracter, par = [], 0, 0, True
+    while len(resultado) < precision:
+        rango, valor = (rango_lon, longitud) if par else (rango_lat, latitud)
+        medio = (rango[0] + rango[1]) / 2
+        caracter <<= 1
+        if valor >= medio:
+            caracter |= 1
+            rango[0] = medio
+        else:
+            rango[1] = medio
+        par = not par
+        bits += 1
+        if bits == 5:
+            resultado.append(_BASE32[caracter])
+            bits, caracter = 0, 0
+    return ''.join(resultado)
+
+
+def distancia_km(lat1, lon1, lat2, lon2):
+    """Distancia haversine entre dos puntos, en kilómetros."""
+    fi1, fi2 = math.radians(lat1), math.radians(lat2)
+    dfi = fi2 - fi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dfi / 2) ** 2 + math.cos(fi1) * math.cos(fi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def caja(latitud, longitud, radio_km):
+    """(lat_min, lat_max, lon_min, lon_max) que contiene el círculo del radio."""
+    delta_lat = radio_km / KM_POR_GRADO_LATITUD
+    coseno = max(math.cos(math.radians(latitud)), 0.01)
+    delta_lon = radio_km / (KM_POR_GRADO_LATITUD * coseno)
+    return (
+        max(latitud - delta_lat, -90.0),
+        min(latitud + delta_lat, 90.0),
+        max(longitud - delta_lon, -180.0),
+        min(longitud + delta_lon, 180.0),
+    )
+
+
+def _tamano_celda(precision):
+    """(alto, ancho) en grados de una celda de geohash de esa precisión."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def celdas(latitud, longitud, radio_km):
+    """
+    Prefijos de geohash que cubren la caja del radio. Se usa la precisión
+    más fina cuya celda sea al menos tan grande como la caja, así bastan las
+    celdas de las cuatro esquinas (a lo más 4). Lista vacía si el radio es
+    tan grande que no conviene filtrar por celda.
+    """
+    lat_min, lat_max, lon_min, lon_max = caja(latitud, longitud, radio_km)
+    precision = 0
+    for p in range(1, PRECISION_GEOHASH + 1):
+        alto, ancho = _tamano_celda(p)
+        if alto < lat_max - lat_min or ancho < lon_max - lon_min:
+            break
+        precision = p
+    if precision == 0:
+        return []
+    return sorted({
+        codificar_geohash(lat, lon, precision)
+        for lat in (lat_min, lat_max)
+        for lon in (lon_min, lon_max)
+    })
+
+
+def filtrar_cercanos(queryset, latitud, longitud, radio_km):
+    """Prefiltro indexado: celdas de geohash + caja de latitud/longitud."""
+    lat_min, lat_max, lon_min, lon_max = caja(latitud, longitud, radio_km)
+    queryset = queryset.filter(
+        latitud__gte=lat_min, latitud__lte=lat_max,
+        longitud__gte=lon_min, longitud__lte=lon_max,
+    )
+    prefijos = celdas(latitud, longitud, radio_km)
+    if prefijos:
+        queryset = queryset.filter(reduce(or_, (Q(geohash__startswith=p) for p in prefijos)))
+    return queryset
+
+
+def ordenar_por_distancia(queryset, latitud, longitud, radio_km):
+    """
+    Lista de (distancia_km, id) de los objetos a menos de `radio_km`, de más
+    cerca a más lejos. Solo lee id y coordenadas de los candidatos.
+    """
+    candidatos = (
+        filtrar_cercanos(queryset, latitud, longitud, radio_km)
+        .prefetch_related(None)
+        .values_list('id', 'latitud', 'longitud')
+    )
+    resultado = []
+    for objeto_id, lat, lon in candidatos:
+        distancia = distancia_km(latitud, longitud, lat, lon)
+        if distancia <= radio_km:
+            resultado.append((round(distancia, 1), objeto_id))
+    resultado.sort()
+    return resultado
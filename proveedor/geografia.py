@@ -0,0 +1,243 @@
+"""
+Árbol País > Región > Comuna en memoria del proceso.
+
+La jerarquía casi nunca cambia y se lee en cada formulario, filtro y
+llamada AJAX de comunas, así que se carga una vez por proceso en una
+estructura inmutable (tuplas y MappingProxyType) que cualquier vista puede
+compartir sin copiarla. Al guardar o borrar un país, región o comuna la
+señal la invalida en el proceso actual; los demás procesos la recargan al
+vencer GEOGRAFIA_TTL.
+
+`version` es un digest del contenido: sirve de ETag para las respuestas
+AJAX y de huella para el JSON estático que genera `exportar_geografia`
+(static/geografia/comunas.<version>.json), que el navegador puede guardar
+para siempre porque un cambio de datos cambia el nombre del archivo.
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.templatetags.static import static
+
+from .models import Comuna, Pais, Region
+from .texto import normalizar
+
+PaisGeo = namedtuple('PaisGeo', 'id nombre codigo')
+RegionGeo = namedtuple('RegionGeo', 'id nombre pais_id')
+ComunaGeo = namedtuple('ComunaGeo', 'id nombre region latitud longitud')
+
+Arbol = namedtuple('Arbol', [
+    'paises',               # tupla de PaisGeo, por nombre
+    'regiones',             # tupla de RegionGeo, por nombre
+    'comunas',              # tupla de ComunaGeo, por región y nombre
+    'comunas_por_region',   # region_id -> tupla de ComunaGeo
+    'region_por_id',
+    'comuna_por_id',
+    'comuna_por_nombre',    # nombre normalizado -> id (sin nombres repetidos)
+    'version',
+])
+
+# Parecido mínimo (difflib) para aceptar un nombre mal escrito
+UMBRAL_PARECIDO = 0.85
+
+# Formas en que se escriben comunas cuyo nombre oficial es otro
+ALIAS_COMUNAS = {
+    'santiago centro': 'santiago',
+    'stgo': 'santiago',
+    'stgo centro': 'santiago',
+    'coyhaique': 'coihaique',
+    'aysen': 'aisen',
+    'puerto aysen': 'aisen',
+    'puerto natales': 'natales',
+    'la calera': 'calera',
+    'san francisco de mostazal': 'mostazal',
+    'hanga roa': 'isla de pascua',
+    'rapa nui': 'isla de pascua',
+}
+
+_bloqueo = threading.Lock()
+_arbol = None
+_cargado_en = 0.0
+
+
+def ttl():
+    return getattr(settings, 'GEOGRAFIA_TTL', 300)
+
+
+def _cargar():
+    paises = tuple(
+        PaisGeo(*fila)
+        for fila in Pais.objects.order_by('nombre', 'id').values_list('id', 'nombre', 'codigo')
+    )
+    regiones = tuple(
+        RegionGeo(*fila)
+        for fila in Region.objects.order_by('nombre', 'id').values_list('id', 'nombre', 'pais_id')
+    )
+    region_por_id = {r.id: r for r in regiones}
+
+    comunas_por_region = {}
+    filas = Comuna.objects.order_by('nombre', 'id').values_list(
+        'id', 'nombre', 'region_id', 'latitud', 'longitud'
+    )
+    for comuna_id, nombre, region_id, latitud, longitud in filas:
+        comuna = ComunaGeo(comuna_id, nombre, region_por_id[region_id], latitud, longitud)
+        comunas_por_region.setdefault(region_id, []).append(comuna)
+
+    comunas = tuple(c for r in regiones for c in comunas_por_region.get(r.id, ()))
+    return Arbol(
+        paises=paises,
+        regiones=regiones,
+        comunas=comunas,
+        comunas_por_region=MappingProxyType({k: tuple(v) for k, v in comunas_por_region.items()}),
+        region_por_id=MappingProxyType(region_por_id),
+        comuna_por_id=MappingProxyType({c.id: c for c in comunas}),
+        comuna_por_nombre=MappingProxyType(_indice_nombres(comunas)),
+        version=hashlib.sha1(_serializar(paises, regiones, comunas).encode('utf-8')).hexdigest()[:12],
+    )
+
+
+def clave_nombre(texto):
+    """Forma comparable de un nombre de comuna escrito a mano."""
+    clave = normalizar(re.sub(r'[_\-]', ' ', texto or ''))
+    clave = ' '.join(re.sub(r'[^a-z0-9 ]', '', clave).split())
+    clave = clave.removeprefix('comuna de ').removeprefix('comuna ')
+    return ALIAS_COMUNAS.get(clave, clave)
+
+
+def _indice_nombres(comunas):
+    indice, repetidos = {}, set()
+    for c in comunas:
+        clave = clave_nombre(c.nombre)
+        if clave in indice:
+            repetidos.add(clave)
+        indice[clave] = c.id
+    for clave in repetidos:
+        del indice[clave]
+    return indice
+
+
+def _serializar(paises, regiones, comunas, version=''):
+    """JSON compacto del árbol; es lo que se firma y lo que se publica."""
+    comunas_por_region = {}
+    for c in comunas:
+        comunas_por_region.setdefault(str(c.region.id), []).append(
+            {'id': c.id, 'nombre': c.nombre, 'latitud': c.latitud, 'longitud': c.longitud}
+        )
+    datos = {
+        'paises': [p._asdict() for p in paises],
+        'regiones': [r._asdict() for r in regiones],
+        'comunas': comunas_por_region,
+    }
+    if version:
+        datos = {'version': version, **datos}
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':'))
+
+
+def arbol():
+    """El árbol vigente; lo carga si no existe o si venció el TTL."""
+    global _arbol, _cargado_en
+    actual = _arbol
+    if actual is not None and time.monotonic() - _cargado_en < ttl():
+        return actual
+    with _bloqueo:
+        if _arbol is None or time.monotonic() - _cargado_en >= ttl():
+            _arbol = _cargar()
+            _cargado_en = time.monotonic()
+        return _arbol
+
+
+def invalidar():
+    global _arbol
+    with _bloqueo:
+        _arbol = None
+
+
+def comunas_de(region_id):
+    """Comunas de una región, por nombre (tupla vacía si la región no existe)."""
+    return arbol().comunas_por_region.get(region_id, ())
+
+
+def buscar_comuna(texto):
+    """
+    Id de la comuna que corresponde a un nombre escrito a mano (sin tildes,
+    mayúsculas ni guiones bajos, alias conocidos y errores de tipeo leves),
+    o None si no calza con ninguna o calza con más de una.
+    """
+    clave = clave_nombre(texto)
+    if not clave:
+        return None
+    por_nombre = arbol().comuna_por_nombre
+    if clave in por_nombre:
+        return por_nombre[clave]
+    parecidos = difflib.get_close_matches(clave, por_nombre.keys(), n=1, cutoff=UMBRAL_PARECIDO)
+    return por_nombre[parecidos[0]] if parecidos else None
+
+
+def opciones_paises(vacia='---------'):
+    return [('', vacia)] + [(p.id, p.nombre) for p in arbol().paises]
+
+
+def opciones_regiones(vacia='---------'):
+    return [('', vacia)] + [(r.id, r.nombre) for r in arbol().regiones]
+
+
+def opciones_comunas(region_id, vacia='---------'):
+    return [('', vacia)] + [(c.id, c.nombre) for c in comunas_de(region_id)]
+
+
+def comunas_agrupadas():
+    """
+    Opciones agrupadas por región para un <select> de comuna cuyo valor es
+    el nombre (lo que guarda Comerciante.comuna).
+    """
+    actual = arbol()
+    return [
+        (r.nombre, [(c.nombre, c.nombre) for c in actual.comunas_por_region[r.id]])
+        for r in actual.regiones
+        if r.id in actual.comunas_por_region
+    ]
+
+
+# ---------- JSON estático ----------
+
+def nombre_archivo(version):
+    return f'comunas.{version}.json'
+
+
+def exportar(directorio=None):
+    """
+    Escribe el JSON del árbol vigente con su versión en el nombre.
+    Devuelve (ruta, creado); no reescribe un archivo que ya existe.
+    """
+    directorio = directorio or settings.GEOGRAFIA_STATIC_ROOT
+    os.makedirs(directorio, exist_ok=True)
+    actual = arbol()
+    ruta = os.path.join(directorio, nombre_archivo(actual.version))
+    if os.path.exists(ruta):
+        return ruta, False
+
+    contenido = _serializar(actual.paises, actual.regiones, actual.comunas, actual.version)
+    ruta_tmp = f'{ruta}.tmp'
+    with open(ruta_tmp, 'w', encoding='utf-8') as destino:
+        destino.write(contenido)
+    os.replace(ruta_tmp, ruta)
+    return ruta, True
+
+
+def url_estatica():
+    """
+    URL del JSON estático de la versión vigente, o None si todavía no se
+    generó (en ese caso el navegador usa la vista AJAX).
+    """
+    version = arbol().version
+    ruta = os.path.join(settings.GEOGRAFIA_STATIC_ROOT, nombre_archivo(version))
+    if not os.path.exists(ruta):
+        return None
+    return static(f'geografia/{nombre_archivo(version)}')
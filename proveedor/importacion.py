@@ -0,0 +1,329 @@
+"""
+Importación masiva del catálogo de un proveedor desde CSV o XLSX.
+
+El archivo se lee fila a fila (nunca completo en memoria). Cada fila se valida
+con las mismas reglas de ProductoServicioForm y las filas válidas se escriben
+en lotes: bulk_create para las nuevas y un upsert por id para las existentes
+(ver _actualizar_existentes: en MySQL no lleva unique_fields). Toda la
+importación es una transacción; las filas sin cambios no se reescriben.
+La clave de upsert es el nombre del producto dentro del catálogo del
+proveedor sin distinguir mayúsculas, igual que la collation de MySQL: al
+empezar se lee nombre -> id de todo el catálogo (una lectura) y cada lote
+trae solo sus filas por id. Los cambios de precio se anotan en el historial
+de precios y en el registro de cambios con un bulk_create por lote.
+"""
+import csv
+import io
+import os
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import autocompletar, trigramas
+from .forms import ProductoServicioForm
+from .models import ProductoServicio
+from .cambios import accion_guardado, registrar_cambios
+from .precios import registrar_precios
+
+TAMANO_LOTE = 1000
+MAX_ERRORES_REPORTADOS = 500
+
+COLUMNAS = ['nombre', 'descripcion', 'categoria', 'precio_referencia', 'destacado', 'activo']
+CAMPOS_DATOS = ['descripcion', 'categoria', 'precio_referencia', 'destacado', 'activo']
+CAMPOS_ACTUALIZABLES = ['nombre'] + CAMPOS_DATOS + ['fecha_actualizacion']
+
+VALORES_VERDADEROS = {'1', 'si', 'sí', 's', 'true', 'verdadero', 'x', 'yes', 'y'}
+
+
+class ImportacionProductoForm(ProductoServicioForm):
+    """
+    ProductoServicioForm sin imagen: una fila de la planilla.
+    Se reutiliza la misma instancia para todas las filas con `validar()`,
+    evitando copiar los campos del formulario 50 mil veces.
+    """
+    class Meta(ProductoServicioForm.Meta):
+        fields = [f for f in ProductoServicioForm.Meta.fields if f != 'imagen']
+
+    def validar(self, datos):
+        self.data = datos
+        self._errors = None
+        return self.is_valid()
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.filas = 0
+        self.creados = 0
+        self.actualizados = 0
+        self.sin_cambios = 0
+        self.total_errores = 0
+        self.errores = []
+
+    def agregar_error(self, fila, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES_REPORTADOS:
+            self.errores.append((fila, mensaje))
+
+    @property
+    def errores_omitidos(self):
+        return self.total_errores - len(self.errores)
+
+
+def _normalizar_encabezado(valor):
+    texto = unicodedata.normalize('NFKD', str(valor or '')).encode('ascii', 'ignore').decode()
+    return texto.strip().lower().replace(' ', '_')
+
+
+def _mapa_categorias():
+    mapa = {}
+    for codigo, etiqueta in ProductoServicio.CATEGORIA_CHOICES:
+        mapa[codigo.lower()] = codigo
+        mapa[etiqueta.lower()] = codigo
+    return mapa
+
+
+def _normalizar_precio(valor):
+    """Acepta '1990', '1.990', '$ 1.990', '1990,50' y '1.990,50'."""
+    if valor is None:
+        return ''
+    if isinstance(valor, (int, float, Decimal)):
+        return str(valor)
+    texto = str(valor).replace('$', '').replace(' ', '').strip()
+    if not texto:
+        return ''
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    elif texto.count('.') > 1 or (texto.count('.') == 1 and len(texto.split('.')[1]) == 3):
+        # Punto como separador de miles (formato chileno)
+        texto = texto.replace('.', '')
+    try:
+        return str(Decimal(texto))
+    except InvalidOperation:
+        return str(valor)
+
+
+def _normalizar_booleano(valor, por_defecto):
+    if valor is None or str(valor).strip() == '':
+        return por_defecto
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() in VALORES_VERDADEROS
+
+
+def _filas_csv(archivo):
+    archivo.seek(0)
+    muestra = archivo.read(4096)
+    if isinstance(muestra, bytes):
+        muestra = muestra.decode('utf-8-sig', errors='ignore')
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    archivo.seek(0)
+
+    texto = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+    try:
+        lector = csv.reader(texto, dialecto)
+        for fila in lector:
+            yield fila
+    finally:
+        # No cerrar el archivo subido junto con el wrapper
+        texto.detach()
+
+
+def _filas_xlsx(archivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('La importación de XLSX requiere el paquete openpyxl.')
+
+    archivo.seek(0)
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        for fila in libro.active.iter_rows(values_only=True):
+            yield ['' if celda is None else celda for celda in fila]
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo):
+    """Genera diccionarios {columna: valor} a partir de un CSV o XLSX subido."""
+    extension = os.path.splitext(archivo.name)[1].lower()
+    filas = _filas_xlsx(archivo) if extension == '.xlsx' else _filas_csv(archivo)
+
+    encabezados = None
+    for fila in filas:
+        if encabezados is None:
+            encabezados = [_normalizar_encabezado(c) for c in fila]
+            if 'nombre' not in encabezados:
+                raise ValueError('El archivo debe tener una columna "nombre".')
+            continue
+        if not any(str(c).strip() for c in fila):
+            continue
+        yield dict(zip(encabezados, fila))
+
+
+def clave_nombre(nombre):
+    """Clave del upsert: el nombre sin distinguir mayúsculas (como la collation de MySQL)."""
+    return nombre.casefold()
+
+
+def importar_productos(proveedor, archivo):
+    """
+    Importa el archivo en una sola transacción: un error a mitad de camino
+    no deja lotes a medio aplicar.
+    """
+    resultado = ResultadoImportacion()
+    categorias = _mapa_categorias()
+    form = ImportacionProductoForm(data={})
+    lote = {}
+    reindexar = []
+
+    with transaction.atomic():
+        # Nombre de cada producto del catálogo -> id (solo ids, no los datos)
+        ids_existentes = {
+            clave_nombre(nombre): producto_id
+            for producto_id, nombre in ProductoServicio.objects
+            .filter(proveedor=proveedor)
+            .order_by('id')
+            .values_list('id', 'nombre')
+            .iterator(chunk_size=TAMANO_LOTE)
+        }
+
+        for numero, fila in enumerate(leer_filas(archivo), start=2):
+            resultado.filas += 1
+            categoria = str(fila.get('categoria') or '').strip()
+            datos = {
+                'nombre': str(fila.get('nombre') or '').strip(),
+                'descripcion': str(fila.get('descripcion') or '').strip(),
+                'categoria': categorias.get(categoria.lower(), categoria) if categoria else 'OTRO',
+                'precio_referencia': _normalizar_precio(fila.get('precio_referencia')),
+                'destacado': _normalizar_booleano(fila.get('destacado'), False),
+                'activo': _normalizar_booleano(fila.get('activo'), True),
+            }
+
+            if not form.validar(datos):
+                mensajes = '; '.join(
+                    f"{campo}: {', '.join(errores)}" for campo, errores in form.errors.items()
+                )
+                resultado.agregar_error(numero, mensajes)
+                continue
+
+            # Si el nombre se repite en el archivo, gana la última fila
+            lote[clave_nombre(form.cleaned_data['nombre'])] = {c: form.cleaned_data[c] for c in COLUMNAS}
+            if len(lote) >= TAMANO_LOTE:
+                reindexar.extend(_guardar_lote(proveedor, lote, ids_existentes, resultado))
+                lote = {}
+
+        if lote:
+            reindexar.extend(_guardar_lote(proveedor, lote, ids_existentes, resultado))
+
+        # bulk_create no emite señales: los trigramas de los productos nuevos
+        # o renombrados se escriben aquí
+        trigramas.indexar('producto', reindexar)
+
+    # Invalidar el snapshot y el autocompletado
+    if resultado.creados or resultado.actualizados:
+        proveedor.marcar_catalogo_actualizado()
+        autocompletar.productos_importados(proveedor.id)
+
+    return resultado
+
+
+def _actualizar_existentes(productos):
+    """
+    Reescribe productos existentes (con pk) con un upsert por clave primaria,
+    que evita el CASE WHEN por fila y campo de bulk_update. MySQL no acepta
+    columnas de conflicto (ON DUPLICATE KEY UPDATE choca por la clave
+    primaria); los motores sin upsert usan bulk_update.
+    """
+    if not productos:
+        return
+    caracteristicas = connection.features
+    if caracteristicas.supports_update_conflicts_with_target:
+        ProductoServicio.objects.bulk_create(
+            productos, batch_size=TAMANO_LOTE, update_conflicts=True,
+            unique_fields=['id'], update_fields=CAMPOS_ACTUALIZABLES,
+        )
+    elif caracteristicas.supports_update_conflicts:
+        ProductoServicio.objects.bulk_create(
+            productos, batch_size=TAMANO_LOTE, update_conflicts=True,
+            update_fields=CAMPOS_ACTUALIZABLES,
+        )
+    else:
+        ProductoServicio.objects.bulk_update(productos, CAMPOS_ACTUALIZABLES, batch_size=TAMANO_LOTE)
+
+
+def _guardar_lote(proveedor, lote, ids_existentes, resultado):
+    """
+    Escribe un lote {clave: datos}. Devuelve los (id, nombre) de los
+    productos creados o renombrados, para reindexar sus trigramas.
+    """
+    ahora = timezone.now()
+    existentes = {
+        fila[0]: fila[1:]
+        for fila in ProductoServicio.objects
+        .filter(pk__in=[ids_existentes[c] for c in lote if c in ids_existentes])
+        .values_list('id', 'nombre', *CAMPOS_DATOS)
+    }
+
+    nuevos, actualizados = [], []
+    cambios_precio = []
+    renombrados = []
+    for clave, datos in lote.items():
+        valores = tuple(datos[c] for c in CAMPOS_DATOS)
+        actual = existentes.get(ids_existentes.get(clave))
+        if actual is not None and actual[0] == datos['nombre'] and tuple(actual[1:]) == valores:
+            # Sin cambios: no se reescribe la fila
+            continue
+
+        producto = ProductoServicio(
+            proveedor=proveedor,
+            nombre=datos['nombre'],
+            fecha_actualizacion=ahora,
+            **dict(zip(CAMPOS_DATOS, valores)),
+        )
+        if actual is not None:
+            producto.pk = ids_existentes[clave]
+            actualizados.append(producto)
+            if actual[0] != producto.nombre:
+                renombrados.append((producto.pk, producto.nombre))
+            if actual[1 + CAMPOS_DATOS.index('precio_referencia')] != producto.precio_referencia:
+                cambios_precio.append((producto.pk, producto.precio_referencia))
+        else:
+            nuevos.append(producto)
+
+    ProductoServicio.objects.bulk_create(nuevos, batch_size=TAMANO_LOTE)
+    _actualizar_existentes(actualizados)
+
+    # bulk_create no emite post_save: el historial de precios y el registro
+    # de cambios se escriben aquí. MySQL no devuelve los ids insertados,
+    # se leen por nombre (el más reciente si la collation junta varios).
+    if nuevos:
+        leidos = (
+            ProductoServicio.objects
+            .filter(proveedor=proveedor, nombre__in=[p.nombre for p in nuevos])
+            .order_by('id')
+            .values_list('nombre', 'id')
+        )
+        for nombre, producto_id in leidos:
+            ids_existentes[clave_nombre(nombre)] = producto_id
+        for producto in nuevos:
+            producto.pk = ids_existentes[clave_nombre(producto.nombre)]
+        cambios_precio.extend(
+            (p.pk, p.precio_referencia) for p in nuevos if p.precio_referencia is not None
+        )
+    registrar_precios(cambios_precio, ahora)
+    registrar_cambios(
+        proveedor.id,
+        'producto',
+        [(p.pk, 'creado') for p in nuevos] +
+        [(p.pk, accion_guardado(p, False)) for p in actualizados],
+    )
+
+    resultado.creados += len(nuevos)
+    resultado.actualizados += len(actualizados)
+    resultado.sin_cambios += len(lote) - len(nuevos) - len(actualizados)
+    return [(p.pk, p.nombre) for p in nuevos] + renombrados
@@ -0,0 +1,30 @@
+"""
+Ciclo de vida diario de promociones y beneficios, pensado para cron
+(por ejemplo, a las 00:05 hora de Chile):
+
+    python manage.py actualizar_promociones
+
+- Promociones: programada -> vigente -> finalizada según sus fechas, con un
+  UPDATE por transición; los inicios y fines quedan en el registro de
+  cambios del catálogo.
+- Beneficios: ACTIVO -> TERMINADO cuando `vence` ya pasó.
+
+Es idempotente: correrlo varias veces el mismo día no repite cambios.
+"""
+from django.core.management.base import BaseCommand
+
+from proveedor.promociones import actualizar_estados, hoy_local
+from usuarios.models import Beneficio
+
+
+class Command(BaseCommand):
+    help = 'Actualiza el estado de promociones y beneficios según la fecha actual.'
+
+    def handle(self, *args, **options):
+        hoy = hoy_local()
+
+        iniciadas, finalizadas = actualizar_estados(hoy)
+        self.stdout.write(f'{iniciadas} promociones iniciadas, {finalizadas} finalizadas.')
+
+        terminados = Beneficio.objects.filter(estado='ACTIVO', vence__lt=hoy).update(estado='TERMINADO')
+        self.stdout.write(f'{terminados} beneficios terminados.')
@@ -0,0 +1,73 @@
+"""
+Enlaza a cada comerciante con su comuna de la tabla de comunas a partir del
+texto que escribió al registrarse:
+
+    python manage.py asignar_comunas_comerciantes
+    python manage.py asignar_comunas_comerciantes --todos --lote 2000
+
+El texto se compara sin tildes, mayúsculas ni guiones bajos, con alias
+conocidos ('Stgo', 'Coyhaique') y tolerando errores de tipeo leves. Cada
+texto distinto se resuelve una vez y los comerciantes se actualizan por
+lotes con bulk_update. Al final se listan los textos que no calzaron con
+ninguna comuna, con cuántos comerciantes los usan.
+
+Los registros nuevos se enlazan solos al guardarse (Comerciante.save); el
+comando es para los existentes y después de cargar comunas con
+`cargar_territorio`. El índice (rol, comuna_oficial, tipo_negocio, id) se
+crea con la migración usuarios 0009.
+"""
+from collections import Counter
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from proveedor.geografia import buscar_comuna
+from usuarios.models import Comerciante
+
+TAMANO_LOTE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Asigna comuna_oficial a los comerciantes según el texto de su comuna.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Recalcula también a los que ya tienen comuna asignada.',
+        )
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE)
+
+    def handle(self, *args, **options):
+        comerciantes = Comerciante.objects.order_by('id')
+        if not options['todos']:
+            comerciantes = comerciantes.filter(comuna_oficial__isnull=True)
+        filas = comerciantes.values_list('id', 'comuna', 'comuna_oficial_id').iterator(chunk_size=options['lote'])
+
+        resueltos = {}
+        sin_calce = Counter()
+        asignados = 0
+        while True:
+            lote = list(islice(filas, options['lote']))
+            if not lote:
+                break
+            cambios = []
+            for comerciante_id, texto, actual in lote:
+                if texto not in resueltos:
+                    resueltos[texto] = buscar_comuna(texto)
+                comuna_id = resueltos[texto]
+                if comuna_id is None:
+                    sin_calce[texto] += 1
+                elif comuna_id != actual:
+                    cambios.append(Comerciante(pk=comerciante_id, comuna_oficial_id=comuna_id))
+            with transaction.atomic():
+                Comerciante.objects.bulk_update(cambios, ['comuna_oficial'], batch_size=options['lote'])
+            asignados += len(cambios)
+
+        self.stdout.write(
+            f'{asignados} comerciantes enlazados a su comuna; '
+            f'{sum(sin_calce.values())} sin calce ({len(sin_calce)} textos distintos).'
+        )
+        for texto, cantidad in sin_calce.most_common():
+            self.stdout.write(f'  {texto!r}: {cantidad}')
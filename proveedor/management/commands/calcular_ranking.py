@@ -0,0 +1,20 @@
+"""
+Recalcula el puntaje de relevancia de las fichas del directorio, pensado
+para cron (por ejemplo, cada hora):
+
+    python manage.py calcular_ranking
+
+Solo se escriben las fichas cuyo puntaje cambió; el orden "Relevancia" de
+los directorios lee la columna ya calculada.
+"""
+from django.core.management.base import BaseCommand
+
+from proveedor.ranking import calcular_ranking
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el puntaje de relevancia de los proveedores del directorio.'
+
+    def handle(self, *args, **options):
+        fichas, actualizadas = calcular_ranking()
+        self.stdout.write(f'{fichas} fichas revisadas, {actualizadas} con puntaje nuevo.')
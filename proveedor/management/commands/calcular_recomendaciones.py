@@ -0,0 +1,34 @@
+"""
+Recalcula los proveedores recomendados de cada comerciante, pensado para
+cron (por ejemplo, todas las noches):
+
+    python manage.py calcular_recomendaciones
+    python manage.py calcular_recomendaciones --top 10
+
+Los comerciantes con el mismo perfil (comuna, tipo de negocio, intereses)
+comparten el cálculo; el resultado se guarda en RecomendacionProveedor, que
+la plataforma lee con una sola consulta.
+"""
+from django.core.management.base import BaseCommand
+
+from proveedor.recomendaciones import calcular_recomendaciones, top_por_defecto
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el top de proveedores recomendados para cada comerciante.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=None,
+            help='Proveedores por comerciante (por defecto RECOMENDACIONES_TOP).',
+        )
+
+    def handle(self, *args, **options):
+        top = options['top'] or top_por_defecto()
+        comerciantes, perfiles, filas = calcular_recomendaciones(top)
+        self.stdout.write(
+            f'{comerciantes} comerciantes ({perfiles} perfiles distintos), '
+            f'{filas} recomendaciones guardadas.'
+        )
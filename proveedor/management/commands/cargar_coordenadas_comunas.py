@@ -0,0 +1,90 @@
+"""
+Carga latitud y longitud de las comunas desde un CSV (nombre, region,
+latitud, longitud) y copia el punto a los proveedores sin ubicación exacta:
+
+    python manage.py cargar_coordenadas_comunas
+    python manage.py cargar_coordenadas_comunas --archivo otras_comunas.csv
+
+Por defecto usa proveedor/data/territorio_cl.csv (ver cargar_territorio,
+que ya carga estas coordenadas junto con las comunas); las filas sin
+coordenadas se ignoran. Las comunas se buscan por nombre sin tildes
+ni mayúsculas; si el nombre se repite en el archivo se desempata por región.
+Las comunas sin coincidencia quedan sin coordenadas y no aparecen en las
+búsquedas por cercanía.
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from proveedor.geo import codificar_geohash
+from proveedor.models import Comuna
+from proveedor.territorio import ARCHIVO as ARCHIVO_POR_DEFECTO, copiar_coordenadas_a_proveedores
+from proveedor.texto import normalizar
+
+TAMANO_LOTE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Carga las coordenadas de las comunas desde un CSV y actualiza a los proveedores.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archivo',
+            default=str(ARCHIVO_POR_DEFECTO),
+            help='CSV con columnas nombre, region, latitud, longitud.',
+        )
+
+    def handle(self, *args, **options):
+        puntos = self._leer(options['archivo'])
+
+        actualizadas, sin_datos = [], []
+        for comuna in Comuna.objects.select_related('region'):
+            punto = self._elegir(puntos.get(normalizar(comuna.nombre), []), comuna.region.nombre)
+            if punto is None:
+                sin_datos.append(comuna.nombre)
+                continue
+            comuna.latitud, comuna.longitud = punto
+            comuna.geohash = codificar_geohash(*punto)
+            actualizadas.append(comuna)
+
+        with transaction.atomic():
+            Comuna.objects.bulk_update(
+                actualizadas, ['latitud', 'longitud', 'geohash'], batch_size=TAMANO_LOTE
+            )
+            proveedores = copiar_coordenadas_a_proveedores()
+
+        self.stdout.write(
+            f'{len(actualizadas)} comunas con coordenadas, {len(sin_datos)} sin datos; '
+            f'{proveedores} proveedores actualizados.'
+        )
+        if sin_datos and options['verbosity'] > 1:
+            self.stdout.write('Sin datos: ' + ', '.join(sorted(sin_datos)))
+
+    def _leer(self, ruta):
+        """nombre normalizado -> [(región normalizada, (latitud, longitud))]"""
+        try:
+            with open(ruta, newline='', encoding='utf-8') as archivo:
+                puntos = {}
+                for fila in csv.DictReader(archivo):
+                    if not fila['latitud']:
+                        continue
+                    punto = (float(fila['latitud']), float(fila['longitud']))
+                    puntos.setdefault(normalizar(fila['nombre']), []).append(
+                        (normalizar(fila.get('region', '')), punto)
+                    )
+                return puntos
+        except OSError as e:
+            raise CommandError(f'No se pudo leer {ruta}: {e}')
+        except (KeyError, ValueError) as e:
+            raise CommandError(f'Formato inválido en {ruta}: {e}')
+
+    @staticmethod
+    def _elegir(candidatos, region):
+        if len(candidatos) == 1:
+            return candidatos[0][1]
+        region = normalizar(region)
+        for region_archivo, punto in candidatos:
+            if region_archivo and (region_archivo in region or region in region_archivo):
+                return punto
+        return None
@@ -0,0 +1,58 @@
+"""
+Carga o actualiza las regiones y comunas de Chile desde el archivo incluido:
+
+    python manage.py cargar_territorio
+    python manage.py cargar_territorio --archivo otro_territorio.csv
+
+Es idempotente (una segunda pasada no escribe nada) y corre en una sola
+transacción. Como la carga usa operaciones masivas que no pasan por save()
+ni disparan señales, al terminar se copian las coordenadas a los
+proveedores sin ubicación exacta, se reconstruye la cobertura si hubo
+comunas nuevas y se invalida el árbol de geografía de este proceso (los
+demás lo recargan al vencer GEOGRAFIA_TTL). Conviene correr después
+`exportar_geografia`.
+
+Una instalación nueva ya parte con el territorio (migración
+0021_territorio_inicial); el comando sirve para actualizarlo después.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proveedor import directorio, geografia, territorio
+from proveedor.cobertura import reconstruir_cobertura
+
+
+class Command(BaseCommand):
+    help = 'Carga las regiones y comunas de Chile con sus códigos y coordenadas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archivo',
+            default=str(territorio.ARCHIVO),
+            help='CSV con columnas region_codigo, region, codigo, nombre, latitud, longitud.',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        try:
+            filas = territorio.leer(options['archivo'])
+        except OSError as e:
+            raise CommandError(f'No se pudo leer {options["archivo"]}: {e}')
+        except ValueError as e:
+            raise CommandError(f'Formato inválido en {options["archivo"]}: {e}')
+
+        resultado = territorio.cargar(filas)
+        if resultado.comunas_creadas or resultado.comunas_actualizadas:
+            territorio.copiar_coordenadas_a_proveedores()
+        if resultado.comunas_creadas:
+            reconstruir_cobertura()
+        geografia.invalidar()
+        if resultado.regiones_actualizadas or resultado.comunas_actualizadas:
+            directorio.copiar_nombres_geografia()
+
+        self.stdout.write(
+            f'Regiones: {resultado.regiones_creadas} nuevas, {resultado.regiones_actualizadas} actualizadas. '
+            f'Comunas: {resultado.comunas_creadas} nuevas, {resultado.comunas_actualizadas} actualizadas. '
+            f'({time.monotonic() - inicio:.2f} s)'
+        )
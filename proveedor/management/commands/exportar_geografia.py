@@ -0,0 +1,31 @@
+"""
+Genera el JSON estático con el árbol País > Región > Comuna:
+
+    python manage.py exportar_geografia [--directorio RUTA]
+
+El archivo queda en static/geografia/comunas.<version>.json, con la
+versión (digest del contenido) en el nombre, así que puede servirse con
+caché permanente. Correr en cada despliegue, antes de collectstatic, y
+después de cargar o editar comunas; los archivos de versiones anteriores
+se pueden borrar cuando ningún cliente los use.
+"""
+from django.core.management.base import BaseCommand
+
+from proveedor import geografia
+
+
+class Command(BaseCommand):
+    help = 'Escribe el JSON versionado de regiones y comunas para servirlo como estático.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directorio',
+            help='Carpeta de salida (por defecto GEOGRAFIA_STATIC_ROOT).',
+        )
+
+    def handle(self, *args, **options):
+        ruta, creado = geografia.exportar(options['directorio'])
+        if creado:
+            self.stdout.write(f'Generado {ruta}')
+        else:
+            self.stdout.write(f'{ruta} ya existe; la geografía no cambió.')
@@ -0,0 +1,38 @@
+"""
+Envía las solicitudes pendientes de las campañas de contacto, pensado para
+cron (por ejemplo, cada 5 minutos):
+
+    python manage.py procesar_campanas
+    python manage.py procesar_campanas --lote 500 --max-lotes 20
+
+Cada lote se inserta con bulk_create y respeta el cupo diario de cada
+proveedor (CAMPANAS_MAX_CONTACTOS_DIARIOS); lo que no cabe queda para la
+siguiente pasada. Se puede correr en paralelo: las campañas tomadas por otro
+proceso se saltan.
+"""
+from django.core.management.base import BaseCommand
+
+from proveedor.campanas import procesar_campanas, tamano_lote
+
+
+class Command(BaseCommand):
+    help = 'Crea por lotes las solicitudes de contacto de las campañas abiertas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=None,
+            help='Solicitudes por lote (por defecto CAMPANAS_TAMANO_LOTE).',
+        )
+        parser.add_argument(
+            '--max-lotes',
+            type=int,
+            default=100,
+            help='Máximo de lotes a procesar en esta pasada.',
+        )
+
+    def handle(self, *args, **options):
+        tamano = options['lote'] or tamano_lote()
+        lotes, creadas = procesar_campanas(options['max_lotes'], tamano)
+        self.stdout.write(f'{lotes} lotes procesados, {creadas} solicitudes creadas.')
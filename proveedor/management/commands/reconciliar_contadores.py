@@ -0,0 +1,82 @@
+"""
+Recalcula contactos_enviados y contactos_aceptados de cada proveedor a
+partir de SolicitudContacto:
+
+    python manage.py reconciliar_contadores            # corrige
+    python manage.py reconciliar_contadores --dry-run  # solo reporta
+
+Los totales salen de una sola consulta agrupada por proveedor y solo se
+reescriben los proveedores cuyos contadores no coinciden. La corrección
+vuelve a contar dentro del propio UPDATE (subconsulta correlacionada), así
+que no pisa incrementos hechos mientras corría el comando.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from proveedor import directorio
+from proveedor.models import Proveedor, SolicitudContacto
+
+TAMANO_LOTE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de contactos de los proveedores desde las solicitudes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Reportar las diferencias sin corregirlas.',
+        )
+
+    def handle(self, *args, **options):
+        totales = {
+            fila['proveedor_id']: (fila['enviados'], fila['aceptados'])
+            for fila in SolicitudContacto.objects
+            .order_by()
+            .values('proveedor_id')
+            .annotate(
+                enviados=Count('id'),
+                aceptados=Count('id', filter=Q(estado='aceptada')),
+            )
+        }
+
+        revisados = 0
+        diferencias = []
+        proveedores = Proveedor.objects.values_list(
+            'id', 'contactos_enviados', 'contactos_aceptados'
+        ).iterator(chunk_size=TAMANO_LOTE)
+        for proveedor_id, enviados, aceptados in proveedores:
+            revisados += 1
+            esperado = totales.get(proveedor_id, (0, 0))
+            if (enviados, aceptados) != esperado:
+                diferencias.append(proveedor_id)
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'Proveedor {proveedor_id}: enviados {enviados} -> {esperado[0]}, '
+                        f'aceptados {aceptados} -> {esperado[1]}'
+                    )
+
+        if diferencias and not options['dry_run']:
+            for inicio in range(0, len(diferencias), TAMANO_LOTE):
+                lote = diferencias[inicio:inicio + TAMANO_LOTE]
+                Proveedor.objects.filter(id__in=lote).update(
+                    contactos_enviados=self._conteo(),
+                    contactos_aceptados=self._conteo(estado='aceptada'),
+                )
+                directorio.copiar_campos(directorio.CONTADORES, lote)
+
+        accion = 'con diferencias' if options['dry_run'] else 'corregidos'
+        self.stdout.write(f'{revisados} proveedores revisados, {len(diferencias)} {accion}.')
+
+    def _conteo(self, **filtros):
+        conteo = (
+            SolicitudContacto.objects
+            .filter(proveedor_id=OuterRef('pk'), **filtros)
+            .order_by()
+            .values('proveedor_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return Coalesce(Subquery(conteo, output_field=IntegerField()), Value(0))
@@ -0,0 +1,19 @@
+"""
+Reconstruye la tabla de comunas atendidas por cada proveedor:
+
+    python manage.py reconstruir_cobertura
+
+Las señales la mantienen al día; el comando sirve después de cargas
+masivas de comunas o proveedores que no pasan por save().
+"""
+from django.core.management.base import BaseCommand
+
+from proveedor.cobertura import reconstruir_cobertura
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las comunas que atiende cada proveedor según su cobertura.'
+
+    def handle(self, *args, **options):
+        filas = reconstruir_cobertura()
+        self.stdout.write(f'{filas} comunas atendidas registradas.')
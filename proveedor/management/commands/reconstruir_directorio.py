@@ -0,0 +1,19 @@
+"""
+Regenera las fichas del directorio de proveedores (DirectorioProveedor):
+
+    python manage.py reconstruir_directorio
+
+Las señales las mantienen al día; el comando sirve después de cargas
+masivas de proveedores, categorías o propuestas que no pasan por save().
+"""
+from django.core.management.base import BaseCommand
+
+from proveedor.directorio import reconstruir_directorio
+
+
+class Command(BaseCommand):
+    help = 'Regenera la tabla aplanada que alimenta los directorios de proveedores.'
+
+    def handle(self, *args, **options):
+        plataforma, legado = reconstruir_directorio()
+        self.stdout.write(f'{plataforma} fichas de la plataforma y {legado} del directorio anterior.')
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:06
+
+from django.db import migrations, models
+
+
+def crear_indice_fulltext(apps, schema_editor):
+    # FULLTEXT no existe en Index de Django; solo aplica en MySQL
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        'CREATE FULLTEXT INDEX prod_nombre_desc_ft ON producto_servicio (nombre, descripcion)'
+    )
+
+
+def eliminar_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('DROP INDEX prod_nombre_desc_ft ON producto_servicio')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productoservicio',
+            index=models.Index(fields=['proveedor', 'categoria', 'activo'], name='prod_prov_cat_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoservicio',
+            index=models.Index(fields=['proveedor', 'destacado', '-fecha_creacion'], name='prod_prov_dest_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoservicio',
+            index=models.Index(fields=['proveedor', 'nombre'], name='prod_prov_nombre_idx'),
+        ),
+        migrations.RunPython(crear_indice_fulltext, eliminar_indice_fulltext),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0002_indices_catalogo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proveedor',
+            name='catalogo_actualizado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
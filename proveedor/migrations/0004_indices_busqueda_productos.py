@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0003_catalogo_actualizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productoservicio',
+            index=models.Index(fields=['activo', 'categoria', 'precio_referencia'], name='prod_activo_cat_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productoservicio',
+            index=models.Index(fields=['activo', 'precio_referencia'], name='prod_activo_precio_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def registrar_precios_actuales(apps, schema_editor):
+    # Punto de partida del historial: el precio vigente de cada producto
+    ProductoServicio = apps.get_model('proveedor', 'ProductoServicio')
+    HistorialPrecio = apps.get_model('proveedor', 'HistorialPrecio')
+    lote = []
+    productos = (
+        ProductoServicio.objects
+        .filter(precio_referencia__isnull=False)
+        .values_list('id', 'precio_referencia', 'fecha_actualizacion')
+        .iterator(chunk_size=2000)
+    )
+    for producto_id, precio, fecha in productos:
+        lote.append(HistorialPrecio(
+            producto_id=producto_id,
+            fecha=fecha,
+            precio_centavos=int((precio * 100).to_integral_value()),
+        ))
+        if len(lote) >= 2000:
+            HistorialPrecio.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        HistorialPrecio.objects.bulk_create(lote)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0004_indices_busqueda_productos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('precio_centavos', models.BigIntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_precios', to='proveedor.productoservicio')),
+            ],
+            options={
+                'verbose_name': 'Historial de Precio',
+                'verbose_name_plural': 'Historial de Precios',
+                'db_table': 'historial_precio',
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='hist_precio_prod_fecha_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_precios_actuales, migrations.RunPython.noop),
+    ]
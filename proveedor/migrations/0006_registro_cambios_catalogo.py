@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0005_historial_precios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(choices=[('producto', 'Producto/Servicio'), ('promocion', 'Promoción')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('accion', models.CharField(choices=[('creado', 'Creado'), ('actualizado', 'Actualizado'), ('desactivado', 'Desactivado'), ('eliminado', 'Eliminado'), ('inicio', 'Inicio de vigencia'), ('fin', 'Fin de vigencia')], max_length=20)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios_catalogo', to='proveedor.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Cambio de Catálogo',
+                'verbose_name_plural': 'Cambios de Catálogo',
+                'db_table': 'cambio_catalogo',
+                'indexes': [models.Index(fields=['proveedor', 'id'], name='cambio_prov_id_idx'), models.Index(fields=['entidad', 'objeto_id', 'accion'], name='cambio_objeto_accion_idx')],
+            },
+        ),
+    ]
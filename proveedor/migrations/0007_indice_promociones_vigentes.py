@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0006_registro_cambios_catalogo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(fields=['proveedor', 'activo', 'fecha_inicio', 'fecha_fin'], name='promo_prov_act_fechas_idx'),
+        ),
+    ]
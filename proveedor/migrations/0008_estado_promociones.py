@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def calcular_estados(apps, schema_editor):
+    Promocion = apps.get_model('proveedor', 'Promocion')
+    zona = ZoneInfo(getattr(settings, 'PROMOCIONES_ZONA_HORARIA', 'America/Santiago'))
+    hoy = timezone.localdate(timezone=zona)
+    ahora = timezone.now()
+    Promocion.objects.filter(fecha_fin__lt=hoy).update(estado='finalizada', fecha_estado=ahora)
+    Promocion.objects.filter(fecha_inicio__gt=hoy).update(estado='programada', fecha_estado=ahora)
+    Promocion.objects.filter(fecha_inicio__lte=hoy, fecha_fin__gte=hoy).update(estado='vigente', fecha_estado=ahora)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0007_indice_promociones_vigentes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promocion',
+            name='estado',
+            field=models.CharField(choices=[('programada', 'Programada'), ('vigente', 'Vigente'), ('finalizada', 'Finalizada')], default='programada', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='promocion',
+            name='fecha_estado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(fields=['estado', 'activo', 'fecha_fin'], name='promo_estado_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(fields=['proveedor', 'estado'], name='promo_prov_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(fields=['fecha_estado'], name='promo_fecha_estado_idx'),
+        ),
+        migrations.RunPython(calcular_estados, migrations.RunPython.noop),
+    ]
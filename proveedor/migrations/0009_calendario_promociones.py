@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:22
+
+from django.db import migrations, models
+
+
+def calcular_duraciones(apps, schema_editor):
+    Promocion = apps.get_model('proveedor', 'Promocion')
+    lote = []
+    for promocion in Promocion.objects.only('id', 'fecha_inicio', 'fecha_fin').iterator(chunk_size=1000):
+        promocion.duracion_dias = max((promocion.fecha_fin - promocion.fecha_inicio).days, 0)
+        lote.append(promocion)
+        if len(lote) >= 1000:
+            Promocion.objects.bulk_update(lote, ['duracion_dias'])
+            lote = []
+    if lote:
+        Promocion.objects.bulk_update(lote, ['duracion_dias'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0008_estado_promociones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promocion',
+            name='duracion_dias',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(fields=['activo', 'fecha_inicio', 'fecha_fin'], name='promo_act_ini_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(fields=['activo', 'duracion_dias'], name='promo_act_duracion_idx'),
+        ),
+        migrations.RunPython(calcular_duraciones, migrations.RunPython.noop),
+    ]
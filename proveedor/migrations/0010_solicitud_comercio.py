@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0009_calendario_promociones'),
+        ('usuarios', '0008_directorio_comercios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitudcontacto',
+            name='comercio',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_recibidas', to='usuarios.comerciante'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudcontacto',
+            index=models.Index(fields=['proveedor', 'comercio'], name='solicitud_prov_comercio_idx'),
+        ),
+    ]
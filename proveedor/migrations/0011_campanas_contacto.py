@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0010_solicitud_comercio'),
+        ('usuarios', '0008_directorio_comercios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampanaContacto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('mensaje', models.TextField(verbose_name='Mensaje de presentación')),
+                ('comuna', models.CharField(blank=True, max_length=100)),
+                ('tipo_negocio', models.CharField(blank=True, max_length=50)),
+                ('intereses', models.CharField(blank=True, help_text='Códigos separados por coma.', max_length=512)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completada', 'Completada'), ('cancelada', 'Cancelada')], default='pendiente', max_length=20)),
+                ('total_objetivo', models.PositiveIntegerField(default=0)),
+                ('enviadas', models.PositiveIntegerField(default=0)),
+                ('ultimo_comercio_id', models.BigIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='campanas', to='proveedor.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Campaña de Contacto',
+                'verbose_name_plural': 'Campañas de Contacto',
+                'db_table': 'campana_contacto',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.AddField(
+            model_name='solicitudcontacto',
+            name='campana',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='solicitudes', to='proveedor.campanacontacto'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudcontacto',
+            index=models.Index(fields=['proveedor', 'fecha_solicitud'], name='solicitud_prov_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campanacontacto',
+            index=models.Index(fields=['estado', 'id'], name='campana_estado_idx'),
+        ),
+    ]
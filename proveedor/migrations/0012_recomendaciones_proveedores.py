@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0011_campanas_contacto'),
+        ('usuarios', '0008_directorio_comercios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecomendacionProveedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('puntaje', models.FloatField()),
+                ('fecha_calculo', models.DateTimeField(default=django.utils.timezone.now)),
+                ('comerciante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendaciones', to='usuarios.comerciante')),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendado_a', to='proveedor.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Recomendación de Proveedor',
+                'verbose_name_plural': 'Recomendaciones de Proveedores',
+                'db_table': 'recomendacion_proveedor',
+                'ordering': ['comerciante', 'posicion'],
+                'constraints': [models.UniqueConstraint(fields=('comerciante', 'posicion'), name='recomendacion_posicion_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def calcular_cobertura(apps, schema_editor):
+    Comuna = apps.get_model('proveedor', 'Comuna')
+    Proveedor = apps.get_model('proveedor', 'Proveedor')
+    CoberturaComuna = apps.get_model('proveedor', 'CoberturaComuna')
+
+    todas, por_pais, por_region = [], {}, {}
+    for comuna_id, region_id, pais_id in Comuna.objects.values_list('id', 'region_id', 'region__pais_id'):
+        todas.append(comuna_id)
+        por_pais.setdefault(pais_id, []).append(comuna_id)
+        por_region.setdefault(region_id, []).append(comuna_id)
+
+    lote = []
+    filas = Proveedor.objects.values_list('id', 'cobertura', 'pais_id', 'region_id', 'comuna_id')
+    for proveedor_id, cobertura, pais_id, region_id, comuna_id in filas.iterator(chunk_size=1000):
+        if cobertura == 'internacional':
+            comunas = todas
+        elif cobertura == 'nacional' and pais_id:
+            comunas = por_pais.get(pais_id, [])
+        elif cobertura in ('nacional', 'regional') and region_id:
+            comunas = por_region.get(region_id, [])
+        else:
+            comunas = [comuna_id] if comuna_id else []
+        lote.extend(CoberturaComuna(proveedor_id=proveedor_id, comuna_id=c) for c in comunas)
+        if len(lote) >= 1000:
+            CoberturaComuna.objects.bulk_create(lote, batch_size=1000)
+            lote = []
+    if lote:
+        CoberturaComuna.objects.bulk_create(lote, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0012_recomendaciones_proveedores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoberturaComuna',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comuna', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proveedores_que_atienden', to='proveedor.comuna')),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comunas_atendidas', to='proveedor.proveedor')),
+            ],
+            options={
+                'verbose_name': 'Comuna Atendida',
+                'verbose_name_plural': 'Comunas Atendidas',
+                'db_table': 'cobertura_comuna',
+                'constraints': [models.UniqueConstraint(fields=('comuna', 'proveedor'), name='cobertura_comuna_unica')],
+            },
+        ),
+        migrations.RunPython(calcular_cobertura, migrations.RunPython.noop),
+    ]
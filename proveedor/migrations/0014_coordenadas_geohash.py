@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0013_cobertura_comunas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comuna',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='comuna',
+            name='latitud',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='comuna',
+            name='longitud',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='latitud',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='longitud',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='ubicacion_exacta',
+            field=models.BooleanField(default=False),
+        ),
+    ]
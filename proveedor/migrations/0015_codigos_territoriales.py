@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0014_coordenadas_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comuna',
+            name='codigo',
+            field=models.CharField(blank=True, max_length=5, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='codigo',
+            field=models.CharField(blank=True, max_length=2, null=True, unique=True),
+        ),
+    ]
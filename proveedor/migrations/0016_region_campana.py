@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0015_codigos_territoriales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campanacontacto',
+            name='region',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='proveedor.region'),
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:47
+
+import unicodedata
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Copia fija de usuarios.models.RUBROS_CHOICES al momento de la migración
+RUBROS = [
+    ('ABARROTES', 'abarrotes'),
+    ('CARNES', 'carnes'),
+    ('LACTEOS', 'lacteos'),
+    ('FRUTAS', 'frutas y verduras'),
+    ('LIMPIEZA', 'limpieza'),
+    ('PANADERIA', 'panaderia'),
+    ('VARIOS', 'varios'),
+]
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode()
+    return ' '.join(texto.lower().split())
+
+
+def _lista(valores):
+    valores = [str(v) for v in valores]
+    return f",{','.join(valores)}," if valores else ''
+
+
+def _rubros(nombres):
+    codigos = []
+    for nombre in nombres:
+        nombre = _normalizar(nombre)
+        for codigo, etiqueta in RUBROS:
+            if nombre and (nombre in (codigo.lower(), etiqueta) or etiqueta.startswith(nombre + ' ')):
+                if codigo not in codigos:
+                    codigos.append(codigo)
+                break
+    return codigos
+
+
+def llenar_directorio(apps, schema_editor):
+    Proveedor = apps.get_model('proveedor', 'Proveedor')
+    ProveedorLegado = apps.get_model('usuarios', 'Proveedor')
+    DirectorioProveedor = apps.get_model('proveedor', 'DirectorioProveedor')
+
+    fichas = []
+    proveedores = Proveedor.objects.select_related('region', 'comuna').prefetch_related('categorias')
+    for p in proveedores.order_by('id').iterator(chunk_size=1000):
+        categorias = sorted(p.categorias.all(), key=lambda c: (c.nombre, c.id))
+        nombres = [c.nombre for c in categorias]
+        fichas.append(DirectorioProveedor(
+            origen='plataforma', proveedor_id=p.id, nombre=p.nombre_empresa,
+            descripcion=p.descripcion, foto=p.foto.name or '',
+            categorias=_lista(c.id for c in categorias), rubros=_lista(_rubros(nombres)),
+            categorias_nombres=', '.join(nombres),
+            region_id=p.region_id, region_nombre=p.region.nombre if p.region_id else '',
+            comuna_id=p.comuna_id, comuna_nombre=p.comuna.nombre if p.comuna_id else '',
+            cobertura=p.cobertura, latitud=p.latitud, longitud=p.longitud, geohash=p.geohash,
+            activo=p.activo, verificado=p.verificado, destacado=p.destacado, visitas=p.visitas,
+            contactos_enviados=p.contactos_enviados, contactos_aceptados=p.contactos_aceptados,
+            texto=_normalizar(f'{p.nombre_empresa} {p.descripcion}'), fecha_registro=p.fecha_registro,
+        ))
+
+    for p in ProveedorLegado.objects.prefetch_related('propuestas').order_by('id').iterator(chunk_size=1000):
+        propuestas = sorted(p.propuestas.all(), key=lambda x: x.id)
+        principal = propuestas[0] if propuestas else None
+        rubros = list(dict.fromkeys(
+            r.strip() for x in propuestas for r in x.rubros_ofertados.split(',') if r.strip()
+        ))
+        titulo = principal.titulo if principal else ''
+        fichas.append(DirectorioProveedor(
+            origen='legado', proveedor_legado_id=p.id, nombre=p.nombre, titulo=titulo,
+            descripcion=p.descripcion, foto=p.foto_perfil.name or '',
+            rubros=_lista(_rubros(rubros)), categorias_nombres=', '.join(rubros),
+            zona=principal.zona_geografica if principal else '', activo=principal is not None,
+            texto=_normalizar(f'{p.nombre} {titulo} {p.descripcion}'), fecha_registro=p.fecha_registro,
+        ))
+
+    DirectorioProveedor.objects.bulk_create(fichas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0016_region_campana'),
+        ('usuarios', '0010_rubros_propuesta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectorioProveedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origen', models.CharField(choices=[('plataforma', 'Plataforma de proveedores'), ('legado', 'Directorio anterior')], max_length=10)),
+                ('nombre', models.CharField(max_length=200)),
+                ('titulo', models.CharField(blank=True, max_length=200)),
+                ('descripcion', models.TextField(blank=True)),
+                ('foto', models.CharField(blank=True, max_length=255)),
+                ('categorias', models.CharField(blank=True, max_length=255)),
+                ('rubros', models.CharField(blank=True, max_length=255)),
+                ('categorias_nombres', models.CharField(blank=True, max_length=500)),
+                ('region_nombre', models.CharField(blank=True, max_length=100)),
+                ('comuna_nombre', models.CharField(blank=True, max_length=100)),
+                ('zona', models.CharField(blank=True, max_length=100)),
+                ('cobertura', models.CharField(blank=True, max_length=20)),
+                ('latitud', models.FloatField(blank=True, null=True)),
+                ('longitud', models.FloatField(blank=True, null=True)),
+                ('geohash', models.CharField(blank=True, db_index=True, default='', max_length=12)),
+                ('activo', models.BooleanField(default=True)),
+                ('verificado', models.BooleanField(default=False)),
+                ('destacado', models.BooleanField(default=False)),
+                ('visitas', models.IntegerField(default=0)),
+                ('contactos_enviados', models.IntegerField(default=0)),
+                ('contactos_aceptados', models.IntegerField(default=0)),
+                ('texto', models.TextField(blank=True)),
+                ('fecha_registro', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('comuna', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='proveedor.comuna')),
+                ('proveedor', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ficha_directorio', to='proveedor.proveedor')),
+                ('proveedor_legado', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ficha_directorio', to='usuarios.proveedor')),
+                ('region', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='proveedor.region')),
+            ],
+            options={
+                'verbose_name': 'Ficha de Directorio',
+                'verbose_name_plural': 'Fichas de Directorio',
+                'db_table': 'directorio_proveedor',
+                'indexes': [models.Index(fields=['activo', '-destacado', '-fecha_registro'], name='directorio_orden_idx'), models.Index(fields=['activo', 'region', '-destacado', '-fecha_registro'], name='directorio_region_idx'), models.Index(fields=['activo', 'comuna', '-destacado', '-fecha_registro'], name='directorio_comuna_idx'), models.Index(fields=['activo', 'cobertura', '-destacado', '-fecha_registro'], name='directorio_cobertura_idx'), models.Index(fields=['activo', 'nombre'], name='directorio_nombre_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('origen', 'plataforma'), ('proveedor__isnull', False), ('proveedor_legado__isnull', True)), models.Q(('origen', 'legado'), ('proveedor__isnull', True), ('proveedor_legado__isnull', False)), _connector='OR'), name='directorio_un_origen')],
+            },
+        ),
+        migrations.RunPython(llenar_directorio, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0017_directorio_proveedor'),
+        ('usuarios', '0010_rubros_propuesta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='directorioproveedor',
+            name='ranking_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='directorioproveedor',
+            index=models.Index(fields=['activo', '-ranking_score', '-fecha_registro'], name='directorio_ranking_idx'),
+        ),
+    ]
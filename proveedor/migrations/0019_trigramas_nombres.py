@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:54
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _trigramas(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode().lower()
+    resultado = set()
+    for palabra in re.sub(r'[^a-z0-9]+', ' ', texto).split():
+        palabra = f'__{palabra}_'
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+def indexar_nombres(apps, schema_editor):
+    TrigramaNombre = apps.get_model('proveedor', 'TrigramaNombre')
+    fuentes = [
+        ('ficha_id', apps.get_model('proveedor', 'DirectorioProveedor')),
+        ('producto_id', apps.get_model('proveedor', 'ProductoServicio')),
+    ]
+    for campo, modelo in fuentes:
+        lote = []
+        for objeto_id, nombre in modelo.objects.values_list('id', 'nombre').iterator(chunk_size=1000):
+            lote.extend(TrigramaNombre(trigrama=t, **{campo: objeto_id}) for t in _trigramas(nombre))
+            if len(lote) >= 1000:
+                TrigramaNombre.objects.bulk_create(lote, batch_size=1000)
+                lote = []
+        TrigramaNombre.objects.bulk_create(lote, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0018_ranking_directorio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrigramaNombre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigrama', models.CharField(max_length=3)),
+                ('ficha', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trigramas', to='proveedor.directorioproveedor')),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trigramas', to='proveedor.productoservicio')),
+            ],
+            options={
+                'verbose_name': 'Trigrama de Nombre',
+                'verbose_name_plural': 'Trigramas de Nombres',
+                'db_table': 'trigrama_nombre',
+                'indexes': [models.Index(fields=['trigrama', 'ficha'], name='trigrama_ficha_idx'), models.Index(fields=['trigrama', 'producto'], name='trigrama_producto_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ficha', 'trigrama'), name='trigrama_ficha_unico'), models.UniqueConstraint(fields=('producto', 'trigrama'), name='trigrama_producto_unico')],
+            },
+        ),
+        migrations.RunPython(indexar_nombres, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0019_trigramas_nombres'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='promocion',
+            name='promo_prov_act_fechas_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='promocion',
+            name='promo_estado_fin_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='promocion',
+            name='promo_prov_estado_idx',
+        ),
+        migrations.AddIndex(
+            model_name='promocion',
+            index=models.Index(fields=['estado', 'fecha_fin'], name='promo_estado_fecha_fin_idx'),
+        ),
+    ]
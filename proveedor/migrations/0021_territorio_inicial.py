@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:12
+
+import csv
+from pathlib import Path
+
+from django.db import migrations
+
+ARCHIVO = Path(__file__).resolve().parent.parent / 'data' / 'territorio_cl.csv'
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def _geohash(latitud, longitud, precision=9):
+    if latitud is None or longitud is None:
+        return ''
+    rango_lat, rango_lon = [-90.0, 90.0], [-180.0, 180.0]
+    resultado, bits, caracter, par = [], 0, 0, True
+    while len(resultado) < precision:
+        rango, valor = (rango_lon, longitud) if par else (rango_lat, latitud)
+        medio = (rango[0] + rango[1]) / 2
+        caracter <<= 1
+        if valor >= medio:
+            caracter |= 1
+            rango[0] = medio
+        else:
+            rango[1] = medio
+        par = not par
+        bits += 1
+        if bits == 5:
+            resultado.append(_BASE32[caracter])
+            bits, caracter = 0, 0
+    return ''.join(resultado)
+
+
+def cargar_territorio(apps, schema_editor):
+    """
+    Una instalación nueva parte con las regiones y comunas de Chile para que
+    los formularios de registro tengan opciones. Si ya hay comunas (cargadas
+    a mano o con cargar_territorio) no se toca nada: la sincronización con
+    proveedores y cobertura la hace el comando.
+    """
+    Pais = apps.get_model('proveedor', 'Pais')
+    Region = apps.get_model('proveedor', 'Region')
+    Comuna = apps.get_model('proveedor', 'Comuna')
+    if Comuna.objects.exists():
+        return
+
+    with open(ARCHIVO, newline='', encoding='utf-8') as archivo:
+        filas = list(csv.DictReader(archivo))
+
+    pais = (
+        Pais.objects.filter(codigo='CL').first() or
+        Pais.objects.filter(nombre__iexact='Chile').first() or
+        Pais.objects.create(codigo='CL', nombre='Chile')
+    )
+    regiones = {}
+    for fila in filas:
+        codigo = fila['region_codigo']
+        if codigo not in regiones:
+            regiones[codigo] = (
+                Region.objects.filter(codigo=codigo).first() or
+                Region.objects.filter(codigo__isnull=True, pais=pais, nombre__iexact=fila['region']).first() or
+                Region(pais=pais, nombre=fila['region'])
+            )
+            regiones[codigo].codigo = codigo
+            regiones[codigo].save()
+
+    comunas = []
+    for fila in filas:
+        latitud = float(fila['latitud']) if fila['latitud'] else None
+        longitud = float(fila['longitud']) if fila['longitud'] else None
+        comunas.append(Comuna(
+            codigo=fila['codigo'],
+            nombre=fila['nombre'],
+            region=regiones[fila['region_codigo']],
+            latitud=latitud,
+            longitud=longitud,
+            geohash=_geohash(latitud, longitud),
+        ))
+    Comuna.objects.bulk_create(comunas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0020_indices_promocion'),
+    ]
+
+    operations = [
+        migrations.RunPython(cargar_territorio, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+def crear_indice_fulltext(apps, schema_editor):
+    # FULLTEXT no existe en Index de Django; solo aplica en MySQL
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('CREATE FULLTEXT INDEX directorio_texto_ft ON directorio_proveedor (texto)')
+
+
+def eliminar_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('DROP INDEX directorio_texto_ft ON directorio_proveedor')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0021_territorio_inicial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='directorioproveedor',
+            name='categorias',
+        ),
+        migrations.RemoveField(
+            model_name='directorioproveedor',
+            name='rubros',
+        ),
+        migrations.AlterField(
+            model_name='directorioproveedor',
+            name='categorias_nombres',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(crear_indice_fulltext, eliminar_indice_fulltext),
+    ]
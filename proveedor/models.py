@@ -1,9 +1,13 @@
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
+from django.utils import timezone
 from usuarios.models import Comerciante
 
+from .geo import codificar_geohash
+
 class Pais(models.Model):
     nombre = models.CharField(max_length=100)
     codigo = models.CharField(max_length=3, unique=True)
@@ -20,6 +24,8 @@ class Pais(models.Model):
 class Region(models.Model):
     nombre = models.CharField(max_length=100)
     pais = models.ForeignKey(Pais, on_delete=models.CASCADE, related_name='regiones')
+    # Código único territorial (CUT) de la región, p. ej. '13' (ver cargar_territorio)
+    codigo = models.CharField(max_length=2, unique=True, null=True, blank=True)
     
     class Meta:
         db_table = 'region'
@@ -33,6 +39,13 @@ class Region(models.Model):
 class Comuna(models.Model):
     nombre = models.CharField(max_length=100)
     region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='comunas')
+    # Código único territorial (CUT) de la comuna, p. ej. '13101'
+    codigo = models.CharField(max_length=5, unique=True, null=True, blank=True)
+    
+    # Punto de referencia de la comuna (ver cargar_coordenadas_comunas)
+    latitud = models.FloatField(null=True, blank=True)
+    longitud = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True)
     
     class Meta:
         db_table = 'comuna'
@@ -41,6 +54,13 @@ class Comuna(models.Model):
     
     def __str__(self):
         return self.nombre
+    
+    def save(self, *args, **kwargs):
+        self.geohash = codificar_geohash(self.latitud, self.longitud)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitud', 'longitud'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
 
 
 class CategoriaProveedor(models.Model):
@@ -77,6 +97,13 @@ class Proveedor(models.Model):
     region = models.ForeignKey(Region, on_delete=models.SET_NULL, null=True, blank=True)
     comuna = models.ForeignKey(Comuna, on_delete=models.SET_NULL, null=True, blank=True)
     direccion = models.CharField(max_length=255, blank=True, null=True)
+    
+    # Coordenadas para búsqueda por cercanía: las que indique el proveedor
+    # (ubicacion_exacta) o, si no, las de su comuna
+    latitud = models.FloatField(null=True, blank=True)
+    longitud = models.FloatField(null=True, blank=True)
+    ubicacion_exacta = models.BooleanField(default=False)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True)
 
     foto_perfil = models.ImageField(upload_to='proveedores/fotos/', blank=True, null=True)
     modo_oscuro = models.BooleanField(default=False)
@@ -127,6 +154,8 @@ class Proveedor(models.Model):
     # Metadatos
     fecha_registro = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
+    # Último cambio en productos o promociones (versiona el snapshot del catálogo)
+    catalogo_actualizado = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         db_table = 'proveedor'
@@ -137,10 +166,51 @@ class Proveedor(models.Model):
     def __str__(self):
         return self.nombre_empresa
     
+    CAMPOS_UBICACION = {'comuna', 'comuna_id', 'latitud', 'longitud', 'ubicacion_exacta'}
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.CAMPOS_UBICACION & set(update_fields):
+            self.actualizar_coordenadas()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'latitud', 'longitud', 'geohash'}
+        super().save(*args, **kwargs)
+    
+    def actualizar_coordenadas(self):
+        """Sin ubicación exacta, el proveedor toma el punto de su comuna."""
+        if not self.ubicacion_exacta:
+            self.latitud, self.longitud = (
+                Comuna.objects
+                .filter(pk=self.comuna_id)
+                .values_list('latitud', 'longitud')
+                .first()
+            ) or (None, None)
+        self.geohash = codificar_geohash(self.latitud, self.longitud)
+    
     def incrementar_visitas(self):
         self.visitas += 1
         self.save(update_fields=['visitas'])
     
+    def marcar_catalogo_actualizado(self):
+        from django.utils import timezone
+        self.catalogo_actualizado = timezone.now()
+        Proveedor.objects.filter(pk=self.pk).update(catalogo_actualizado=self.catalogo_actualizado)
+    
+    def sumar_contactos(self, enviados=0, aceptados=0):
+        """
+        Incremento atómico de los contadores (UPDATE ... SET x = x + n), sin
+        pisar cambios concurrentes. Usar dentro de la transacción que
+        cambia el estado de las solicitudes.
+        """
+        cambios = {}
+        if enviados:
+            cambios['contactos_enviados'] = F('contactos_enviados') + enviados
+        if aceptados:
+            cambios['contactos_aceptados'] = F('contactos_aceptados') + aceptados
+        if cambios:
+            Proveedor.objects.filter(pk=self.pk).update(**cambios)
+            DirectorioProveedor.objects.filter(proveedor_id=self.pk).update(**cambios)
+    
     def tasa_aceptacion(self):
         """Calcula el porcentaje de contactos aceptados"""
         if self.contactos_enviados > 0:
@@ -148,14 +218,107 @@ class Proveedor(models.Model):
         return 0
 
 
+class CoberturaComuna(models.Model):
+    """
+    Comunas que atiende cada proveedor, derivadas de `cobertura` y de la
+    jerarquía País > Región > Comuna (ver proveedor/cobertura.py). Se
+    mantiene al guardar el proveedor; "quién atiende mi comuna" es un join
+    por el índice (comuna, proveedor).
+    """
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='comunas_atendidas')
+    comuna = models.ForeignKey(Comuna, on_delete=models.CASCADE, related_name='proveedores_que_atienden')
+
+    class Meta:
+        db_table = 'cobertura_comuna'
+        verbose_name = 'Comuna Atendida'
+        verbose_name_plural = 'Comunas Atendidas'
+        constraints = [
+            models.UniqueConstraint(fields=['comuna', 'proveedor'], name='cobertura_comuna_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.proveedor_id} -> {self.comuna_id}"
+
+
+class CampanaContacto(models.Model):
+    """
+    Envío masivo de solicitudes de contacto a un segmento de comercios
+    (comuna, tipo de negocio, intereses). Las solicitudes no se crean en la
+    petición web: el comando `procesar_campanas` las genera por lotes,
+    respetando el cupo diario del proveedor, y avanza `ultimo_comercio_id`
+    para poder retomar donde quedó.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completada', 'Completada'),
+        ('cancelada', 'Cancelada'),
+    ]
+
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='campanas')
+    nombre = models.CharField(max_length=100)
+    mensaje = models.TextField(verbose_name='Mensaje de presentación')
+
+    # Segmento (mismos filtros que el directorio de comercios)
+    comuna = models.CharField(max_length=100, blank=True)
+    region = models.ForeignKey(Region, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    tipo_negocio = models.CharField(max_length=50, blank=True)
+    intereses = models.CharField(max_length=512, blank=True, help_text='Códigos separados por coma.')
+
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    total_objetivo = models.PositiveIntegerField(default=0)
+    enviadas = models.PositiveIntegerField(default=0)
+    ultimo_comercio_id = models.BigIntegerField(default=0)
+
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'campana_contacto'
+        verbose_name = 'Campaña de Contacto'
+        verbose_name_plural = 'Campañas de Contacto'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'id'], name='campana_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.proveedor.nombre_empresa} - {self.nombre}"
+
+    def codigos_intereses(self):
+        return [c for c in self.intereses.split(',') if c]
+
+    @property
+    def abierta(self):
+        return self.estado in ('pendiente', 'en_proceso')
+
+    def porcentaje_avance(self):
+        if self.total_objetivo > 0:
+            return min(100, round(self.enviadas * 100 / self.total_objetivo))
+        return 100 if self.estado == 'completada' else 0
+
+
 class SolicitudContacto(models.Model):
     """
     Modelo para gestionar las solicitudes de contacto de proveedores a comercios
     Según el documento: Los proveedores pueden enviar mensajes o solicitudes de contacto
     """
     proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='solicitudes_enviadas')
-    # Aquí deberías tener un modelo Comercio similar
-    # comercio = models.ForeignKey('Comercio', on_delete=models.CASCADE, related_name='solicitudes_recibidas')
+    comercio = models.ForeignKey(
+        Comerciante,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='solicitudes_recibidas'
+    )
+    campana = models.ForeignKey(
+        CampanaContacto,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='solicitudes'
+    )
     
     mensaje = models.TextField(verbose_name='Mensaje de presentación')
     
@@ -175,25 +338,45 @@ class SolicitudContacto(models.Model):
         verbose_name = 'Solicitud de Contacto'
         verbose_name_plural = 'Solicitudes de Contacto'
         ordering = ['-fecha_solicitud']
+        indexes = [
+            models.Index(fields=['proveedor', 'comercio'], name='solicitud_prov_comercio_idx'),
+            # Cupo diario de envíos por proveedor
+            models.Index(fields=['proveedor', 'fecha_solicitud'], name='solicitud_prov_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"{self.proveedor.nombre_empresa} - {self.estado}"
     
+    def _cambiar_estado(self, nuevo_estado):
+        """
+        Cambia el estado bloqueando la fila, y ajusta contactos_aceptados
+        con F() en la misma transacción: dos respuestas simultáneas no
+        pueden contar dos veces la misma solicitud.
+        """
+        with transaction.atomic():
+            anterior = (
+                SolicitudContacto.objects
+                .select_for_update()
+                .values_list('estado', flat=True)
+                .get(pk=self.pk)
+            )
+            if anterior == nuevo_estado:
+                self.estado = nuevo_estado
+                return
+            self.estado = nuevo_estado
+            self.fecha_respuesta = timezone.now()
+            self.save(update_fields=['estado', 'fecha_respuesta'])
+            
+            if nuevo_estado == 'aceptada':
+                self.proveedor.sumar_contactos(aceptados=1)
+            elif anterior == 'aceptada':
+                self.proveedor.sumar_contactos(aceptados=-1)
+    
     def aceptar(self):
-        self.estado = 'aceptada'
-        from django.utils import timezone
-        self.fecha_respuesta = timezone.now()
-        self.save()
-        
-        # Actualizar contador del proveedor
-        self.proveedor.contactos_aceptados += 1
-        self.proveedor.save(update_fields=['contactos_aceptados'])
+        self._cambiar_estado('aceptada')
     
     def rechazar(self):
-        self.estado = 'rechazada'
-        from django.utils import timezone
-        self.fecha_respuesta = timezone.now()
-        self.save()
+        self._cambiar_estado('rechazada')
 
 class ProductoServicio(models.Model):
     """
@@ -234,11 +417,41 @@ class ProductoServicio(models.Model):
         db_table = 'producto_servicio'
         verbose_name = 'Producto/Servicio'
         verbose_name_plural = 'Productos/Servicios'
+        indexes = [
+            models.Index(fields=['proveedor', 'categoria', 'activo'], name='prod_prov_cat_activo_idx'),
+            models.Index(fields=['proveedor', 'destacado', '-fecha_creacion'], name='prod_prov_dest_fecha_idx'),
+            # Búsqueda por prefijo del nombre dentro del catálogo de un proveedor
+            models.Index(fields=['proveedor', 'nombre'], name='prod_prov_nombre_idx'),
+            # Búsqueda en todo el marketplace por categoría y rango de precio
+            models.Index(fields=['activo', 'categoria', 'precio_referencia'], name='prod_activo_cat_precio_idx'),
+            models.Index(fields=['activo', 'precio_referencia'], name='prod_activo_precio_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.proveedor.nombre_empresa}"
 
 
+class HistorialPrecio(models.Model):
+    """
+    Historial de precios (solo inserción). Una fila por cada cambio real de
+    precio_referencia; el precio se guarda en centavos como entero.
+    """
+    producto = models.ForeignKey(ProductoServicio, on_delete=models.CASCADE, related_name='historial_precios')
+    fecha = models.DateTimeField(default=timezone.now)
+    precio_centavos = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'historial_precio'
+        verbose_name = 'Historial de Precio'
+        verbose_name_plural = 'Historial de Precios'
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='hist_precio_prod_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} - {self.precio_centavos} ({self.fecha:%Y-%m-%d})"
+
+
 class Promocion(models.Model):
     """
     Promociones que publican los proveedores
@@ -248,11 +461,24 @@ class Promocion(models.Model):
     descripcion = models.TextField()
     imagen = models.ImageField(upload_to='promociones/', blank=True, null=True)
     
+    ESTADO_CHOICES = (
+        ('programada', 'Programada'),
+        ('vigente', 'Vigente'),
+        ('finalizada', 'Finalizada'),
+    )
+
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField()
     
     activo = models.BooleanField(default=True)
     
+    # Estado según las fechas; lo recalcula save() y, al cambiar el día,
+    # el comando actualizar_promociones
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='programada')
+    fecha_estado = models.DateTimeField(null=True, blank=True)
+    # fecha_fin - fecha_inicio; acota las búsquedas por intervalo (calendario)
+    duracion_dias = models.PositiveIntegerField(default=0)
+    
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -260,11 +486,234 @@ class Promocion(models.Model):
         verbose_name = 'Promoción'
         verbose_name_plural = 'Promociones'
         ordering = ['-fecha_inicio']
+        indexes = [
+            # Listados y vigentes de un proveedor
+            models.Index(fields=['proveedor', 'activo', 'fecha_inicio', 'fecha_fin'], name='promo_prov_act_fechas_idx'),
+            # Vigentes y calendario (promociones_en_ventana)
+            models.Index(fields=['activo', 'fecha_inicio', 'fecha_fin'], name='promo_act_ini_fin_idx'),
+            models.Index(fields=['activo', 'duracion_dias'], name='promo_act_duracion_idx'),
+            # Transiciones de actualizar_estados
+            models.Index(fields=['estado', 'fecha_fin'], name='promo_estado_fecha_fin_idx'),
+            models.Index(fields=['fecha_estado'], name='promo_fecha_estado_idx'),
+        ]
     
     def __str__(self):
         return self.titulo
     
+    def calcular_estado(self, hoy=None):
+        if hoy is None:
+            from .promociones import hoy_local
+            hoy = hoy_local()
+        if self.fecha_fin < hoy:
+            return 'finalizada'
+        if self.fecha_inicio > hoy:
+            return 'programada'
+        return 'vigente'
+    
+    def save(self, *args, **kwargs):
+        self.duracion_dias = max((self.fecha_fin - self.fecha_inicio).days, 0)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'duracion_dias'}
+        estado = self.calcular_estado()
+        if estado != self.estado or self.fecha_estado is None:
+            self.estado = estado
+            self.fecha_estado = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'estado', 'fecha_estado'}
+        super().save(*args, **kwargs)
+    
     def esta_vigente(self):
-        from django.utils import timezone
-        hoy = timezone.now().date()
-        return self.fecha_inicio <= hoy <= self.fecha_fin and self.activo
\ No newline at end of file
+        return self.activo and self.calcular_estado() == 'vigente'
+
+
+class CambioCatalogo(models.Model):
+    """
+    Registro monotónico de cambios del catálogo de un proveedor.
+    El id autoincremental sirve de cursor para la sincronización incremental
+    (las filas se insertan tras el commit, ver proveedor/cambios.py).
+    """
+    ENTIDAD_CHOICES = (
+        ('producto', 'Producto/Servicio'),
+        ('promocion', 'Promoción'),
+    )
+    ACCION_CHOICES = (
+        ('creado', 'Creado'),
+        ('actualizado', 'Actualizado'),
+        ('desactivado', 'Desactivado'),
+        ('eliminado', 'Eliminado'),
+        ('inicio', 'Inicio de vigencia'),
+        ('fin', 'Fin de vigencia'),
+    )
+
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='cambios_catalogo')
+    entidad = models.CharField(max_length=20, choices=ENTIDAD_CHOICES)
+    objeto_id = models.BigIntegerField()
+    accion = models.CharField(max_length=20, choices=ACCION_CHOICES)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'cambio_catalogo'
+        verbose_name = 'Cambio de Catálogo'
+        verbose_name_plural = 'Cambios de Catálogo'
+        indexes = [
+            models.Index(fields=['proveedor', 'id'], name='cambio_prov_id_idx'),
+            models.Index(fields=['entidad', 'objeto_id', 'accion'], name='cambio_objeto_accion_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad} {self.objeto_id} {self.accion}"
+
+
+class RecomendacionProveedor(models.Model):
+    """
+    Top-k de proveedores recomendados para cada comerciante, precalculado
+    por el comando `calcular_recomendaciones`. La plataforma lo lee con una
+    sola consulta sobre (comerciante, posicion).
+    """
+    comerciante = models.ForeignKey(Comerciante, on_delete=models.CASCADE, related_name='recomendaciones')
+    proveedor = models.ForeignKey(Proveedor, on_delete=models.CASCADE, related_name='recomendado_a')
+    posicion = models.PositiveSmallIntegerField()
+    puntaje = models.FloatField()
+    fecha_calculo = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'recomendacion_proveedor'
+        verbose_name = 'Recomendación de Proveedor'
+        verbose_name_plural = 'Recomendaciones de Proveedores'
+        ordering = ['comerciante', 'posicion']
+        constraints = [
+            models.UniqueConstraint(fields=['comerciante', 'posicion'], name='recomendacion_posicion_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.comerciante_id} -> {self.proveedor_id} ({self.puntaje:.2f})"
+
+
+class DirectorioProveedor(models.Model):
+    """
+    Ficha de directorio: una fila por proveedor, sea de la plataforma
+    (Proveedor) o del directorio antiguo (usuarios.Proveedor y sus
+    propuestas), con ubicación, cobertura y contadores ya aplanados. Los dos
+    directorios filtran y ordenan sobre esta tabla; categorías y rubros se
+    filtran por semijoin con sus tablas indexadas. La mantienen las señales
+    (ver proveedor/directorio.py).
+    """
+    ORIGEN_CHOICES = [
+        ('plataforma', 'Plataforma de proveedores'),
+        ('legado', 'Directorio anterior'),
+    ]
+
+    origen = models.CharField(max_length=10, choices=ORIGEN_CHOICES)
+    proveedor = models.OneToOneField(
+        Proveedor, on_delete=models.CASCADE, null=True, blank=True, related_name='ficha_directorio'
+    )
+    proveedor_legado = models.OneToOneField(
+        'usuarios.Proveedor', on_delete=models.CASCADE, null=True, blank=True, related_name='ficha_directorio'
+    )
+
+    nombre = models.CharField(max_length=200)
+    titulo = models.CharField(max_length=200, blank=True)
+    descripcion = models.TextField(blank=True)
+    foto = models.CharField(max_length=255, blank=True)
+
+    # Nombres de categorías (o rubros del directorio antiguo) listos para
+    # mostrar; para filtrar se usan las tablas indexadas (ver directorio.py)
+    categorias_nombres = models.TextField(blank=True)
+
+    region = models.ForeignKey(Region, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    region_nombre = models.CharField(max_length=100, blank=True)
+    comuna = models.ForeignKey(Comuna, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    comuna_nombre = models.CharField(max_length=100, blank=True)
+    zona = models.CharField(max_length=100, blank=True)
+    cobertura = models.CharField(max_length=20, blank=True)
+    latitud = models.FloatField(null=True, blank=True)
+    longitud = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True)
+
+    activo = models.BooleanField(default=True)
+    verificado = models.BooleanField(default=False)
+    destacado = models.BooleanField(default=False)
+    visitas = models.IntegerField(default=0)
+    contactos_enviados = models.IntegerField(default=0)
+    contactos_aceptados = models.IntegerField(default=0)
+    # Relevancia precalculada por `calcular_ranking` (ver proveedor/ranking.py)
+    ranking_score = models.FloatField(default=0)
+
+    # Nombre, título y descripción normalizados (sin tildes ni mayúsculas)
+    texto = models.TextField(blank=True)
+    fecha_registro = models.DateTimeField(default=timezone.now)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'directorio_proveedor'
+        verbose_name = 'Ficha de Directorio'
+        verbose_name_plural = 'Fichas de Directorio'
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(origen='plataforma', proveedor__isnull=False, proveedor_legado__isnull=True) |
+                    models.Q(origen='legado', proveedor__isnull=True, proveedor_legado__isnull=False)
+                ),
+                name='directorio_un_origen',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['activo', '-destacado', '-fecha_registro'], name='directorio_orden_idx'),
+            models.Index(fields=['activo', 'region', '-destacado', '-fecha_registro'], name='directorio_region_idx'),
+            models.Index(fields=['activo', 'comuna', '-destacado', '-fecha_registro'], name='directorio_comuna_idx'),
+            models.Index(fields=['activo', 'cobertura', '-destacado', '-fecha_registro'], name='directorio_cobertura_idx'),
+            models.Index(fields=['activo', 'nombre'], name='directorio_nombre_idx'),
+            models.Index(fields=['activo', '-ranking_score', '-fecha_registro'], name='directorio_ranking_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} ({self.origen})"
+
+    def get_absolute_url(self):
+        from django.urls import reverse
+        if self.origen == 'legado':
+            return reverse('proveedor_perfil', args=[self.proveedor_legado_id])
+        return reverse('proveedores:detalle_proveedor', args=[self.proveedor_id])
+
+    def foto_url(self):
+        if not self.foto:
+            return ''
+        from django.core.files.storage import default_storage
+        return default_storage.url(self.foto)
+
+    def lista_categorias(self):
+        return [n for n in self.categorias_nombres.split(', ') if n]
+
+    def ubicacion(self):
+        return self.zona or self.comuna_nombre or self.region_nombre
+
+
+class TrigramaNombre(models.Model):
+    """
+    Trigramas del nombre (sin tildes ni mayúsculas) de cada ficha del
+    directorio y de cada producto, para la búsqueda aproximada (ver
+    proveedor/trigramas.py). Cada fila apunta a una ficha o a un producto.
+    """
+    trigrama = models.CharField(max_length=3)
+    ficha = models.ForeignKey(
+        DirectorioProveedor, on_delete=models.CASCADE, null=True, blank=True, related_name='trigramas'
+    )
+    producto = models.ForeignKey(
+        ProductoServicio, on_delete=models.CASCADE, null=True, blank=True, related_name='trigramas'
+    )
+
+    class Meta:
+        db_table = 'trigrama_nombre'
+        verbose_name = 'Trigrama de Nombre'
+        verbose_name_plural = 'Trigramas de Nombres'
+        constraints = [
+            models.UniqueConstraint(fields=['ficha', 'trigrama'], name='trigrama_ficha_unico'),
+            models.UniqueConstraint(fields=['producto', 'trigrama'], name='trigrama_producto_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['trigrama', 'ficha'], name='trigrama_ficha_idx'),
+            models.Index(fields=['trigrama', 'producto'], name='trigrama_producto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.trigrama} -> {self.ficha_id or self.producto_id}"
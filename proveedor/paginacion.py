@@ -0,0 +1,88 @@
+"""
+Paginación por cursor (keyset) para listados grandes.
+
+En vez de OFFSET, el cursor guarda el valor de orden y el id del último
+elemento entregado; la página siguiente es un rango sobre el índice que
+siempre cuesta lo mismo, sin importar cuán profundo se navegue. El cursor
+viene de la URL: si no decodifica o sus valores no calzan con el tipo de
+los campos de orden se entrega la primera página.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+def codificar_cursor(valores):
+    texto = json.dumps(valores, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve la lista de valores del cursor, o None si es inválido."""
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode())
+    except (ValueError, TypeError):
+        return None
+    return valores if isinstance(valores, list) else None
+
+
+def valores_cursor(queryset, campo, cursor):
+    """
+    Valores del cursor convertidos al tipo de (campo, id), o None si el
+    cursor es inválido (largo o tipos que no corresponden).
+    """
+    valores = decodificar_cursor(cursor)
+    campos = ['id'] if campo == 'id' else [campo, 'id']
+    if valores is None or len(valores) != len(campos):
+        return None
+    convertidos = []
+    for nombre, valor in zip(campos, valores):
+        if valor is None or isinstance(valor, (bool, dict, list)):
+            return None
+        try:
+            convertidos.append(queryset.query.resolve_ref(nombre).output_field.to_python(valor))
+        except (ValidationError, TypeError, ValueError):
+            return None
+    return convertidos
+
+
+def paginar_por_cursor(queryset, campo='id', cursor=None, tamano=24, descendente=False):
+    """
+    Ordena por (campo, id) y devuelve (elementos, cursor_siguiente).
+    `campo` puede ser un campo del modelo o una anotación.
+    """
+    signo = '-' if descendente else ''
+    comparador = 'lt' if descendente else 'gt'
+
+    if campo == 'id':
+        queryset = queryset.order_by(f'{signo}id')
+    else:
+        queryset = queryset.order_by(f'{signo}{campo}', f'{signo}id')
+
+    valores = valores_cursor(queryset, campo, cursor)
+    if valores:
+        if campo == 'id':
+            queryset = queryset.filter(**{f'id__{comparador}': valores[-1]})
+        else:
+            valor, ultimo_id = valores
+            queryset = queryset.filter(
+                Q(**{f'{campo}__{comparador}': valor}) |
+                Q(**{campo: valor, f'id__{comparador}': ultimo_id})
+            )
+
+    elementos = list(queryset[:tamano + 1])
+    siguiente = None
+    if len(elementos) > tamano:
+        elementos = elementos[:tamano]
+        ultimo = elementos[-1]
+        if campo == 'id':
+            siguiente = codificar_cursor([ultimo.id])
+        else:
+            siguiente = codificar_cursor([getattr(ultimo, campo), ultimo.id])
+    return elementos, siguiente
@@ -0,0 +1,158 @@
+"""
+Historial de precios del catálogo.
+
+Cada cambio real de `precio_referencia` agrega una fila compacta a
+HistorialPrecio (producto, fecha, centavos). Las consultas de tendencia
+agregan en la base de datos (GROUP BY período/producto) y en Python solo se
+recorre el resultado ya reducido, nunca las filas crudas del historial.
+"""
+from decimal import Decimal
+
+from django.db.models import Avg, OuterRef, Subquery
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .models import HistorialPrecio
+
+PERIODOS = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+}
+
+TAMANO_LOTE = 1000
+
+
+def a_centavos(precio):
+    if precio is None:
+        return None
+    return int((Decimal(precio) * 100).to_integral_value())
+
+
+def desde_centavos(centavos):
+    return (Decimal(centavos) / 100).quantize(Decimal('0.01'))
+
+
+def ultimo_precio(producto_id):
+    """Último precio registrado del producto, en centavos (o None)."""
+    return (
+        HistorialPrecio.objects
+        .filter(producto_id=producto_id)
+        .order_by('-fecha', '-id')
+        .values_list('precio_centavos', flat=True)
+        .first()
+    )
+
+
+def registrar_precio(producto, fecha=None):
+    """
+    Agrega una fila al historial solo si el precio cambió respecto del
+    último registrado. Devuelve True si se escribió.
+    """
+    centavos = a_centavos(producto.precio_referencia)
+    if centavos is None or ultimo_precio(producto.pk) == centavos:
+        return False
+    datos = {'producto_id': producto.pk, 'precio_centavos': centavos}
+    if fecha is not None:
+        datos['fecha'] = fecha
+    HistorialPrecio.objects.create(**datos)
+    return True
+
+
+def registrar_precios(cambios, fecha):
+    """
+    Versión masiva para la importación: `cambios` son pares
+    (producto_id, precio) ya filtrados a los que cambiaron.
+    """
+    filas = [
+        HistorialPrecio(producto_id=producto_id, fecha=fecha, precio_centavos=a_centavos(precio))
+        for producto_id, precio in cambios
+        if precio is not None
+    ]
+    HistorialPrecio.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+    return len(filas)
+
+
+def serie_producto(producto_id, desde=None, hasta=None):
+    """Lista de (fecha, precio) del producto en orden cronológico."""
+    historial = HistorialPrecio.objects.filter(producto_id=producto_id)
+    if desde:
+        historial = historial.filter(fecha__gte=desde)
+    if hasta:
+        historial = historial.filter(fecha__lte=hasta)
+    return [
+        (fecha, desde_centavos(centavos))
+        for fecha, centavos in historial.order_by('fecha', 'id').values_list('fecha', 'precio_centavos')
+    ]
+
+
+def indice_categoria(categoria, periodo='mes', desde=None, hasta=None, proveedor=None):
+    """
+    Índice de precios de una categoría (base 100 en el primer período).
+
+    La base agrupa el historial por (período, producto) con el precio
+    promedio de cada producto en el período. Cada producto conserva su
+    último precio en los períodos sin cambios, y el índice es el promedio
+    de precio/precio_base de los productos con precio conocido.
+
+    Devuelve una lista de dicts {periodo, indice, productos}.
+    """
+    truncar = PERIODOS.get(periodo, TruncMonth)
+    historial = HistorialPrecio.objects.filter(producto__categoria=categoria)
+    if proveedor is not None:
+        historial = historial.filter(producto__proveedor=proveedor)
+    if hasta:
+        historial = historial.filter(fecha__lte=hasta)
+
+    precios_base = {}
+    if desde:
+        # Precio vigente de cada producto al inicio del rango
+        anterior = (
+            HistorialPrecio.objects
+            .filter(producto_id=OuterRef('producto_id'), fecha__lt=desde)
+            .order_by('-fecha', '-id')
+            .values('precio_centavos')[:1]
+        )
+        precios_base = {
+            producto_id: centavos
+            for producto_id, centavos in historial.filter(fecha__lt=desde)
+            .values('producto_id').distinct()
+            .annotate(base=Subquery(anterior))
+            .values_list('producto_id', 'base')
+            if centavos
+        }
+        historial = historial.filter(fecha__gte=desde)
+
+    agregado = (
+        historial
+        .annotate(periodo=truncar('fecha'))
+        .values('periodo', 'producto_id')
+        .annotate(promedio=Avg('precio_centavos'))
+        .order_by('periodo')
+        .values_list('periodo', 'producto_id', 'promedio')
+    )
+
+    vigentes = dict(precios_base)
+    serie = []
+    periodo_actual = None
+    for fecha, producto_id, promedio in agregado:
+        promedio = float(promedio)
+        if fecha != periodo_actual:
+            if periodo_actual is not None:
+                serie.append(_punto_indice(periodo_actual, vigentes, precios_base))
+            periodo_actual = fecha
+        precios_base.setdefault(producto_id, promedio)
+        vigentes[producto_id] = promedio
+    if periodo_actual is not None:
+        serie.append(_punto_indice(periodo_actual, vigentes, precios_base))
+    return serie
+
+
+def _punto_indice(periodo, vigentes, precios_base):
+    relaciones = [
+        precio / precios_base[producto_id]
+        for producto_id, precio in vigentes.items()
+        if precios_base.get(producto_id)
+    ]
+    indice = round(100 * sum(relaciones) / len(relaciones), 2) if relaciones else None
+    return {'periodo': periodo, 'indice': indice, 'productos': len(relaciones)}
+
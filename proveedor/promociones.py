@@ -0,0 +1,172 @@
+"""
+Índice precalculado de promociones vigentes.
+
+El conjunto de promociones vigentes solo cambia al pasar la medianoche
+(hora de Chile) o cuando se guarda una promoción, así que se calcula una vez
+y se deja en cache. La clave incluye la fecha local: al cambiar el día la
+clave anterior deja de usarse y el índice se reconstruye en la primera
+lectura.
+
+El índice se arma comparando las fechas con el día local, no con
+`Promocion.estado`: el estado lo mueve el cron `actualizar_promociones` y
+una lectura anterior a su pasada quedaría guardada con el estado de ayer.
+
+Sin CACHES configurado cada proceso tiene su propio LocMemCache y la señal
+que invalida al guardar solo alcanza al proceso donde se guardó; por eso la
+entrada dura a lo más PROMOCIONES_CACHE_TTL segundos. Con un cache
+compartido (Redis, Memcached) la invalidación llega a todos y el TTL puede
+subir.
+"""
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .cambios import registrar_cambios
+from .models import Promocion, Proveedor
+
+PREFIJO_CACHE = 'promociones_vigentes'
+
+
+def zona_horaria():
+    return ZoneInfo(getattr(settings, 'PROMOCIONES_ZONA_HORARIA', 'America/Santiago'))
+
+
+def hoy_local():
+    """Fecha actual en la zona horaria de las promociones."""
+    return timezone.localdate(timezone=zona_horaria())
+
+
+def _clave(hoy):
+    return f'{PREFIJO_CACHE}:{hoy.isoformat()}'
+
+
+def _segundos_hasta_medianoche():
+    zona = zona_horaria()
+    ahora = timezone.now().astimezone(zona)
+    manana = datetime.combine(ahora.date() + timedelta(days=1), time.min, tzinfo=zona)
+    return max(int((manana - ahora).total_seconds()), 1)
+
+
+def _duracion_cache():
+    ttl = getattr(settings, 'PROMOCIONES_CACHE_TTL', 60)
+    return min(ttl, _segundos_hasta_medianoche())
+
+
+def _calcular(hoy):
+    """
+    Ids vigentes en `hoy` ordenados por fecha de término (las que terminan
+    antes, primero), en total y agrupados por proveedor.
+    """
+    todas, por_proveedor = [], {}
+    filas = (
+        promociones_en_ventana(hoy, hoy)
+        .order_by('fecha_fin', 'id')
+        .values_list('id', 'proveedor_id')
+    )
+    for promocion_id, proveedor_id in filas:
+        todas.append(promocion_id)
+        por_proveedor.setdefault(proveedor_id, []).append(promocion_id)
+    return {'todas': todas, 'por_proveedor': por_proveedor}
+
+
+def _indice():
+    hoy = hoy_local()
+    clave = _clave(hoy)
+    indice = cache.get(clave)
+    if indice is None:
+        indice = _calcular(hoy)
+        cache.set(clave, indice, _duracion_cache())
+    return indice
+
+
+def ids_vigentes(proveedor_id=None):
+    """Ids vigentes hoy en orden de término; opcionalmente de un solo proveedor."""
+    indice = _indice()
+    if proveedor_id is None:
+        return indice['todas']
+    return indice['por_proveedor'].get(proveedor_id, [])
+
+
+def invalidar():
+    cache.delete(_clave(hoy_local()))
+
+
+def actualizar_estados(hoy=None):
+    """
+    Mueve las promociones de estado según la fecha local, con un UPDATE por
+    transición, anota los inicios/fines en el registro de cambios y marca
+    el catálogo de los proveedores afectados, para que sus snapshots y
+    exportaciones cacheadas cambien de versión.
+    Es idempotente: sin cambio de día no hay filas que mover.
+    Devuelve (iniciadas, finalizadas).
+    """
+    hoy = hoy or hoy_local()
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        iniciadas = Promocion.objects.filter(
+            estado='programada',
+            fecha_inicio__lte=hoy,
+            fecha_fin__gte=hoy,
+        ).update(estado='vigente', fecha_estado=ahora)
+
+        finalizadas = Promocion.objects.filter(
+            estado__in=['programada', 'vigente'],
+            fecha_fin__lt=hoy,
+        ).update(estado='finalizada', fecha_estado=ahora)
+
+        # Las filas recién movidas son las que quedaron con fecha_estado = ahora
+        eventos, afectados = {}, set()
+        movidas = Promocion.objects.filter(fecha_estado=ahora).values_list(
+            'id', 'proveedor_id', 'estado', 'activo'
+        )
+        for promocion_id, proveedor_id, estado, activo in movidas.iterator(chunk_size=1000):
+            afectados.add(proveedor_id)
+            if activo:
+                accion = 'inicio' if estado == 'vigente' else 'fin'
+                eventos.setdefault(proveedor_id, []).append((promocion_id, accion))
+        for proveedor_id, cambios in eventos.items():
+            registrar_cambios(proveedor_id, 'promocion', cambios)
+        if afectados:
+            Proveedor.objects.filter(pk__in=afectados).update(catalogo_actualizado=ahora)
+
+    if iniciadas or finalizadas:
+        invalidar()
+    return iniciadas, finalizadas
+
+
+def promociones_en_ventana(desde, hasta, region_id=None, categoria_id=None):
+    """
+    Promociones activas que se cruzan con [desde, hasta]:
+    fecha_inicio <= hasta AND fecha_fin >= desde.
+
+    Para que sea un rango acotado sobre (activo, fecha_inicio, fecha_fin) y
+    no un recorrido de toda la tabla, el inicio se limita además a
+    [desde - duración máxima, hasta]: ninguna promoción que empezó antes de
+    eso puede seguir vigente en la ventana. La duración máxima sale del
+    índice (activo, duracion_dias) con una sola lectura.
+    """
+    duracion_maxima = (
+        Promocion.objects
+        .filter(activo=True)
+        .order_by('-duracion_dias')
+        .values_list('duracion_dias', flat=True)
+        .first()
+    ) or 0
+
+    promociones = Promocion.objects.filter(
+        activo=True,
+        proveedor__activo=True,
+        fecha_inicio__gte=desde - timedelta(days=duracion_maxima),
+        fecha_inicio__lte=hasta,
+        fecha_fin__gte=desde,
+    )
+    if region_id:
+        promociones = promociones.filter(proveedor__region_id=region_id)
+    if categoria_id:
+        promociones = promociones.filter(proveedor__categorias__id=categoria_id)
+    return promociones.order_by('fecha_inicio', 'id')
@@ -0,0 +1,97 @@
+"""
+Puntaje de relevancia de las fichas del directorio (DirectorioProveedor.ranking_score).
+
+Es una suma ponderada de señales de calidad del proveedor, cada una en [0, 1]:
+- popularidad: visitas al perfil, en escala logarítmica,
+- aceptación: tasa de contactos aceptados, suavizada como en las
+  recomendaciones (1 de 1 no gana a 80 de 100),
+- catálogo: productos activos (propuestas en el directorio anterior), en
+  escala logarítmica,
+- promociones: promociones vigentes, hasta PROMOCIONES_TOPE,
+- verificado y destacado.
+
+`calcular_ranking` lo recalcula para todas las fichas en una pasada: tres
+lecturas (fichas y dos conteos agrupados), el cálculo por columnas en memoria
+y un bulk_update solo de las filas cuyo puntaje cambió. Lo corre el comando
+`calcular_ranking`; el orden "Relevancia" solo lee la columna indexada. Una
+ficha nueva queda en 0 hasta la siguiente pasada.
+"""
+import math
+
+from django.db.models import Count
+
+from usuarios.models import Propuesta
+
+from .models import DirectorioProveedor, ProductoServicio, Promocion
+from .recomendaciones import ACEPTACION_PREVIA, PESO_PREVIO
+
+PESOS = {
+    'popularidad': 0.30,
+    'aceptacion': 0.25,
+    'catalogo': 0.20,
+    'promociones': 0.10,
+    'verificado': 0.10,
+    'destacado': 0.05,
+}
+
+PROMOCIONES_TOPE = 3
+TAMANO_LOTE = 1000
+
+
+def _conteo(queryset, campo):
+    return dict(
+        queryset.order_by().values(campo).annotate(total=Count('id')).values_list(campo, 'total')
+    )
+
+
+def _escala_log(valores):
+    """log1p de cada valor dividido por el del máximo (todo 0 si no hay datos)."""
+    escala = math.log1p(max(valores, default=0)) or 1.0
+    return [math.log1p(max(v, 0)) / escala for v in valores]
+
+
+def calcular_ranking(tamano_lote=TAMANO_LOTE):
+    """Recalcula el puntaje de todas las fichas. Devuelve (fichas, actualizadas)."""
+    filas = list(
+        DirectorioProveedor.objects.values_list(
+            'id', 'proveedor_id', 'proveedor_legado_id', 'visitas', 'contactos_enviados',
+            'contactos_aceptados', 'verificado', 'destacado', 'ranking_score',
+        )
+    )
+    if not filas:
+        return 0, 0
+    (ids, proveedores, legados, visitas, enviados, aceptados,
+     verificados, destacados, anteriores) = zip(*filas)
+
+    productos = _conteo(ProductoServicio.objects.filter(activo=True), 'proveedor_id')
+    propuestas = _conteo(Propuesta.objects.all(), 'proveedor_id')
+    vigentes = _conteo(Promocion.objects.filter(estado='vigente', activo=True), 'proveedor_id')
+
+    popularidad = _escala_log(visitas)
+    catalogo = _escala_log([
+        productos.get(p, 0) if p else propuestas.get(l, 0) for p, l in zip(proveedores, legados)
+    ])
+    promociones = [min(vigentes.get(p, 0), PROMOCIONES_TOPE) / PROMOCIONES_TOPE for p in proveedores]
+    aceptacion = [
+        min((a + ACEPTACION_PREVIA * PESO_PREVIO) / (max(e, 0) + PESO_PREVIO), 1.0) if p else 0.0
+        for p, e, a in zip(proveedores, enviados, aceptados)
+    ]
+
+    puntajes = [
+        round(
+            PESOS['popularidad'] * pop + PESOS['aceptacion'] * ace + PESOS['catalogo'] * cat +
+            PESOS['promociones'] * pro + PESOS['verificado'] * ver + PESOS['destacado'] * des,
+            4,
+        )
+        for pop, ace, cat, pro, ver, des in zip(
+            popularidad, aceptacion, catalogo, promociones, verificados, destacados
+        )
+    ]
+
+    cambiadas = [
+        DirectorioProveedor(id=ficha_id, ranking_score=puntaje)
+        for ficha_id, puntaje, anterior in zip(ids, puntajes, anteriores)
+        if puntaje != anterior
+    ]
+    DirectorioProveedor.objects.bulk_update(cambiadas, ['ranking_score'], batch_size=tamano_lote)
+    return len(ids), len(cambiadas)
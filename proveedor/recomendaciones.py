@@ -0,0 +1,231 @@
+"""
+Recomendación de proveedores para comerciantes.
+
+El puntaje de cada par comercio × proveedor es una suma ponderada de:
+- alcance: el proveedor atiende la comuna del comercio según CoberturaComuna
+  (la misma tabla del filtro "Entrega en"; sin alcance no se recomienda),
+  con algo más de peso si además está en esa comuna,
+- afinidad: los rubros del proveedor calzan con el tipo de negocio o con
+  los intereses del comercio,
+- popularidad: visitas al perfil, en escala logarítmica,
+- aceptación: tasa de contactos aceptados, suavizada para que un proveedor
+  con 1 de 1 no quede por sobre uno con 80 de 100.
+
+Todo lo que depende solo del proveedor se calcula una vez al cargarlos, y
+los candidatos de cada comuna se leen una vez de CoberturaComuna (por el
+índice (comuna, proveedor)): cada comercio solo evalúa a los proveedores
+que llegan a él. Los comercios
+con el mismo perfil (comuna, tipo de negocio, intereses) reciben la misma
+lista, así que el top-k se calcula una vez por perfil distinto. Los
+comerciantes se recorren por bloques y cada bloque reemplaza sus filas con
+un DELETE y un bulk_create.
+"""
+import heapq
+import math
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from usuarios.models import Comerciante
+
+from .models import CoberturaComuna, Proveedor, RecomendacionProveedor
+from .texto import normalizar
+
+PESOS = {
+    'alcance': 0.35,
+    'afinidad': 0.35,
+    'popularidad': 0.15,
+    'aceptacion': 0.15,
+}
+
+# Suavizado de la tasa de aceptación: equivale a sumar PESO_PREVIO
+# solicitudes con la tasa ACEPTACION_PREVIA a las reales del proveedor.
+ACEPTACION_PREVIA = 0.3
+PESO_PREVIO = 10
+
+# Alcance de un proveedor que atiende la comuna sin estar en ella
+ALCANCE_COBERTURA = 0.7
+
+TAMANO_BLOQUE = 1000
+
+# Fragmentos del nombre de una categoría que la relacionan con cada tipo de negocio
+RUBROS_POR_TIPO = {
+    'ALMACEN': ('abarrote', 'aliment', 'bebida', 'lacteo', 'limpieza', 'confite', 'snack', 'embutido'),
+    'MINIMARKET': ('abarrote', 'aliment', 'bebida', 'lacteo', 'limpieza', 'congelado', 'higiene', 'snack'),
+    'BOTILLERIA': ('bebida', 'licor', 'vino', 'cerveza', 'destilado', 'hielo', 'snack'),
+    'PANADERIA': ('harina', 'panader', 'pasteler', 'reposter', 'lacteo', 'levadura'),
+    'FERIA': ('fruta', 'verdura', 'hortaliza', 'agricola', 'envase'),
+    'KIOSCO': ('confite', 'dulce', 'snack', 'bebida', 'diario', 'revista'),
+    'FOODTRUCK': ('aliment', 'carne', 'gas', 'envase', 'desechable', 'bebida'),
+}
+
+# Fragmentos del nombre de una categoría que responden a cada interés
+RUBROS_POR_INTERES = {
+    'MARKETING': ('marketing', 'publicidad', 'imprenta', 'diseno'),
+    'REDES_SOCIALES': ('marketing', 'publicidad', 'diseno'),
+    'INVENTARIO': ('software', 'tecnolog', 'inventario'),
+    'TECNOLOGIA': ('software', 'tecnolog', 'informatic', 'pago'),
+    'FINANZAS': ('contab', 'financ', 'credito'),
+    'IMPUESTOS': ('contab', 'tributar'),
+    'CREDITOS': ('financ', 'credito', 'banco'),
+    'LEYES': ('legal', 'abogad'),
+    'SEGUROS': ('seguro',),
+    'SEGURIDAD': ('seguridad', 'alarma', 'camara'),
+    'LOGISTICA': ('logistic', 'transporte', 'reparto', 'distribu'),
+    'DECORACION': ('decoracion', 'mobiliario', 'exhibi', 'letrero'),
+    'SOSTENIBILIDAD': ('recicla', 'sustentab', 'ecolog', 'envase'),
+}
+
+_Candidato = namedtuple('_Candidato', 'id usuario_id comuna_id tipos intereses base')
+
+
+def _claves_que_calzan(nombres, tabla):
+    return frozenset(
+        clave for clave, fragmentos in tabla.items()
+        if any(f in nombre for nombre in nombres for f in fragmentos)
+    )
+
+
+def top_por_defecto():
+    return getattr(settings, 'RECOMENDACIONES_TOP', 6)
+
+
+class IndiceProveedores:
+    """Proveedores activos con sus componentes fijos ya calculados."""
+
+    def __init__(self):
+        proveedores = list(
+            Proveedor.objects
+            .filter(activo=True)
+            .prefetch_related('categorias')
+        )
+        max_visitas = max((p.visitas for p in proveedores), default=0)
+        escala = math.log1p(max_visitas) or 1.0
+
+        self.por_id = {}
+        for p in proveedores:
+            nombres = [normalizar(c.nombre) for c in p.categorias.all()]
+            popularidad = math.log1p(max(p.visitas, 0)) / escala
+            aceptacion = (
+                (p.contactos_aceptados + ACEPTACION_PREVIA * PESO_PREVIO) /
+                (max(p.contactos_enviados, 0) + PESO_PREVIO)
+            )
+            self.por_id[p.id] = _Candidato(
+                id=p.id,
+                usuario_id=p.usuario_id,
+                comuna_id=p.comuna_id,
+                tipos=_claves_que_calzan(nombres, RUBROS_POR_TIPO),
+                intereses=_claves_que_calzan(nombres, RUBROS_POR_INTERES),
+                base=PESOS['popularidad'] * popularidad + PESOS['aceptacion'] * min(aceptacion, 1.0),
+            )
+
+        # Comuna -> ids de proveedores que la atienden, leído al necesitarlo
+        self.que_atienden = {}
+
+    def candidatos(self, comuna_id):
+        if not comuna_id:
+            return []
+        ids = self.que_atienden.get(comuna_id)
+        if ids is None:
+            ids = self.que_atienden[comuna_id] = list(
+                CoberturaComuna.objects.filter(comuna_id=comuna_id).values_list('proveedor_id', flat=True)
+            )
+        return [self.por_id[i] for i in ids if i in self.por_id]
+
+    @staticmethod
+    def alcance(candidato, comuna_id):
+        """Solo se llama con candidatos que atienden la comuna."""
+        return 1.0 if candidato.comuna_id == comuna_id else ALCANCE_COBERTURA
+
+    @staticmethod
+    def afinidad(candidato, tipo_negocio, intereses):
+        valor = 0.7 if tipo_negocio in candidato.tipos else 0.0
+        if intereses and candidato.intereses & intereses:
+            valor += 0.3
+        return valor
+
+    def mejores(self, comuna_id, tipo_negocio, intereses, k):
+        """Los k (+1, por si uno es el propio comercio) mejores (puntaje, candidato)."""
+        puntajes = []
+        for candidato in self.candidatos(comuna_id):
+            puntaje = (
+                PESOS['alcance'] * self.alcance(candidato, comuna_id) +
+                PESOS['afinidad'] * self.afinidad(candidato, tipo_negocio, intereses) +
+                candidato.base
+            )
+            puntajes.append((puntaje, -candidato.id, candidato))
+        return [(p, c) for p, _, c in heapq.nlargest(k + 1, puntajes, key=lambda t: t[:2])]
+
+
+def calcular_recomendaciones(top=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Recalcula el top-k de todos los comerciantes.
+    Devuelve (comerciantes, perfiles distintos, filas escritas).
+    """
+    top = top or top_por_defecto()
+    indice = IndiceProveedores()
+    ahora = timezone.now()
+    por_perfil = {}
+    comerciantes = escritas = 0
+
+    filas_comerciantes = (
+        Comerciante.objects
+        .filter(rol='COMERCIANTE')
+        .order_by('id')
+        .values_list('id', 'comuna_oficial_id', 'tipo_negocio', 'intereses')
+        .iterator(chunk_size=tamano_bloque)
+    )
+    while True:
+        bloque = list(islice(filas_comerciantes, tamano_bloque))
+        if not bloque:
+            break
+
+        ids, filas = [], []
+        for comerciante_id, comuna_id, tipo_negocio, intereses in bloque:
+            perfil = (
+                comuna_id,
+                tipo_negocio,
+                frozenset(c for c in (intereses or '').split(',') if c),
+            )
+            mejores = por_perfil.get(perfil)
+            if mejores is None:
+                mejores = por_perfil[perfil] = indice.mejores(*perfil, top)
+
+            ids.append(comerciante_id)
+            propios = [(p, c) for p, c in mejores if c.usuario_id != comerciante_id][:top]
+            filas.extend(
+                RecomendacionProveedor(
+                    comerciante_id=comerciante_id,
+                    proveedor_id=candidato.id,
+                    posicion=posicion,
+                    puntaje=round(puntaje, 4),
+                    fecha_calculo=ahora,
+                )
+                for posicion, (puntaje, candidato) in enumerate(propios, start=1)
+            )
+
+        with transaction.atomic():
+            RecomendacionProveedor.objects.filter(comerciante_id__in=ids).delete()
+            RecomendacionProveedor.objects.bulk_create(filas, batch_size=TAMANO_BLOQUE)
+        comerciantes += len(ids)
+        escritas += len(filas)
+
+    # Cuentas que dejaron de ser comercios no conservan recomendaciones viejas
+    RecomendacionProveedor.objects.exclude(comerciante__rol='COMERCIANTE').delete()
+    return comerciantes, len(por_perfil), escritas
+
+
+def recomendados_para(comerciante_id, limite=None):
+    """Proveedores recomendados en orden, con una lectura sobre (comerciante, posicion)."""
+    recomendaciones = (
+        RecomendacionProveedor.objects
+        .filter(comerciante_id=comerciante_id, proveedor__activo=True)
+        .select_related('proveedor', 'proveedor__comuna')
+        .order_by('posicion')
+    )
+    if limite:
+        recomendaciones = recomendaciones[:limite]
+    return [r.proveedor for r in recomendaciones]
@@ -0,0 +1,177 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from usuarios.models import Propuesta
+from usuarios.models import Proveedor as ProveedorLegado
+
+from .cambios import accion_guardado, registrar_cambio
+from .cobertura import CAMPOS_COBERTURA, actualizar_cobertura, agregar_comuna
+from .models import (
+    CategoriaProveedor, Comuna, DirectorioProveedor, Pais, ProductoServicio, Promocion, Proveedor, Region,
+)
+from .precios import registrar_precio
+from . import autocompletar, directorio, geografia, promociones, trigramas
+
+
+@receiver([post_save, post_delete], sender=ProductoServicio)
+@receiver([post_save, post_delete], sender=Promocion)
+def catalogo_modificado(sender, instance, **kwargs):
+    """Cualquier cambio de producto o promoción invalida el snapshot del catálogo."""
+    Proveedor.objects.filter(pk=instance.proveedor_id).update(
+        catalogo_actualizado=timezone.now()
+    )
+
+
+@receiver(post_save, sender=ProductoServicio)
+def precio_modificado(sender, instance, **kwargs):
+    """Registra el precio en el historial si cambió respecto del último."""
+    registrar_precio(instance)
+
+
+@receiver(post_save, sender=ProductoServicio)
+def producto_guardado(sender, instance, created, **kwargs):
+    registrar_cambio(instance, 'producto', accion_guardado(instance, created))
+
+
+@receiver(post_save, sender=Promocion)
+def promocion_guardada(sender, instance, created, **kwargs):
+    registrar_cambio(instance, 'promocion', accion_guardado(instance, created))
+
+
+def _borrado_directo(sender, origin):
+    """
+    False si el objeto cae en cascada (p. ej. al borrar el proveedor): en
+    ese caso el registro de cambios del proveedor también se está borrando.
+    """
+    return isinstance(origin, sender) or getattr(origin, 'model', None) is sender
+
+
+@receiver(post_delete, sender=ProductoServicio)
+def producto_eliminado(sender, instance, origin=None, **kwargs):
+    if _borrado_directo(sender, origin):
+        registrar_cambio(instance, 'producto', 'eliminado')
+
+
+@receiver(post_delete, sender=Promocion)
+def promocion_eliminada(sender, instance, origin=None, **kwargs):
+    if _borrado_directo(sender, origin):
+        registrar_cambio(instance, 'promocion', 'eliminado')
+
+
+@receiver([post_save, post_delete], sender=Promocion)
+def promocion_modificada(sender, instance, **kwargs):
+    """El índice de promociones vigentes se reconstruye en la próxima lectura."""
+    promociones.invalidar()
+
+
+@receiver(post_save, sender=Proveedor)
+def proveedor_guardado(sender, instance, update_fields=None, **kwargs):
+    # Solo importa si pudo cambiar `activo` (no, p. ej., al sumar visitas)
+    if update_fields is None or 'activo' in update_fields:
+        promociones.invalidar()
+
+
+@receiver(post_save, sender=Proveedor)
+def cobertura_modificada(sender, instance, update_fields=None, **kwargs):
+    """Recalcula las comunas atendidas si cambió la cobertura o la ubicación."""
+    if update_fields is None or CAMPOS_COBERTURA & {f.removesuffix('_id') for f in update_fields}:
+        actualizar_cobertura(instance)
+
+
+@receiver(post_save, sender=Comuna)
+def comuna_creada(sender, instance, created, **kwargs):
+    if created:
+        agregar_comuna(instance)
+
+
+@receiver([post_save, post_delete], sender=Pais)
+@receiver([post_save, post_delete], sender=Region)
+@receiver([post_save, post_delete], sender=Comuna)
+def geografia_modificada(sender, **kwargs):
+    """El árbol País > Región > Comuna se recarga en la próxima lectura."""
+    geografia.invalidar()
+
+
+# ---------- Fichas del directorio ----------
+
+@receiver(post_save, sender=Proveedor)
+def ficha_proveedor_modificada(sender, instance, update_fields=None, **kwargs):
+    """Contadores sueltos se copian con un UPDATE; cualquier otro cambio rehace la ficha."""
+    if update_fields is not None and set(update_fields) <= set(directorio.CONTADORES):
+        directorio.copiar_campos(update_fields, [instance.pk])
+    else:
+        directorio.actualizar_ficha(instance)
+
+
+@receiver(m2m_changed, sender=Proveedor.categorias.through)
+def categorias_proveedor_modificadas(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        directorio.actualizar_ficha(instance)
+    elif pk_set:
+        directorio.actualizar_fichas(pk_set)
+
+
+@receiver(post_save, sender=CategoriaProveedor)
+def categoria_modificada(sender, instance, created, **kwargs):
+    if not created:
+        directorio.actualizar_fichas(instance.proveedores.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Region)
+def region_renombrada(sender, instance, **kwargs):
+    DirectorioProveedor.objects.filter(region=instance).exclude(
+        region_nombre=instance.nombre
+    ).update(region_nombre=instance.nombre)
+
+
+@receiver(post_save, sender=Comuna)
+def comuna_renombrada(sender, instance, **kwargs):
+    DirectorioProveedor.objects.filter(comuna=instance).exclude(
+        comuna_nombre=instance.nombre
+    ).update(comuna_nombre=instance.nombre)
+
+
+@receiver(post_save, sender=ProveedorLegado)
+def proveedor_legado_guardado(sender, instance, **kwargs):
+    directorio.actualizar_ficha_legado(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Propuesta)
+def propuesta_modificada(sender, instance, origin=None, **kwargs):
+    # Si cae en cascada con su proveedor, la ficha también se está borrando
+    if kwargs.get('signal') is post_delete and not _borrado_directo(sender, origin):
+        return
+    directorio.actualizar_ficha_legado(instance.proveedor_id)
+
+
+# ---------- Índice de autocompletado ----------
+
+@receiver([post_save, post_delete], sender=DirectorioProveedor)
+def ficha_autocompletar(sender, instance, **kwargs):
+    autocompletar.ficha_modificada(instance, borrada=kwargs.get('signal') is post_delete)
+
+
+@receiver([post_save, post_delete], sender=CategoriaProveedor)
+def categoria_autocompletar(sender, instance, **kwargs):
+    autocompletar.categoria_modificada(instance, borrada=kwargs.get('signal') is post_delete)
+
+
+@receiver([post_save, post_delete], sender=ProductoServicio)
+def producto_autocompletar(sender, instance, **kwargs):
+    autocompletar.producto_modificado(instance, borrado=kwargs.get('signal') is post_delete)
+
+
+# ---------- Trigramas para la búsqueda aproximada ----------
+# Al borrar, las filas de TrigramaNombre caen en cascada.
+
+@receiver(post_save, sender=DirectorioProveedor)
+def ficha_trigramas(sender, instance, **kwargs):
+    trigramas.indexar('proveedor', [(instance.pk, instance.nombre)])
+
+
+@receiver(post_save, sender=ProductoServicio)
+def producto_trigramas(sender, instance, **kwargs):
+    trigramas.indexar('producto', [(instance.pk, instance.nombre)])
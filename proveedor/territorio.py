@@ -0,0 +1,161 @@
+"""
+Carga de la división territorial de Chile (País > Región > Comuna).
+
+proveedor/data/territorio_cl.csv trae las 16 regiones y las 346 comunas con
+su código único territorial (CUT de SUBDERE) y el punto de referencia de la
+comuna (GeoNames, licencia CC BY 4.0; donde GeoNames no traía dato se usa la
+cabecera comunal, aproximada a cinco decimales). Toda comuna tiene punto:
+una comuna sin coordenadas dejaría a sus proveedores fuera de las búsquedas
+por cercanía.
+
+La carga es idempotente: se compara contra lo que ya existe y solo se
+escriben las diferencias, con un bulk_update para las filas que cambiaron y
+un bulk_create (ignore_conflicts) para las que faltan, todo en una
+transacción. Las regiones y comunas ingresadas a mano antes de tener código
+se adoptan por nombre en vez de duplicarse.
+"""
+import csv
+from collections import namedtuple
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from . import directorio
+from .geo import codificar_geohash
+from .models import Comuna, Pais, Proveedor, Region
+from .texto import normalizar
+
+ARCHIVO = Path(__file__).resolve().parent / 'data' / 'territorio_cl.csv'
+PAIS_CODIGO = 'CL'
+PAIS_NOMBRE = 'Chile'
+TAMANO_LOTE = 1000
+
+Resultado = namedtuple('Resultado', 'regiones_creadas regiones_actualizadas comunas_creadas comunas_actualizadas')
+
+
+def leer(ruta=ARCHIVO):
+    """
+    Filas del CSV (region_codigo, region, codigo, nombre, latitud, longitud).
+    Lanza OSError si no se puede abrir y ValueError si el formato no calza.
+    """
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        filas = []
+        for numero, fila in enumerate(csv.DictReader(archivo), start=2):
+            try:
+                filas.append({
+                    'region_codigo': fila['region_codigo'].strip(),
+                    'region': fila['region'].strip(),
+                    'codigo': fila['codigo'].strip(),
+                    'nombre': fila['nombre'].strip(),
+                    'latitud': float(fila['latitud']) if fila['latitud'] else None,
+                    'longitud': float(fila['longitud']) if fila['longitud'] else None,
+                })
+            except (KeyError, ValueError) as e:
+                raise ValueError(f'fila {numero}: {e}')
+    return filas
+
+
+def _sincronizar(modelo, datos, sin_codigo, adoptar):
+    """
+    Deja `modelo` igual a `datos` (codigo -> valores). `adoptar(objeto)`
+    devuelve el código que le corresponde a una fila antigua sin código, o
+    None. Devuelve (creadas, actualizadas, codigo -> id).
+    """
+    existentes = {o.codigo: o for o in modelo.objects.filter(codigo__in=datos)}
+    adoptadas = set()
+    for objeto in sin_codigo:
+        codigo = adoptar(objeto)
+        if codigo and codigo not in existentes:
+            objeto.codigo = codigo
+            existentes[codigo] = objeto
+            adoptadas.add(codigo)
+
+    cambiadas = []
+    campos = set()
+    for codigo, valores in datos.items():
+        objeto = existentes.get(codigo)
+        if objeto is None:
+            continue
+        distintos = {k: v for k, v in valores.items() if getattr(objeto, k) != v}
+        if distintos or codigo in adoptadas:
+            for campo, valor in distintos.items():
+                setattr(objeto, campo, valor)
+            campos.update(distintos)
+            cambiadas.append(objeto)
+    if adoptadas:
+        campos.add('codigo')
+    if cambiadas:
+        modelo.objects.bulk_update(cambiadas, sorted(campos), batch_size=TAMANO_LOTE)
+
+    nuevas = [modelo(codigo=codigo, **valores) for codigo, valores in datos.items() if codigo not in existentes]
+    modelo.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE, ignore_conflicts=True)
+
+    ids = dict(modelo.objects.filter(codigo__in=datos).values_list('codigo', 'id'))
+    return len(nuevas), len(cambiadas), ids
+
+
+def cargar(filas):
+    """Sincroniza país, regiones y comunas con las filas del archivo."""
+    with transaction.atomic():
+        pais = (
+            Pais.objects.filter(codigo=PAIS_CODIGO).first() or
+            Pais.objects.filter(nombre__iexact=PAIS_NOMBRE).first() or
+            Pais.objects.create(codigo=PAIS_CODIGO, nombre=PAIS_NOMBRE)
+        )
+
+        regiones = {}
+        for fila in filas:
+            regiones.setdefault(fila['region_codigo'], {'nombre': fila['region'], 'pais_id': pais.id})
+        por_nombre = {normalizar(v['nombre']): codigo for codigo, v in regiones.items()}
+
+        def region_por_nombre(region):
+            # 'Región Metropolitana de Santiago' -> 'metropolitana'
+            nombre = normalizar(region.nombre)
+            for corto, codigo in por_nombre.items():
+                if corto in nombre or nombre in corto:
+                    return codigo
+            return None
+
+        regiones_creadas, regiones_actualizadas, region_ids = _sincronizar(
+            Region, regiones, Region.objects.filter(codigo__isnull=True), region_por_nombre
+        )
+
+        comunas = {}
+        for fila in filas:
+            valores = {'nombre': fila['nombre'], 'region_id': region_ids[fila['region_codigo']]}
+            # Sin dato en el archivo se conservan las coordenadas que ya hubiera
+            if fila['latitud'] is not None:
+                valores.update(
+                    latitud=fila['latitud'],
+                    longitud=fila['longitud'],
+                    geohash=codificar_geohash(fila['latitud'], fila['longitud']),
+                )
+            comunas[fila['codigo']] = valores
+        por_region_y_nombre = {
+            (v['region_id'], normalizar(v['nombre'])): codigo for codigo, v in comunas.items()
+        }
+
+        comunas_creadas, comunas_actualizadas, _ = _sincronizar(
+            Comuna,
+            comunas,
+            Comuna.objects.filter(codigo__isnull=True),
+            lambda c: por_region_y_nombre.get((c.region_id, normalizar(c.nombre))),
+        )
+
+    return Resultado(regiones_creadas, regiones_actualizadas, comunas_creadas, comunas_actualizadas)
+
+
+def copiar_coordenadas_a_proveedores():
+    """
+    Los proveedores sin ubicación exacta toman el punto de su comuna (un
+    UPDATE) y sus fichas de directorio lo copian (otro).
+    """
+    comuna = Comuna.objects.filter(pk=OuterRef('comuna_id'))
+    actualizados = Proveedor.objects.filter(ubicacion_exacta=False).update(
+        latitud=Subquery(comuna.values('latitud')[:1]),
+        longitud=Subquery(comuna.values('longitud')[:1]),
+        geohash=Subquery(comuna.values('geohash')[:1]),
+    )
+    directorio.copiar_campos(directorio.COORDENADAS)
+    return actualizados
@@ -1,3 +1,899 @@
-from django.test import TestCase
+import gzip
+import json
+import math
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from usuarios import views as usuarios_views
+from usuarios.models import Beneficio, Comerciante, Propuesta
+from usuarios.models import Proveedor as ProveedorLegado
+
+from . import autocompletar, cambios, campanas, comercios, directorio, geo, geografia, importacion, promociones, territorio, trigramas
+from .busqueda import filtrar_productos
+from . import exportacion
+from .exportacion import obtener_snapshot, version_catalogo
+from .precios import indice_categoria, registrar_precio, serie_producto
+from .importacion import importar_productos
+from .cobertura import proveedores_que_atienden, reconstruir_cobertura
+from .models import (
+    CambioCatalogo, CampanaContacto, CategoriaProveedor, Comuna, DirectorioProveedor, HistorialPrecio, Pais, ProductoServicio,
+    Promocion, Proveedor, Region, SolicitudContacto, TrigramaNombre,
+)
+from .paginacion import codificar_cursor, paginar_por_cursor
+from .ranking import calcular_ranking
+from .recomendaciones import IndiceProveedores, calcular_recomendaciones, recomendados_para
+
+
+def crear_proveedor(email='prov@ejemplo.cl', **campos):
+    comerciante = Comerciante.objects.create(
+        nombre_apellido='Proveedor Prueba', email=email, password_hash='x',
+        relacion_negocio='DUEÑO', tipo_negocio='ALMACEN', comuna='Santiago',
+    )
+    datos = {
+        'nombre_empresa': 'Distribuidora Prueba',
+        'descripcion': 'Abarrotes',
+        'whatsapp': '+56912345678',
+        'email': email,
+    }
+    datos.update(campos)
+    return Proveedor.objects.create(usuario=comerciante, **datos)
+
+
+class SesionProveedorMixin:
+    """Deja al proveedor como comerciante conectado, como hace el login de usuarios."""
+
+    def iniciar_sesion(self, proveedor):
+        usuario, _ = User.objects.get_or_create(username=proveedor.email, defaults={'email': proveedor.email})
+        self.client.force_login(usuario)
+        anterior = usuarios_views.current_logged_in_user
+        usuarios_views.current_logged_in_user = proveedor.usuario
+        self.addCleanup(setattr, usuarios_views, 'current_logged_in_user', anterior)
+
+
+class BusquedaTextoTests(SesionProveedorMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+        crear = ProductoServicio.objects.create
+        cls.en_nombre = crear(proveedor=cls.proveedor, nombre='Leche entera 1 L', descripcion='Caja')
+        cls.en_descripcion = crear(proveedor=cls.proveedor, nombre='Caja surtida', descripcion='Incluye leche')
+        cls.sin_calce = crear(proveedor=cls.proveedor, nombre='Arroz grado 1', descripcion='Bolsa')
+        cls.a_mitad = crear(proveedor=cls.proveedor, nombre='Semilleche', descripcion='Sin lactosa')
+
+    def test_cada_palabra_como_prefijo(self):
+        encontrados = filtrar_productos(ProductoServicio.objects.all(), 'lec ent')
+        self.assertEqual(list(encontrados.values_list('id', flat=True)), [self.en_nombre.id])
+
+    def test_no_calza_a_mitad_de_palabra(self):
+        encontrados = filtrar_productos(ProductoServicio.objects.all(), 'leche')
+        self.assertNotIn(self.a_mitad.id, encontrados.values_list('id', flat=True))
+
+    def test_relevancia_prefiere_el_nombre(self):
+        encontrados = filtrar_productos(ProductoServicio.objects.all(), 'leche').order_by('-relevancia')
+        self.assertEqual(
+            list(encontrados.values_list('id', flat=True)), [self.en_nombre.id, self.en_descripcion.id]
+        )
+
+    def test_lista_productos_ordena_por_relevancia(self):
+        self.iniciar_sesion(self.proveedor)
+        respuesta = self.client.get(reverse('proveedores:lista_productos'), {'buscar': 'leche'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            [p.id for p in respuesta.context['productos']], [self.en_nombre.id, self.en_descripcion.id]
+        )
+
+
+def planilla(*filas):
+    lineas = ['nombre,descripcion,categoria,precio_referencia'] + [','.join(f) for f in filas]
+    return SimpleUploadedFile('catalogo.csv', '\n'.join(lineas).encode('utf-8'), content_type='text/csv')
+
+
+class ImportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+
+    def test_actualiza_producto_existente(self):
+        importar_productos(self.proveedor, planilla(('Leche entera', 'Caja', 'OTRO', '990')))
+        resultado = importar_productos(self.proveedor, planilla(('Leche entera', 'Caja', 'OTRO', '1.090')))
+
+        self.assertEqual((resultado.creados, resultado.actualizados), (0, 1))
+        producto = ProductoServicio.objects.get(proveedor=self.proveedor)
+        self.assertEqual(producto.precio_referencia, Decimal('1090'))
+        self.assertEqual(HistorialPrecio.objects.filter(producto=producto).count(), 2)
+
+    def test_upsert_sin_unique_fields_en_mysql(self):
+        producto = ProductoServicio.objects.create(proveedor=self.proveedor, nombre='Leche', descripcion='Caja')
+        producto.precio_referencia = Decimal('990')
+
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(connection.features, 'supports_update_conflicts', True), \
+                mock.patch.object(ProductoServicio.objects, 'bulk_create') as bulk_create:
+            importacion._actualizar_existentes([producto])
+
+        self.assertTrue(bulk_create.call_args.kwargs['update_conflicts'])
+        self.assertNotIn('unique_fields', bulk_create.call_args.kwargs)
+
+    def test_motor_sin_upsert_usa_bulk_update(self):
+        importar_productos(self.proveedor, planilla(('Leche entera', 'Caja', 'OTRO', '990')))
+
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(connection.features, 'supports_update_conflicts', False):
+            importar_productos(self.proveedor, planilla(('Leche entera', 'Caja', 'OTRO', '1090')))
+
+        producto = ProductoServicio.objects.get(proveedor=self.proveedor)
+        self.assertEqual(producto.precio_referencia, Decimal('1090'))
+
+    def test_nombre_sin_distinguir_mayusculas(self):
+        importar_productos(self.proveedor, planilla(('Leche', 'Caja', 'OTRO', '990')))
+        resultado = importar_productos(self.proveedor, planilla(('LECHE', 'Caja', 'OTRO', '990')))
+
+        self.assertEqual((resultado.creados, resultado.actualizados), (0, 1))
+        self.assertEqual(
+            list(ProductoServicio.objects.filter(proveedor=self.proveedor).values_list('nombre', flat=True)),
+            ['LECHE'],
+        )
+
+    def test_reindexa_solo_productos_nuevos_o_renombrados(self):
+        importar_productos(self.proveedor, planilla(('Leche', 'Caja', 'OTRO', '990'), ('Pan', 'Bolsa', 'OTRO', '100')))
+        leche = ProductoServicio.objects.get(nombre='Leche')
+
+        with mock.patch.object(importacion.trigramas, 'indexar', wraps=importacion.trigramas.indexar) as indexar:
+            importar_productos(self.proveedor, planilla(
+                ('Leche', 'Caja', 'OTRO', '1090'), ('PAN', 'Bolsa', 'OTRO', '100'), ('Arroz', 'Bolsa', 'OTRO', '800'),
+            ))
+
+        indexados = {nombre for _, nombre in indexar.call_args.args[1]}
+        self.assertEqual(indexados, {'PAN', 'Arroz'})
+        self.assertTrue(TrigramaNombre.objects.filter(producto__nombre='PAN', trigrama='pan').exists())
+        self.assertTrue(TrigramaNombre.objects.filter(producto=leche).exists())
+
+    def test_error_a_mitad_no_deja_lotes_aplicados(self):
+        filas = [(f'Producto {i}', 'Caja', 'OTRO', '100') for i in range(3)]
+        guardar = importacion._guardar_lote
+        llamadas = []
+
+        def falla_en_el_segundo(*args):
+            llamadas.append(1)
+            if len(llamadas) == 2:
+                raise RuntimeError('falla')
+            return guardar(*args)
+
+        with mock.patch.object(importacion, 'TAMANO_LOTE', 1), \
+                mock.patch.object(importacion, '_guardar_lote', falla_en_el_segundo):
+            with self.assertRaises(RuntimeError):
+                importar_productos(self.proveedor, planilla(*filas))
+
+        self.assertFalse(ProductoServicio.objects.filter(proveedor=self.proveedor).exists())
+
+
+class ExportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+        crear = ProductoServicio.objects.create
+        crear(proveedor=cls.proveedor, nombre='Leche entera', descripcion='Caja')
+        crear(proveedor=cls.proveedor, nombre='Yogur', descripcion='Pote', activo=False)
+
+    def setUp(self):
+        raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, raiz, ignore_errors=True)
+        ajustes = override_settings(CATALOGO_SNAPSHOTS_ROOT=raiz)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_snapshot_publico_solo_con_productos_activos(self):
+        url = reverse('proveedores:snapshot_catalogo', args=[self.proveedor.id])
+        respuesta = self.client.get(url)
+        contenido = b''.join(respuesta.streaming_content)
+        respuesta.close()
+
+        catalogo = json.loads(gzip.decompress(contenido))
+        self.assertEqual([p['nombre'] for p in catalogo['productos']], ['Leche entera'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+
+    def test_snapshot_se_regenera_solo_al_cambiar_el_catalogo(self):
+        ruta, version = obtener_snapshot(self.proveedor)
+        self.assertEqual(obtener_snapshot(self.proveedor), (ruta, version))
+
+        self.proveedor.marcar_catalogo_actualizado()
+        nueva, _ = obtener_snapshot(self.proveedor)
+
+        self.assertNotEqual(nueva, ruta)
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_una_version_vieja_no_borra_la_mas_nueva(self):
+        leido_antes = Proveedor.objects.get(pk=self.proveedor.pk)
+        self.proveedor.marcar_catalogo_actualizado()
+        nueva, _ = obtener_snapshot(self.proveedor)
+
+        vieja, _ = obtener_snapshot(leido_antes)
+
+        self.assertTrue(os.path.exists(nueva))
+        self.assertTrue(os.path.exists(vieja))
+
+    def test_abrir_regenera_si_el_archivo_desaparece(self):
+        original = exportacion.obtener_snapshot
+        borradas = []
+
+        def borrada_por_otra_peticion(proveedor):
+            ruta, version = original(proveedor)
+            if not borradas:
+                os.remove(ruta)
+                borradas.append(ruta)
+            return ruta, version
+
+        with mock.patch.object(exportacion, 'obtener_snapshot', borrada_por_otra_peticion):
+            archivo, version = exportacion.abrir_snapshot(self.proveedor)
+        with archivo:
+            catalogo = json.loads(gzip.decompress(archivo.read()))
+
+        self.assertEqual(len(borradas), 1)
+        self.assertTrue(os.path.exists(archivo.name))
+        self.assertEqual(catalogo['proveedor']['id'], self.proveedor.id)
+        self.assertEqual(version, version_catalogo(self.proveedor))
+
+    def test_cambio_de_estado_de_promociones_cambia_la_version(self):
+        hoy = promociones.hoy_local()
+        Promocion.objects.create(
+            proveedor=self.proveedor, titulo='2x1', descripcion='Leche',
+            fecha_inicio=hoy + timedelta(days=1), fecha_fin=hoy + timedelta(days=5),
+        )
+        self.proveedor.refresh_from_db()
+        antes = version_catalogo(self.proveedor)
+
+        self.assertEqual(promociones.actualizar_estados(hoy + timedelta(days=1)), (1, 0))
+
+        self.proveedor.refresh_from_db()
+        self.assertGreater(version_catalogo(self.proveedor), antes)
+
+
+class PaginacionCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+        ProductoServicio.objects.bulk_create(
+            ProductoServicio(proveedor=cls.proveedor, nombre=f'Producto {i}', descripcion='Caja',
+                             precio_referencia=Decimal(100 + i))
+            for i in range(5)
+        )
+
+    def test_recorre_todas_las_paginas(self):
+        vistos, cursor = [], None
+        while True:
+            pagina, cursor = paginar_por_cursor(ProductoServicio.objects.all(), 'precio_referencia', cursor, 2)
+            vistos.extend(p.precio_referencia for p in pagina)
+            if not cursor:
+                break
+        self.assertEqual(vistos, [Decimal(100 + i) for i in range(5)])
+
+    def test_cursor_con_tipos_incorrectos_es_la_primera_pagina(self):
+        primera, _ = paginar_por_cursor(ProductoServicio.objects.all(), 'precio_referencia', None, 2)
+        for cursor in ('WyJhYmMiLDFd', codificar_cursor([1]), codificar_cursor([[1], 2]), 'no-es-base64!'):
+            with self.subTest(cursor=cursor):
+                pagina, _ = paginar_por_cursor(ProductoServicio.objects.all(), 'precio_referencia', cursor, 2)
+                self.assertEqual(pagina, primera)
+
+    def test_busqueda_con_cursor_alterado_responde(self):
+        respuesta = self.client.get(reverse('proveedores:buscar_productos'), {'cursor': 'WyJhYmMiLDFd'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.context['productos']), 5)
+
+
+class HistorialPreciosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+
+    def test_solo_registra_cambios_reales(self):
+        producto = ProductoServicio.objects.create(
+            proveedor=self.proveedor, nombre='Leche', descripcion='Caja', precio_referencia=Decimal('990'),
+        )
+        producto.descripcion = 'Caja de 1 L'
+        producto.save()
+        producto.precio_referencia = Decimal('1090.50')
+        producto.save()
+
+        precios = [precio for _, precio in serie_producto(producto.id)]
+        self.assertEqual(precios, [Decimal('990.00'), Decimal('1090.50')])
+
+    def test_indice_categoria_conserva_el_ultimo_precio(self):
+        crear = ProductoServicio.objects.create
+        sube = crear(proveedor=self.proveedor, nombre='Queso', descripcion='Laminado', categoria='ALIMENTOS')
+        fijo = crear(proveedor=self.proveedor, nombre='Yogur', descripcion='Pote', categoria='ALIMENTOS')
+
+        def precio(producto, valor, mes):
+            producto.precio_referencia = Decimal(valor)
+            registrar_precio(producto, datetime(2026, mes, 10, tzinfo=dt_timezone.utc))
+
+        precio(sube, '1000', 1)
+        precio(fijo, '500', 1)
+        precio(sube, '1100', 2)
+
+        serie = indice_categoria('ALIMENTOS', periodo='mes')
+        self.assertEqual([(p['indice'], p['productos']) for p in serie], [(100.0, 2), (105.0, 2)])
+
+
+class CambiosCatalogoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+
+    def crear_producto(self, **campos):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProductoServicio.objects.create(proveedor=self.proveedor, descripcion='Caja', **campos)
+
+    def confirmar_cambios(self):
+        # Simula que pasó el margen de confirmación
+        CambioCatalogo.objects.update(fecha=timezone.now() - cambios.MARGEN_CONFIRMACION)
+
+    def test_cambio_se_registra_al_confirmar(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            producto = ProductoServicio.objects.create(proveedor=self.proveedor, nombre='Leche', descripcion='Caja')
+            self.assertFalse(CambioCatalogo.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            list(CambioCatalogo.objects.values_list('objeto_id', 'accion')), [(producto.id, 'creado')]
+        )
+
+    def test_no_entrega_cambios_dentro_del_margen(self):
+        self.crear_producto(nombre='Leche')
+        recientes, cursor, _ = cambios.cambios_desde([self.proveedor.id])
+        self.assertEqual(recientes, [])
+
+        self.confirmar_cambios()
+        confirmados, siguiente, _ = cambios.cambios_desde([self.proveedor.id], cursor)
+        self.assertEqual([c['accion'] for c in confirmados], ['creado'])
+        self.assertEqual(cambios.cambios_desde([self.proveedor.id], siguiente)[0], [])
+
+    def test_desactivado_sin_datos(self):
+        activo = self.crear_producto(nombre='Leche')
+        inactivo = self.crear_producto(nombre='Pan')
+        with self.captureOnCommitCallbacks(execute=True):
+            inactivo.activo = False
+            inactivo.save()
+        self.confirmar_cambios()
+
+        entregados, _, _ = cambios.cambios_desde([self.proveedor.id])
+        datos = {(c['id'], c['accion']): c['datos'] for c in entregados}
+
+        self.assertEqual(datos[(activo.id, 'creado')]['nombre'], 'Leche')
+        self.assertIsNone(datos[(inactivo.id, 'creado')])
+        self.assertIsNone(datos[(inactivo.id, 'desactivado')])
+
+    def test_eliminado_conserva_el_id(self):
+        producto = self.crear_producto(nombre='Leche')
+        producto_id = producto.id
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.delete()
+        self.assertTrue(CambioCatalogo.objects.filter(objeto_id=producto_id, accion='eliminado').exists())
+
+
+class PromocionesVigentesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def crear_promocion(self, inicio, fin, **campos):
+        return Promocion.objects.create(
+            proveedor=self.proveedor, titulo='Promo', descripcion='Descuento',
+            fecha_inicio=inicio, fecha_fin=fin, **campos
+        )
+
+    def test_usa_las_fechas_y_no_el_estado(self):
+        hoy = promociones.hoy_local()
+        empieza_hoy = self.crear_promocion(hoy, hoy + timedelta(days=3))
+        vencida = self.crear_promocion(hoy - timedelta(days=5), hoy - timedelta(days=1))
+        # Antes de la pasada del cron los estados siguen siendo los de ayer
+        Promocion.objects.filter(pk=empieza_hoy.pk).update(estado='programada')
+        Promocion.objects.filter(pk=vencida.pk).update(estado='vigente')
+        cache.clear()
+
+        self.assertEqual(promociones.ids_vigentes(), [empieza_hoy.id])
+        self.assertEqual(promociones.ids_vigentes(self.proveedor.id), [empieza_hoy.id])
+
+    def test_ordena_por_fecha_de_termino(self):
+        hoy = promociones.hoy_local()
+        larga = self.crear_promocion(hoy - timedelta(days=1), hoy + timedelta(days=9))
+        corta = self.crear_promocion(hoy, hoy + timedelta(days=1))
+        self.crear_promocion(hoy, hoy + timedelta(days=1), activo=False)
+
+        self.assertEqual(promociones.ids_vigentes(), [corta.id, larga.id])
+
+    @override_settings(PROMOCIONES_CACHE_TTL=5)
+    def test_cache_dura_a_lo_mas_el_ttl(self):
+        self.assertLessEqual(promociones._duracion_cache(), 5)
+
+
+class ActualizarPromocionesTests(TestCase):
+
+    def test_mueve_promociones_y_termina_beneficios(self):
+        hoy = promociones.hoy_local()
+        proveedor = crear_proveedor()
+        promocion = Promocion.objects.create(
+            proveedor=proveedor, titulo='Promo', descripcion='Descuento',
+            fecha_inicio=hoy - timedelta(days=3), fecha_fin=hoy - timedelta(days=1),
+        )
+        Promocion.objects.filter(pk=promocion.pk).update(estado='vigente')
+        vencido = Beneficio.objects.create(titulo='Vencido', descripcion='x', vence=hoy - timedelta(days=1))
+        vigente = Beneficio.objects.create(titulo='Vigente', descripcion='x', vence=hoy)
+        sin_vencimiento = Beneficio.objects.create(titulo='Sin fecha', descripcion='x')
+
+        salida = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('actualizar_promociones', stdout=salida)
+
+        self.assertIn('1 beneficios terminados', salida.getvalue())
+        promocion.refresh_from_db()
+        self.assertEqual(promocion.estado, 'finalizada')
+        self.assertEqual(
+            dict(Beneficio.objects.values_list('id', 'estado')),
+            {vencido.id: 'TERMINADO', vigente.id: 'ACTIVO', sin_vencimiento.id: 'ACTIVO'},
+        )
+
+
+class CalendarioPromocionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+
+    def crear_promocion(self, inicio, fin):
+        return Promocion.objects.create(
+            proveedor=self.proveedor, titulo='Promo', descripcion='Descuento', fecha_inicio=inicio, fecha_fin=fin,
+        )
+
+    def test_ventana_incluye_promociones_largas_y_descarta_las_que_no_cruzan(self):
+        hoy = promociones.hoy_local()
+        larga = self.crear_promocion(hoy - timedelta(days=60), hoy + timedelta(days=10))
+        cruza = self.crear_promocion(hoy + timedelta(days=6), hoy + timedelta(days=20))
+        self.crear_promocion(hoy, hoy + timedelta(days=4))
+        self.crear_promocion(hoy + timedelta(days=8), hoy + timedelta(days=9))
+
+        ventana = promociones.promociones_en_ventana(hoy + timedelta(days=5), hoy + timedelta(days=7))
+
+        self.assertEqual(list(ventana.values_list('id', flat=True)), [larga.id, cruza.id])
+
+
+class ContadoresContactoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+
+    def contadores(self):
+        ficha = DirectorioProveedor.objects.get(proveedor=self.proveedor)
+        proveedor = Proveedor.objects.get(pk=self.proveedor.pk)
+        return {
+            (proveedor.contactos_enviados, proveedor.contactos_aceptados),
+            (ficha.contactos_enviados, ficha.contactos_aceptados),
+        }
+
+    def test_incrementos_de_instancias_viejas_no_se_pisan(self):
+        otra = Proveedor.objects.get(pk=self.proveedor.pk)
+
+        self.proveedor.sumar_contactos(enviados=1)
+        otra.sumar_contactos(enviados=1, aceptados=1)
+
+        self.assertEqual(self.contadores(), {(2, 1)})
+
+    def test_reconciliar_recuenta_desde_las_solicitudes(self):
+        crear = SolicitudContacto.objects.create
+        crear(proveedor=self.proveedor, mensaje='Hola', estado='aceptada')
+        crear(proveedor=self.proveedor, mensaje='Hola')
+        Proveedor.objects.filter(pk=self.proveedor.pk).update(contactos_enviados=7, contactos_aceptados=0)
+
+        salida = StringIO()
+        call_command('reconciliar_contadores', '--dry-run', stdout=salida)
+        self.assertIn('1 con diferencias', salida.getvalue())
+
+        call_command('reconciliar_contadores', stdout=StringIO())
+        self.assertEqual(self.contadores(), {(2, 1)})
+
+
+class DirectorioComerciosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        geografia.invalidar()
+
+        def comercio(email, comuna, intereses):
+            return Comerciante.objects.create(
+                nombre_apellido='Dueña', email=email, password_hash='x', relacion_negocio='DUEÑO',
+                tipo_negocio='ALMACEN', comuna=comuna, intereses=intereses, nombre_negocio=f'Almacén {comuna}',
+            )
+
+        cls.nunoa = comercio('a@ejemplo.cl', 'nunoa', 'MARKETING,FINANZAS')
+        cls.providencia = comercio('b@ejemplo.cl', 'Providencia', 'MARKETING')
+
+    def setUp(self):
+        geografia.invalidar()
+        self.addCleanup(geografia.invalidar)
+
+    def ids(self, **filtros):
+        return set(comercios.comercios_qs(**filtros).values_list('id', flat=True))
+
+    def test_filtros_por_comuna_region_e_interes(self):
+        metropolitana = Region.objects.get(codigo='13')
+
+        self.assertEqual(self.ids(comuna='Ñuñoa'), {self.nunoa.id})
+        self.assertEqual(self.ids(region=metropolitana.id), {self.nunoa.id, self.providencia.id})
+        self.assertEqual(self.ids(intereses=['FINANZAS', 'VENTAS']), {self.nunoa.id})
+
+    def test_pagina_por_cursor_solo_con_datos_publicos(self):
+        pagina, cursor = comercios.buscar_comercios({}, tamano=1)
+        siguiente, _ = comercios.buscar_comercios({}, cursor=cursor, tamano=1)
+
+        self.assertEqual([c.id for c in pagina + siguiente], [self.nunoa.id, self.providencia.id])
+        self.assertEqual(set(comercios.datos_publicos(pagina[0])), set(comercios.CAMPOS_PUBLICOS))
+
+
+class CampanasContactoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+        cls.comercios = [
+            Comerciante.objects.create(
+                nombre_apellido='Dueño', email=f'c{i}@ejemplo.cl', password_hash='x',
+                relacion_negocio='DUEÑO', tipo_negocio='ALMACEN', comuna='Santiago',
+            )
+            for i in range(5)
+        ]
+        # Ya contactado a mano: la campaña no lo repite, pero cuenta para el cupo
+        SolicitudContacto.objects.create(proveedor=cls.proveedor, comercio=cls.comercios[0], mensaje='Hola')
+        cls.campana = CampanaContacto.objects.create(
+            proveedor=cls.proveedor, nombre='Almacenes', mensaje='Conozca nuestro catálogo', tipo_negocio='ALMACEN',
+        )
+
+    def destinatarios(self):
+        solicitudes = SolicitudContacto.objects.filter(campana=self.campana).order_by('comercio_id')
+        return list(solicitudes.values_list('comercio_id', flat=True))
+
+    def test_procesa_por_lotes_hasta_completar(self):
+        lotes, creadas = campanas.procesar_campanas(tamano=2)
+
+        self.campana.refresh_from_db()
+        self.assertEqual((lotes, creadas), (2, 4))
+        self.assertEqual((self.campana.estado, self.campana.enviadas), ('completada', 4))
+        self.assertEqual(self.destinatarios(), [c.id for c in self.comercios[1:]])
+        self.assertEqual(Proveedor.objects.get(pk=self.proveedor.pk).contactos_enviados, 4)
+
+    @override_settings(CAMPANAS_MAX_CONTACTOS_DIARIOS=3)
+    def test_respeta_el_cupo_diario(self):
+        self.assertEqual(campanas.procesar_lote(self.campana.id, tamano=10), 2)
+        self.assertEqual(campanas.procesar_lote(self.campana.id, tamano=10), 0)
+
+        self.campana.refresh_from_db()
+        self.assertEqual(self.campana.estado, 'en_proceso')
+        self.assertEqual(len(self.destinatarios()), 2)
+
+
+class RecomendacionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        pais = Pais.objects.create(nombre='Pais Prueba', codigo='XX')
+        otro_pais = Pais.objects.create(nombre='Otro Pais', codigo='YY')
+        region = Region.objects.create(nombre='Region Prueba', pais=pais)
+        cls.comuna = Comuna.objects.create(nombre='Comuna A', region=region)
+        vecina = Comuna.objects.create(nombre='Comuna B', region=region)
+        otra_region = Region.objects.create(nombre='Region Extranjera', pais=otro_pais)
+        extranjera = Comuna.objects.create(nombre='Comuna C', region=otra_region)
+
+        def proveedor(nombre, cobertura, comuna):
+            return crear_proveedor(
+                email=f'{nombre}@ejemplo.cl', nombre_empresa=nombre, cobertura=cobertura,
+                pais=comuna.region.pais, region=comuna.region, comuna=comuna,
+            )
+
+        cls.local = proveedor('local', 'comunal', cls.comuna)
+        cls.regional = proveedor('regional', 'regional', vecina)
+        cls.comunal_vecino = proveedor('vecino', 'comunal', vecina)
+        cls.nacional_extranjero = proveedor('extranjero', 'nacional', extranjera)
+        cls.comercio = Comerciante.objects.create(
+            nombre_apellido='Comercio', email='comercio@ejemplo.cl', password_hash='x',
+            relacion_negocio='DUEÑO', tipo_negocio='ALMACEN', comuna='Comuna A', comuna_oficial=cls.comuna,
+        )
+
+    def test_solo_recomienda_a_quienes_atienden_la_comuna(self):
+        calcular_recomendaciones(top=10)
+
+        recomendados = {p.id for p in recomendados_para(self.comercio.id)}
+        self.assertEqual(recomendados, {self.local.id, self.regional.id})
+        self.assertEqual(
+            recomendados,
+            set(proveedores_que_atienden(self.comuna.id).values_list('id', flat=True)),
+        )
+
+    def test_el_de_la_misma_comuna_tiene_mas_alcance(self):
+        indice = IndiceProveedores()
+        local = indice.por_id[self.local.id]
+        regional = indice.por_id[self.regional.id]
+        self.assertGreater(indice.alcance(local, self.comuna.id), indice.alcance(regional, self.comuna.id))
+
+
+class CoberturaComunaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.nunoa = Comuna.objects.get(codigo='13120')
+        cls.providencia = Comuna.objects.get(codigo='13123')
+        cls.proveedor = crear_proveedor(
+            cobertura='comunal', pais=cls.nunoa.region.pais, region=cls.nunoa.region, comuna=cls.nunoa,
+        )
+
+    def atiende(self, comuna):
+        return proveedores_que_atienden(comuna.id).filter(pk=self.proveedor.pk).exists()
+
+    def test_cambiar_la_cobertura_ajusta_las_comunas(self):
+        self.assertEqual((self.atiende(self.nunoa), self.atiende(self.providencia)), (True, False))
+
+        self.proveedor.cobertura = 'regional'
+        self.proveedor.save(update_fields=['cobertura'])
+
+        self.assertEqual((self.atiende(self.nunoa), self.atiende(self.providencia)), (True, True))
+
+    def test_comuna_nueva_entra_en_la_cobertura_regional(self):
+        self.proveedor.cobertura = 'regional'
+        self.proveedor.save()
+
+        nueva = Comuna.objects.create(nombre='Comuna Nueva', region=self.nunoa.region)
+
+        self.assertTrue(self.atiende(nueva))
+        antes = set(self.proveedor.comunas_atendidas.values_list('comuna_id', flat=True))
+        reconstruir_cobertura()
+        self.assertEqual(set(self.proveedor.comunas_atendidas.values_list('comuna_id', flat=True)), antes)
+
+
+class TerritorioTests(TestCase):
+
+    def test_todas_las_comunas_tienen_coordenadas_en_chile(self):
+        filas = territorio.leer()
+
+        self.assertEqual(len(filas), 346)
+        for fila in filas:
+            with self.subTest(comuna=fila['nombre']):
+                # Incluye Isla de Pascua, Juan Fernández y Villa Las Estrellas (Antártica)
+                self.assertTrue(-63 <= fila['latitud'] <= -17)
+                self.assertTrue(-110 <= fila['longitud'] <= -58)
+
+
+class GeoTests(TestCase):
+    # Plaza de Armas de Santiago
+    LATITUD, LONGITUD = -33.4489, -70.6693
+    KM_POR_GRADO = math.radians(geo.RADIO_TIERRA_KM)
+
+    def crear_en(self, email, km_norte=0, km_oeste=0):
+        latitud = self.LATITUD + km_norte / self.KM_POR_GRADO
+        longitud = self.LONGITUD - km_oeste / (self.KM_POR_GRADO * math.cos(math.radians(latitud)))
+        return crear_proveedor(email=email, ubicacion_exacta=True, latitud=latitud, longitud=longitud)
+
+    def test_geohash_conocidos(self):
+        # Ejemplos de referencia del algoritmo y el centro de Santiago
+        self.assertEqual(geo.codificar_geohash(42.6, -5.6, 5), 'ezs42')
+        self.assertEqual(geo.codificar_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geo.codificar_geohash(self.LATITUD, self.LONGITUD), '66j9xyu4j')
+        self.assertEqual(geo.codificar_geohash(None, self.LONGITUD), '')
+
+    def test_radio_incluye_el_borde_interior_y_excluye_el_exterior(self):
+        dentro = self.crear_en('dentro@ejemplo.cl', km_norte=4.9)
+        fuera = self.crear_en('fuera@ejemplo.cl', km_norte=5.1)
+        oeste = self.crear_en('oeste@ejemplo.cl', km_oeste=4.9)
+
+        ids = [i for _, i in geo.ordenar_por_distancia(Proveedor.objects.all(), self.LATITUD, self.LONGITUD, 5)]
+
+        self.assertIn(dentro.id, ids)
+        self.assertIn(oeste.id, ids)
+        self.assertNotIn(fuera.id, ids)
+
+    def test_resultados_de_mas_cerca_a_mas_lejos(self):
+        lejos = self.crear_en('lejos@ejemplo.cl', km_norte=8)
+        cerca = self.crear_en('cerca@ejemplo.cl', km_oeste=1)
+        medio = self.crear_en('medio@ejemplo.cl', km_norte=-4)
+
+        cercanos = geo.ordenar_por_distancia(Proveedor.objects.all(), self.LATITUD, self.LONGITUD, 10)
+
+        self.assertEqual(cercanos, [(1.0, cerca.id), (4.0, medio.id), (8.0, lejos.id)])
+
+
+class GeografiaTests(TestCase):
+
+    def setUp(self):
+        geografia.invalidar()
+        self.addCleanup(geografia.invalidar)
+
+    def test_arbol_se_reutiliza_hasta_que_cambia_una_comuna(self):
+        arbol = geografia.arbol()
+        with self.assertNumQueries(0):
+            self.assertIs(geografia.arbol(), arbol)
+
+        comuna = Comuna.objects.get(codigo='13120')
+        comuna.nombre = 'Ñuñoa Centro'
+        comuna.save()
+
+        nuevo = geografia.arbol()
+        self.assertNotEqual(nuevo.version, arbol.version)
+        self.assertEqual(nuevo.comuna_por_id[comuna.id].nombre, 'Ñuñoa Centro')
+
+    def test_exportar_escribe_un_archivo_por_version(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+
+        ruta, creado = geografia.exportar(directorio)
+        self.assertTrue(creado)
+        self.assertEqual(geografia.exportar(directorio), (ruta, False))
+        with open(ruta, encoding='utf-8') as archivo:
+            self.assertEqual(json.load(archivo)['version'], geografia.arbol().version)
+
+
+class DirectorioFiltrosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lacteos = CategoriaProveedor.objects.create(nombre='Lácteos')
+        cls.carnes = CategoriaProveedor.objects.create(nombre='Carnes')
+        cls.plataforma = crear_proveedor(nombre_empresa='Lechería del Sur', descripcion='Quesos y mantequilla')
+        cls.plataforma.categorias.add(cls.lacteos)
+        cls.otro = crear_proveedor(email='otro@ejemplo.cl', nombre_empresa='Carnicería Central')
+        cls.otro.categorias.add(cls.carnes)
+        legado = ProveedorLegado.objects.create(nombre='Quesos Antiguos')
+        Propuesta.objects.create(
+            proveedor=legado, titulo='Quesos', rubros_ofertados='Lácteos, Frutas', zona_geografica='Ñuñoa',
+        )
+        cls.legado = legado
+
+    def nombres(self, fichas):
+        return set(fichas.values_list('nombre', flat=True))
+
+    def test_categoria_por_la_tabla_intermedia(self):
+        fichas = directorio.con_categoria(directorio.fichas_activas(), self.lacteos.id)
+        self.assertEqual(self.nombres(fichas), {'Lechería del Sur'})
+
+    def test_rubro_junta_categorias_y_propuestas(self):
+        fichas = directorio.con_rubro(directorio.fichas_activas(), 'LACTEOS')
+        self.assertEqual(self.nombres(fichas), {'Lechería del Sur', 'Quesos Antiguos'})
+        self.assertNotIn('LIKE', str(fichas.query).upper())
+
+    def test_texto_por_prefijo_de_palabra(self):
+        fichas = directorio.fichas_activas()
+        self.assertEqual(self.nombres(directorio.con_texto(fichas, 'QUES')), {'Lechería del Sur', 'Quesos Antiguos'})
+        self.assertEqual(self.nombres(directorio.con_texto(fichas, 'lecheria sur')), {'Lechería del Sur'})
+        self.assertEqual(self.nombres(directorio.con_texto(fichas, 'ueso')), set())
+
+    def test_muchas_categorias_caben_en_la_ficha(self):
+        categorias = [CategoriaProveedor.objects.create(nombre=f'Categoría larga número {i}') for i in range(40)]
+        self.otro.categorias.add(*categorias)
+
+        ficha = DirectorioProveedor.objects.get(proveedor=self.otro)
+        self.assertEqual(len(ficha.lista_categorias()), 41)
+
+    def test_directorio_antiguo_filtra_por_rubro(self):
+        respuesta = self.client.get(reverse('directorio'), {'rubro': 'FRUTAS'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([f.nombre for f in respuesta.context['fichas']], ['Quesos Antiguos'])
+
+
+class RankingDirectorioTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.nuevo = crear_proveedor(nombre_empresa='Recién llegado')
+        cls.consolidado = crear_proveedor(email='c@ejemplo.cl', nombre_empresa='Consolidado', verificado=True)
+        cls.consolidado.sumar_contactos(enviados=10, aceptados=8)
+        ProductoServicio.objects.create(proveedor=cls.consolidado, nombre='Arroz', descripcion='Bolsa')
+        Proveedor.objects.filter(pk=cls.consolidado.pk).update(visitas=50)
+        directorio.copiar_campos(directorio.CONTADORES)
+
+    def test_ordena_por_relevancia_precalculada(self):
+        calcular_ranking()
+        # Una segunda pasada sin cambios no reescribe ninguna ficha
+        self.assertEqual(calcular_ranking(), (2, 0))
+
+        respuesta = self.client.get(reverse('proveedores:directorio_proveedores'), {'orden': 'relevancia'})
+
+        self.assertEqual(
+            [f.nombre for f in respuesta.context['page_obj']], ['Consolidado', 'Recién llegado']
+        )
+
+
+class AutocompletarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        CategoriaProveedor.objects.create(nombre='Panadería')
+        cls.proveedor = crear_proveedor(nombre_empresa='Pan de Campo')
+        ProductoServicio.objects.bulk_create(
+            ProductoServicio(proveedor=cls.proveedor, nombre=f'Pan amasado {i}', descripcion='Unidad')
+            for i in range(autocompletar.MAX_REVISADAS + 50)
+        )
+
+    def setUp(self):
+        autocompletar.invalidar()
+        self.addCleanup(autocompletar.invalidar)
+
+    def textos(self, texto, tipo):
+        return [s['texto'] for s in autocompletar.sugerencias(texto) if s['tipo'] == tipo]
+
+    def test_productos_no_desplazan_a_proveedores_ni_categorias(self):
+        sugerencias = autocompletar.sugerencias('pan')
+
+        self.assertEqual([s['tipo'] for s in sugerencias[:2]], ['proveedor', 'categoria'])
+        self.assertEqual(len(sugerencias), autocompletar.LIMITE)
+
+    def test_guardar_un_producto_no_copia_la_lista(self):
+        productos = autocompletar.indice().entradas['producto']
+        producto = ProductoServicio.objects.create(proveedor=self.proveedor, nombre='Queque de nuez')
+
+        self.assertIs(autocompletar.indice().entradas['producto'], productos)
+        self.assertEqual(self.textos('queque', 'producto'), [producto.nombre])
+
+    def test_importacion_agrega_y_quita_productos(self):
+        autocompletar.indice()
+        archivo = SimpleUploadedFile(
+            'catalogo.csv',
+            'nombre,descripcion,categoria,activo\nPan amasado 1,Unidad,,no\nMarraqueta,Unidad,,si'.encode('utf-8'),
+            content_type='text/csv',
+        )
+
+        importar_productos(self.proveedor, archivo)
+
+        self.assertEqual(self.textos('marraq', 'producto'), ['Marraqueta'])
+        self.assertNotIn('Pan amasado 1', self.textos('pan amasado 1', 'producto'))
+        self.assertIn('Pan amasado 10', self.textos('pan amasado 1', 'producto'))
+
+
+class TrigramasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = crear_proveedor()
+        crear = ProductoServicio.objects.create
+        for sabor in ('chocolate', 'frutilla', 'vainilla', 'manjar', 'lucuma'):
+            crear(proveedor=proveedor, nombre=f'Caja helado {sabor}', descripcion='Caja')
+        cls.zapallo = crear(proveedor=proveedor, nombre='Caja zapallo italiano', descripcion='Caja')
+
+    def ids(self, texto):
+        return [objeto_id for _, objeto_id in trigramas.parecidos('producto', texto)]
+
+    def test_encuentra_con_errores_de_tipeo(self):
+        self.assertEqual(self.ids('zapalo'), [self.zapallo.id])
+
+    @mock.patch.object(trigramas, 'MAX_POR_TRIGRAMA', 3)
+    def test_trigramas_comunes_no_cuentan_y_la_lectura_queda_acotada(self):
+        consulta = 'zapalo cajas'
+        # Una lectura acotada por trigrama y una por los nombres de los candidatos
+        with self.assertNumQueries(len(trigramas.trigramas(consulta)) + 1):
+            ids = self.ids(consulta)
+        self.assertEqual(ids, [self.zapallo.id])
+
+    @mock.patch.object(trigramas, 'MAX_POR_TRIGRAMA', 3)
+    def test_solo_trigramas_comunes_sigue_respondiendo(self):
+        self.assertTrue(self.ids('caja'))
@@ -0,0 +1,10 @@
+"""
+Normalización de texto para comparar nombres escritos a mano (comunas,
+categorías): sin tildes, en minúsculas y con los espacios colapsados.
+"""
+import unicodedata
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode()
+    return ' '.join(texto.lower().split())
@@ -0,0 +1,136 @@
+"""
+Búsqueda aproximada de proveedores y productos por trigramas.
+
+Los nombres se pliegan (sin tildes, minúsculas, solo letras y números) y se
+parten en trigramas por palabra, con relleno al inicio y al final como en
+pg_trgm: 'pan' -> '__p', '_pa', 'pan', 'an_'. Los trigramas viven en
+TrigramaNombre, indexados por (trigrama, ficha) y (trigrama, producto), lo
+que funciona igual en MySQL y en SQLite.
+
+Una búsqueda tiene dos pasos:
+1. candidatos: por cada trigrama de la consulta (a lo más
+   MAX_TRIGRAMAS_CONSULTA) se leen a lo más MAX_POR_TRIGRAMA apariciones
+   por el índice. Los trigramas que pasan ese tope son tan comunes que no
+   distinguen (como una stopword) y solo cuentan si la consulta no tiene
+   ninguno más raro. Se quedan los objetos que comparten al menos
+   UMBRAL_CANDIDATO de los trigramas usados, los que más comparten primero
+   y a lo más MAX_CANDIDATOS. El trabajo queda acotado por la consulta, no
+   por el tamaño del catálogo;
+2. parecido exacto en memoria sobre los nombres de esos candidatos.
+
+El parecido combina qué parte de la consulta aparece en el nombre (así
+'coca cola' encuentra 'Bebida Coca Cola 1,5 L') con el índice de Jaccard
+(a igual cobertura gana el nombre más parecido en largo).
+"""
+import math
+import re
+from collections import Counter
+
+from .models import DirectorioProveedor, ProductoServicio, TrigramaNombre
+from .texto import normalizar
+
+RELLENO = '_'
+MAX_TRIGRAMAS_CONSULTA = 24
+MAX_POR_TRIGRAMA = 1000
+UMBRAL_CANDIDATO = 0.4
+MAX_CANDIDATOS = 200
+UMBRAL_PARECIDO = 0.45
+TAMANO_LOTE = 1000
+
+# tipo -> (campo de TrigramaNombre, modelo indexado)
+FUENTES = {
+    'proveedor': ('ficha', DirectorioProveedor),
+    'producto': ('producto', ProductoServicio),
+}
+
+
+def trigramas(texto):
+    """Conjunto de trigramas del texto plegado, por palabra y con relleno."""
+    resultado = set()
+    for palabra in re.sub(r'[^a-z0-9]+', ' ', normalizar(texto)).split():
+        palabra = f'{RELLENO * 2}{palabra}{RELLENO}'
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+def parecido(consulta, nombre):
+    """Entre 0 y 1, a partir de los conjuntos de trigramas de la consulta y del nombre."""
+    comunes = len(consulta & nombre)
+    if not comunes:
+        return 0.0
+    cobertura = comunes / len(consulta)
+    jaccard = comunes / len(consulta | nombre)
+    return round(0.7 * cobertura + 0.3 * jaccard, 4)
+
+
+def indexar(tipo, objetos):
+    """
+    Deja los trigramas de cada (id, nombre) de `objetos` iguales a los de
+    su nombre, escribiendo solo las diferencias. Devuelve las filas creadas.
+    """
+    campo, _ = FUENTES[tipo]
+    objetos = list(objetos)
+    creadas = 0
+    for inicio in range(0, len(objetos), TAMANO_LOTE):
+        lote = {objeto_id: trigramas(nombre) for objeto_id, nombre in objetos[inicio:inicio + TAMANO_LOTE]}
+        actuales = {}
+        filas = TrigramaNombre.objects.filter(**{f'{campo}_id__in': list(lote)}).values_list(f'{campo}_id', 'trigrama')
+        for objeto_id, trigrama in filas:
+            actuales.setdefault(objeto_id, set()).add(trigrama)
+
+        nuevas = []
+        for objeto_id, esperados in lote.items():
+            presentes = actuales.get(objeto_id, set())
+            sobrantes = presentes - esperados
+            if sobrantes:
+                TrigramaNombre.objects.filter(**{f'{campo}_id': objeto_id, 'trigrama__in': sobrantes}).delete()
+            nuevas.extend(TrigramaNombre(trigrama=t, **{f'{campo}_id': objeto_id}) for t in esperados - presentes)
+        TrigramaNombre.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE, ignore_conflicts=True)
+        creadas += len(nuevas)
+    return creadas
+
+
+def reindexar(tipo, queryset=None):
+    """Indexa todos los objetos del tipo (o los del queryset dado)."""
+    _, modelo = FUENTES[tipo]
+    queryset = modelo.objects.all() if queryset is None else queryset
+    return indexar(tipo, queryset.order_by('id').values_list('id', 'nombre').iterator(chunk_size=TAMANO_LOTE))
+
+
+def _apariciones(campo, trigrama, queryset):
+    """Ids con el trigrama, a lo más MAX_POR_TRIGRAMA + 1 (un rango del índice)."""
+    filas = TrigramaNombre.objects.filter(trigrama=trigrama, **{f'{campo}__isnull': False})
+    if queryset is not None:
+        filas = filas.filter(**{f'{campo}_id__in': queryset.order_by().values('id')})
+    return list(filas.order_by(f'{campo}_id').values_list(f'{campo}_id', flat=True)[:MAX_POR_TRIGRAMA + 1])
+
+
+def parecidos(tipo, texto, queryset=None):
+    """
+    Lista de (parecido, id) de los objetos cuyo nombre se parece a `texto`,
+    del más al menos parecido. Con `queryset` solo se consideran sus filas.
+    """
+    consulta = trigramas(texto)
+    if not consulta:
+        return []
+    campo, modelo = FUENTES[tipo]
+    apariciones = [
+        _apariciones(campo, trigrama, queryset) for trigrama in sorted(consulta)[:MAX_TRIGRAMAS_CONSULTA]
+    ]
+    raros = [ids for ids in apariciones if len(ids) <= MAX_POR_TRIGRAMA]
+    usadas = raros or [ids[:MAX_POR_TRIGRAMA] for ids in apariciones]
+    minimo = max(1, math.ceil(len(usadas) * UMBRAL_CANDIDATO))
+
+    comunes = Counter(objeto_id for ids in usadas for objeto_id in ids)
+    ids = sorted(
+        (objeto_id for objeto_id, veces in comunes.items() if veces >= minimo),
+        key=lambda objeto_id: (-comunes[objeto_id], objeto_id),
+    )[:MAX_CANDIDATOS]
+
+    resultado = []
+    for objeto_id, nombre in modelo.objects.filter(id__in=ids).values_list('id', 'nombre'):
+        valor = parecido(consulta, trigramas(nombre))
+        if valor >= UMBRAL_PARECIDO:
+            resultado.append((valor, objeto_id))
+    resultado.sort(key=lambda par: (-par[0], par[1]))
+    return resultado
@@ -15,6 +15,15 @@ urlpatterns = [
     # Directorio público de proveedores
     path('', views.directorio_proveedores, name='directorio_proveedores'),
     
+    # Búsqueda de productos en todos los proveedores
+    path('productos/', views.buscar_productos, name='buscar_productos'),
+    
+    # Promociones vigentes de todos los proveedores
+    path('promociones/', views.promociones_vigentes, name='promociones_vigentes'),
+    
+    # Calendario de promociones de todos los proveedores (JSON)
+    path('promociones/calendario/', views.calendario_promociones, name='calendario_promociones'),
+    
     # Detalle público de un proveedor
     path('<int:proveedor_id>/', views.detalle_proveedor, name='detalle_proveedor'),
     
@@ -39,6 +48,9 @@ urlpatterns = [
     # Crear nuevo producto/servicio
     path('panel/productos/crear/', views.crear_producto, name='crear_producto'),
     
+    # Importación masiva de productos desde CSV/XLSX
+    path('panel/productos/importar/', views.importar_productos_view, name='importar_productos'),
+    
     # Editar producto/servicio
     path('panel/productos/<int:producto_id>/editar/', views.editar_producto, name='editar_producto'),
     
@@ -64,20 +76,65 @@ urlpatterns = [
     path('panel/promociones/<int:promocion_id>/eliminar/', views.eliminar_promocion, name='eliminar_promocion'),
     
     
+    # ==================== EXPORTACIÓN ====================
+    
+    # Descarga del catálogo propio (CSV/JSON en streaming)
+    path('panel/exportar/', views.exportar_catalogo, name='exportar_catalogo'),
+    
+    # Snapshot público comprimido del catálogo de un proveedor
+    path('<int:proveedor_id>/catalogo.json.gz', views.snapshot_catalogo, name='snapshot_catalogo'),
+    
+    
+    # ==================== HISTORIAL DE PRECIOS ====================
+    
+    # Serie de precios de un producto (JSON)
+    path('productos/<int:producto_id>/precios/', views.historial_precios_producto, name='historial_precios_producto'),
+    
+    # Índice de precios por categoría (JSON)
+    path('precios/indice/', views.indice_precios_categoria, name='indice_precios_categoria'),
+    
+    
+    # ==================== SINCRONIZACIÓN INCREMENTAL ====================
+    
+    # Cambios de catálogo posteriores a un cursor (JSON)
+    path('api/cambios/', views.cambios_catalogo, name='cambios_catalogo'),
+    
+    
     # ==================== SOLICITUDES DE CONTACTO ====================
     
     # Enviar solicitud de contacto a un comercio
     path('panel/solicitudes/enviar/<int:comercio_id>/', views.enviar_solicitud_contacto, name='enviar_solicitud_contacto'),
     
+    # Directorio de comercios para contactar
+    path('panel/comercios/', views.directorio_comercios, name='directorio_comercios'),
+    
+    # Directorio de comercios (JSON)
+    path('panel/comercios/api/', views.api_comercios, name='api_comercios'),
+    
     # Lista de solicitudes enviadas por el proveedor
     path('panel/solicitudes/', views.mis_solicitudes, name='mis_solicitudes'),
     
     
+    # ==================== CAMPAÑAS DE CONTACTO ====================
+    
+    # Lista de campañas del proveedor
+    path('panel/campanas/', views.lista_campanas, name='lista_campanas'),
+    
+    # Crear campaña para un segmento de comercios
+    path('panel/campanas/crear/', views.crear_campana, name='crear_campana'),
+    
+    # Cancelar campaña en curso
+    path('panel/campanas/<int:campana_id>/cancelar/', views.cancelar_campana, name='cancelar_campana'),
+    
+    
     # ==================== AJAX/API ====================
     
     # Obtener comunas de una región (para filtros dinámicos)
     path('ajax/comunas/', views.get_comunas_ajax, name='get_comunas_ajax'),
 
+    # Sugerencias del buscador del directorio (índice en memoria)
+    path('ajax/autocompletar/', views.autocompletar_view, name='autocompletar'),
+
     # ==================== CONFIGURACION ====================
     path('configuracion/', views.configuracion_proveedor, name='configuracion'),
     path('confguracion/eliminar_foto/', views.eliminar_foto_perfil, name='eliminar_foto_perfil'),
@@ -1,35 +1,78 @@
 # proveedores/views.py (CÓDIGO REVISADO, COMPLETO Y FINAL CON MANEJO DE ERRORES)
 
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Case, FloatField, Q, Value, When
 from django.core.paginator import Paginator
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from django.http import (
+    FileResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    StreamingHttpResponse,
+)
+from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date
 from django.db import transaction
 from django.views.decorators.http import require_POST, require_GET
 
 from usuarios import views as usuarios_views   # si defines current_logged_in_user aquí
-from usuarios.models import Comerciante
+from usuarios.models import Comerciante, INTERESTS_CHOICES, TIPO_NEGOCIO_CHOICES
 
 from .models import (
+    CampanaContacto,
     Proveedor,
     SolicitudContacto,
     ProductoServicio,
     Promocion,
     CategoriaProveedor,
-    Pais,
-    Region,
-    Comuna
 )
 from .forms import (
     ProveedorForm,
     ProductoServicioForm,
     PromocionForm,
     SolicitudContactoForm,
-    ConfiguracionForm
+    CampanaContactoForm,
+    ConfiguracionForm,
+    ImportarProductosForm
 )
+from .busqueda import filtrar_productos, palabras_busqueda
+from .paginacion import paginar_por_cursor
+from .importacion import importar_productos
+from .precios import PERIODOS, indice_categoria, serie_producto
+from .promociones import hoy_local, ids_vigentes, promociones_en_ventana
+from .geo import ordenar_por_distancia
+from . import autocompletar, directorio, geografia, trigramas
+from .campanas import cancelar, cupo_disponible, max_contactos_diarios, segmento
+from .comercios import buscar_comercios, datos_publicos, filtros_desde_get
+from .cambios import MAX_CAMBIOS_POR_PAGINA, cambios_desde, cursor_actual
+from .exportacion import (
+    CAMPOS_PRODUCTO,
+    CAMPOS_PROMOCION,
+    csv_stream,
+    json_stream,
+    abrir_snapshot,
+    productos_qs,
+    promociones_qs,
+)
+
+PRODUCTOS_POR_PAGINA = 24
+PROMOCIONES_POR_PAGINA = 24
+CALENDARIO_DIAS_POR_DEFECTO = 14
+CALENDARIO_MAX_DIAS = 92
+RESULTADOS_BUSQUEDA_POR_PAGINA = 24
+MAX_PROVEEDORES_SINCRONIZACION = 50
+MAX_CAMPANAS_ABIERTAS = 3
+SOLICITUDES_POR_PAGINA = 20
+RADIOS_CERCANIA_KM = (5, 10, 25, 50, 100, 250)
+RADIO_CERCANIA_POR_DEFECTO = 25
 
 
 # -----------------------
@@ -88,60 +131,123 @@ def _get_proveedor_for_user(request):
 
 # ==================== VISTAS PÚBLICAS ====================
 
+def _radio_km(valor):
+    """Radio de búsqueda por cercanía; solo se aceptan los valores ofrecidos."""
+    try:
+        radio = int(valor)
+    except (TypeError, ValueError):
+        return RADIO_CERCANIA_POR_DEFECTO
+    return radio if radio in RADIOS_CERCANIA_KM else RADIO_CERCANIA_POR_DEFECTO
+
+
+# Opciones de "Ordenar por" del directorio; 'relevancia' lee el puntaje precalculado
+ORDENES_DIRECTORIO = {
+    '': ('-destacado', '-fecha_registro'),
+    'relevancia': ('-ranking_score', '-fecha_registro'),
+    'nombre': ('nombre', 'id'),
+    'reciente': ('-fecha_registro',),
+}
+
+
 def directorio_proveedores(request):
     """
-    Vista del directorio público de proveedores con filtros
+    Vista del directorio público de proveedores con filtros, sobre las
+    fichas aplanadas de DirectorioProveedor (ver proveedor/directorio.py)
     """
-    proveedores = Proveedor.objects.filter(activo=True).select_related(
-        'pais', 'region', 'comuna'
-    ).prefetch_related('categorias')
+    fichas = directorio.fichas_activas()
 
     # Filtros desde GET
     categoria_id = request.GET.get('categoria')
     region_id = request.GET.get('region')
     comuna_id = request.GET.get('comuna')
     cobertura = request.GET.get('cobertura')
+    atiende_id = request.GET.get('atiende')
+    cerca_id = request.GET.get('cerca')
+    radio_km = _radio_km(request.GET.get('radio'))
     busqueda = request.GET.get('q')
 
-    if categoria_id:
-        proveedores = proveedores.filter(categorias__id=categoria_id)
+    if categoria_id and categoria_id.isdigit():
+        fichas = directorio.con_categoria(fichas, int(categoria_id))
 
-    if region_id:
-        proveedores = proveedores.filter(region_id=region_id)
+    if region_id and region_id.isdigit():
+        fichas = fichas.filter(region_id=region_id)
 
-    if comuna_id:
-        proveedores = proveedores.filter(comuna_id=comuna_id)
+    if comuna_id and comuna_id.isdigit():
+        fichas = fichas.filter(comuna_id=comuna_id)
 
     if cobertura:
-        proveedores = proveedores.filter(cobertura=cobertura)
-
-    if busqueda:
-        proveedores = proveedores.filter(
-            Q(nombre_empresa__icontains=busqueda) |
-            Q(descripcion__icontains=busqueda)
-        )
+        fichas = fichas.filter(cobertura=cobertura)
 
-    # Ordenar: destacados primero, luego por fecha
-    proveedores = proveedores.order_by('-destacado', '-fecha_registro')
+    # Proveedores cuya cobertura incluye la comuna, vivan donde vivan
+    if atiende_id and atiende_id.isdigit():
+        fichas = directorio.que_atienden(fichas, int(atiende_id))
 
-    # Paginación
-    paginator = Paginator(proveedores, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Texto: coincidencia directa; si no hay ninguna, nombres parecidos por trigramas
+    parecido = None
+    if busqueda:
+        por_texto = directorio.con_texto(fichas, busqueda)
+        if por_texto.exists():
+            fichas = por_texto
+        else:
+            parecido = {ficha_id: valor for valor, ficha_id in trigramas.parecidos('proveedor', busqueda, fichas)}
+            fichas = fichas.filter(id__in=list(parecido))
+
+    # Ordenar: por defecto destacados primero, luego por fecha
+    orden = request.GET.get('orden', '')
+    if orden not in ORDENES_DIRECTORIO:
+        orden = ''
+    fichas = fichas.order_by(*ORDENES_DIRECTORIO[orden])
+
+    # Cercanía: proveedores a menos de `radio` km de una comuna, del más cercano al más lejano
+    arbol = geografia.arbol()
+    origen = arbol.comuna_por_id.get(int(cerca_id)) if cerca_id and cerca_id.isdigit() else None
+    if origen and origen.latitud is None:
+        origen = None
+
+    if origen:
+        cercanos = ordenar_por_distancia(fichas, origen.latitud, origen.longitud, radio_km)
+        paginator = Paginator(cercanos, 12)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        por_id = fichas.in_bulk([ficha_id for _, ficha_id in page_obj.object_list])
+        pagina = []
+        for distancia, ficha_id in page_obj.object_list:
+            ficha = por_id.get(ficha_id)
+            if ficha:
+                ficha.distancia_km = distancia
+                pagina.append(ficha)
+        page_obj.object_list = pagina
+    elif parecido and orden in ('', 'relevancia'):
+        # Resultados aproximados: del nombre más parecido al menos parecido
+        paginator = Paginator(sorted(parecido, key=lambda i: (-parecido[i], i)), 12)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        por_id = fichas.in_bulk(page_obj.object_list)
+        page_obj.object_list = [por_id[i] for i in page_obj.object_list if i in por_id]
+    else:
+        # Paginación
+        paginator = Paginator(fichas, 12)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
 
     # Datos para filtros
     categorias = CategoriaProveedor.objects.filter(activo=True)
-    regiones = Region.objects.all()
 
     context = {
         'page_obj': page_obj,
         'categorias': categorias,
-        'regiones': regiones,
+        'regiones': arbol.regiones,
+        'comunas': arbol.comunas,
+        'atiende_seleccionada': atiende_id,
+        'cerca_seleccionada': cerca_id,
+        'radio_seleccionado': radio_km,
+        'radios': RADIOS_CERCANIA_KM,
+        'busqueda_por_cercania': origen is not None,
         'categoria_seleccionada': categoria_id,
         'region_seleccionada': region_id,
         'comuna_seleccionada': comuna_id,
         'cobertura_seleccionada': cobertura,
         'busqueda': busqueda,
+        'busqueda_aproximada': parecido is not None,
+        'orden_seleccionado': orden,
     }
 
     return render(request, 'proveedores/directorio.html', context)
@@ -171,13 +277,9 @@ def detalle_proveedor(request, proveedor_id):
         activo=True
     ).order_by('-destacado', '-fecha_creacion')
 
-    # Promociones vigentes
-    hoy = timezone.now().date()
+    # Promociones vigentes (índice precalculado)
     promociones = Promocion.objects.filter(
-        proveedor=proveedor,
-        activo=True,
-        fecha_inicio__lte=hoy,
-        fecha_fin__gte=hoy
+        id__in=ids_vigentes(proveedor.id)
     ).order_by('-fecha_inicio')
 
     context = {
@@ -189,6 +291,169 @@ def detalle_proveedor(request, proveedor_id):
     return render(request, 'proveedores/detalle.html', context)
 
 
+def _decimal_o_none(valor):
+    try:
+        return Decimal(valor) if valor not in (None, '') else None
+    except (InvalidOperation, TypeError):
+        return None
+
+
+def buscar_productos(request):
+    """
+    Búsqueda de productos en todos los proveedores activos:
+    texto, categoría, rango de precio, región y cobertura del proveedor.
+    Ordena por precio o relevancia con paginación por cursor.
+    """
+    productos = ProductoServicio.objects.filter(
+        activo=True,
+        proveedor__activo=True
+    ).select_related('proveedor', 'proveedor__comuna')
+
+    busqueda = request.GET.get('q', '').strip()
+    categoria = request.GET.get('categoria', '')
+    precio_min = _decimal_o_none(request.GET.get('precio_min'))
+    precio_max = _decimal_o_none(request.GET.get('precio_max'))
+    region_id = request.GET.get('region', '')
+    cobertura = request.GET.get('cobertura', '')
+
+    hay_texto = bool(palabras_busqueda(busqueda))
+    orden = request.GET.get('orden') or ('relevancia' if hay_texto else 'precio')
+    if orden not in ('precio', '-precio', 'relevancia'):
+        orden = 'precio'
+    if orden == 'relevancia' and not hay_texto:
+        orden = 'precio'
+
+    if categoria:
+        productos = productos.filter(categoria=categoria)
+
+    if precio_min is not None:
+        productos = productos.filter(precio_referencia__gte=precio_min)
+
+    if precio_max is not None:
+        productos = productos.filter(precio_referencia__lte=precio_max)
+
+    if region_id.isdigit():
+        productos = productos.filter(proveedor__region_id=region_id)
+
+    if cobertura:
+        productos = productos.filter(proveedor__cobertura=cobertura)
+
+    # Texto: coincidencia directa; si no hay ninguna, nombres parecidos por
+    # trigramas, con el parecido como relevancia
+    busqueda_aproximada = False
+    if hay_texto:
+        por_texto = filtrar_productos(productos, busqueda)
+        if por_texto.exists():
+            productos = por_texto
+        else:
+            busqueda_aproximada = True
+            parecidos = trigramas.parecidos('producto', busqueda, productos)
+            productos = productos.filter(id__in=[i for _, i in parecidos]).annotate(
+                relevancia=Case(
+                    *[When(id=i, then=Value(valor)) for valor, i in parecidos],
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                )
+            )
+
+    if orden == 'relevancia':
+        resultados, siguiente = paginar_por_cursor(
+            productos, 'relevancia', request.GET.get('cursor'),
+            RESULTADOS_BUSQUEDA_POR_PAGINA, descendente=True
+        )
+    else:
+        # Solo se comparan ofertas con precio referencial
+        productos = productos.filter(precio_referencia__isnull=False)
+        resultados, siguiente = paginar_por_cursor(
+            productos, 'precio_referencia', request.GET.get('cursor'),
+            RESULTADOS_BUSQUEDA_POR_PAGINA, descendente=(orden == '-precio')
+        )
+
+    context = {
+        'productos': resultados,
+        'cursor_siguiente': siguiente,
+        'busqueda': busqueda,
+        'busqueda_aproximada': busqueda_aproximada,
+        'categoria_seleccionada': categoria,
+        'precio_min': request.GET.get('precio_min', ''),
+        'precio_max': request.GET.get('precio_max', ''),
+        'region_seleccionada': region_id,
+        'cobertura_seleccionada': cobertura,
+        'orden': orden,
+        'opciones_categoria': ProductoServicio.CATEGORIA_CHOICES,
+        'opciones_cobertura': Proveedor.COBERTURA_CHOICES,
+        'regiones': geografia.arbol().regiones,
+    }
+    return render(request, 'proveedores/productos/buscar.html', context)
+
+
+def promociones_vigentes(request):
+    """
+    Todas las promociones vigentes del marketplace, las que terminan antes
+    primero. Lee del índice precalculado y solo consulta la página visible.
+    """
+    paginator = Paginator(ids_vigentes(), PROMOCIONES_POR_PAGINA)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    por_id = Promocion.objects.select_related(
+        'proveedor', 'proveedor__comuna'
+    ).in_bulk(list(page_obj.object_list))
+    promociones = [por_id[i] for i in page_obj.object_list if i in por_id]
+
+    context = {
+        'promociones': promociones,
+        'page_obj': page_obj,
+    }
+    return render(request, 'proveedores/promociones/vigentes.html', context)
+
+
+@require_GET
+def calendario_promociones(request):
+    """
+    Calendario de promociones de todo el marketplace (JSON): las que se
+    cruzan con la ventana [desde, hasta], con filtro por región o rubro
+    del proveedor. Por defecto, los próximos 14 días.
+    ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD&region=<id>&categoria=<id>
+    """
+    try:
+        desde = parse_date(request.GET.get('desde', '')) or hoy_local()
+        hasta = parse_date(request.GET.get('hasta', '')) or desde + timedelta(days=CALENDARIO_DIAS_POR_DEFECTO)
+    except ValueError:
+        return JsonResponse({'error': 'fecha inválida'}, status=400)
+    if hasta < desde:
+        return JsonResponse({'error': 'hasta debe ser posterior a desde'}, status=400)
+    if (hasta - desde).days > CALENDARIO_MAX_DIAS:
+        return JsonResponse({'error': f'la ventana no puede superar {CALENDARIO_MAX_DIAS} días'}, status=400)
+
+    region_id = request.GET.get('region', '')
+    categoria_id = request.GET.get('categoria', '')
+    promociones = promociones_en_ventana(
+        desde,
+        hasta,
+        region_id=region_id if region_id.isdigit() else None,
+        categoria_id=categoria_id if categoria_id.isdigit() else None,
+    ).values(
+        'id', 'titulo', 'fecha_inicio', 'fecha_fin', 'estado',
+        'proveedor_id', 'proveedor__nombre_empresa',
+    )
+
+    return JsonResponse({
+        'desde': desde,
+        'hasta': hasta,
+        'promociones': [
+            {
+                'id': p['id'],
+                'titulo': p['titulo'],
+                'fecha_inicio': p['fecha_inicio'],
+                'fecha_fin': p['fecha_fin'],
+                'estado': p['estado'],
+                'proveedor': {'id': p['proveedor_id'], 'nombre': p['proveedor__nombre_empresa']},
+            }
+            for p in promociones
+        ],
+    })
+
+
 # ==================== VISTAS DEL PERFIL DEL PROVEEDOR ====================
 
 @login_required
@@ -205,13 +470,7 @@ def perfil_proveedor(request):
     # Estadísticas
     total_productos = ProductoServicio.objects.filter(proveedor=proveedor).count()
 
-    hoy = timezone.now().date()
-    promociones_activas = Promocion.objects.filter(
-        proveedor=proveedor,
-        activo=True,
-        fecha_inicio__lte=hoy,
-        fecha_fin__gte=hoy
-    ).count()
+    promociones_activas = len(ids_vigentes(proveedor.id))
 
     solicitudes_pendientes = SolicitudContacto.objects.filter(
         proveedor=proveedor,
@@ -305,7 +564,12 @@ def editar_perfil_proveedor(request):
     else:
         form = ProveedorForm(instance=proveedor)
 
-    context = {'form': form, 'proveedor': proveedor}
+    context = {
+        'form': form,
+        'proveedor': proveedor,
+        'geografia_url': geografia.url_estatica(),
+        'geografia_version': geografia.arbol().version,
+    }
     return render(request, 'proveedores/editar_perfil.html', context)
 
 
@@ -337,17 +601,19 @@ def lista_productos(request):
         productos = productos.filter(activo=False)
 
     buscar_actual = request.GET.get('buscar', '')
-    if buscar_actual:
-        productos = productos.filter(
-            Q(nombre__icontains=buscar_actual) |
-            Q(descripcion__icontains=buscar_actual)
-        )
+    if palabras_busqueda(buscar_actual):
+        productos = filtrar_productos(productos, buscar_actual).order_by('-relevancia', '-id')
+    else:
+        productos = productos.order_by('-id')
 
-    productos = productos.order_by('-id')
+    # Paginación: catálogos grandes no se cargan completos
+    paginator = Paginator(productos, PRODUCTOS_POR_PAGINA)
+    page_obj = paginator.get_page(request.GET.get('page'))
 
     context = {
         'proveedor': proveedor,
-        'productos': productos,
+        'productos': page_obj,
+        'page_obj': page_obj,
         'categoria_actual': categoria_actual,
         'estado_actual': estado_actual,
         'buscar_actual': buscar_actual,
@@ -390,6 +656,44 @@ def crear_producto(request):
     return render(request, 'proveedores/productos/crear.html', context)
 
 
+@login_required
+def importar_productos_view(request):
+    """
+    Carga masiva de productos/servicios desde un archivo CSV o XLSX
+    """
+    proveedor, err = _get_proveedor_for_user(request)
+    if err:
+        messages.error(request, err)
+        return redirect('proveedores:crear_perfil_proveedor')
+
+    resultado = None
+    if request.method == 'POST':
+        form = ImportarProductosForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                resultado = importar_productos(proveedor, form.cleaned_data['archivo'])
+                messages.success(
+                    request,
+                    f'✅ Importación terminada: {resultado.creados} creados, '
+                    f'{resultado.actualizados} actualizados, {resultado.total_errores} con errores.'
+                )
+            except ValueError as e:
+                messages.error(request, f'Error al importar: {e}')
+            except Exception as e:
+                messages.error(request, f'Error inesperado al importar: {e}')
+        else:
+            messages.error(request, "Hay errores en el formulario. Revisa los campos.")
+    else:
+        form = ImportarProductosForm()
+
+    context = {
+        'form': form,
+        'proveedor': proveedor,
+        'resultado': resultado,
+    }
+    return render(request, 'proveedores/productos/importar.html', context)
+
+
 @login_required
 def editar_producto(request, producto_id):
     proveedor, err = _get_proveedor_for_user(request)
@@ -465,21 +769,12 @@ def lista_promociones(request):
         promociones = promociones.filter(activo=False)
 
     vigencia = request.GET.get('vigencia', '')
-    hoy = timezone.now().date()
-
     if vigencia == 'vigentes':
-        promociones = promociones.filter(
-            activo=True,
-            fecha_inicio__lte=hoy,
-            fecha_fin__gte=hoy
-        )
+        promociones = promociones.filter(activo=True, estado='vigente')
     elif vigencia == 'programadas':
-        promociones = promociones.filter(
-            activo=True,
-            fecha_inicio__gt=hoy
-        )
+        promociones = promociones.filter(activo=True, estado='programada')
     elif vigencia == 'vencidas':
-        promociones = promociones.filter(fecha_fin__lt=hoy)
+        promociones = promociones.filter(estado='finalizada')
 
     buscar = request.GET.get('buscar', '')
     if buscar:
@@ -593,29 +888,214 @@ def eliminar_promocion(request, promocion_id):
     return redirect('proveedores:lista_promociones')
 
 
+# ==================== EXPORTACIÓN DEL CATÁLOGO ====================
+
+@login_required
+@require_GET
+def exportar_catalogo(request):
+    """
+    Descarga del catálogo propio en CSV (productos o promociones) o JSON completo.
+    La respuesta se genera en streaming.
+    """
+    proveedor, err = _get_proveedor_for_user(request)
+    if err:
+        messages.error(request, err)
+        return redirect('proveedores:crear_perfil_proveedor')
+
+    formato = request.GET.get('formato', 'csv')
+    tipo = request.GET.get('tipo', 'productos')
+
+    if formato == 'json':
+        response = StreamingHttpResponse(
+            json_stream(proveedor), content_type='application/json; charset=utf-8'
+        )
+        nombre_archivo = f'catalogo_{proveedor.id}.json'
+    elif formato == 'csv' and tipo in ('productos', 'promociones'):
+        if tipo == 'productos':
+            filas = csv_stream(productos_qs(proveedor), CAMPOS_PRODUCTO)
+        else:
+            filas = csv_stream(promociones_qs(proveedor), CAMPOS_PROMOCION)
+        response = StreamingHttpResponse(filas, content_type='text/csv; charset=utf-8')
+        nombre_archivo = f'{tipo}_{proveedor.id}.csv'
+    else:
+        return HttpResponseBadRequest('Formato de exportación no válido.')
+
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+
+@require_GET
+def snapshot_catalogo(request, proveedor_id):
+    """
+    Snapshot público (gzip) del catálogo vigente de un proveedor, para uso offline.
+    Se regenera solo cuando el catálogo cambia.
+    """
+    proveedor = get_object_or_404(
+        Proveedor.objects.select_related('region', 'comuna'),
+        id=proveedor_id,
+        activo=True
+    )
+
+    archivo, version = abrir_snapshot(proveedor)
+    etag = f'"{proveedor.id}-{version}"'
+    if request.headers.get('If-None-Match') == etag:
+        archivo.close()
+        return HttpResponseNotModified()
+
+    response = FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f'catalogo_{proveedor.id}.json.gz',
+        content_type='application/gzip',
+    )
+    response['ETag'] = etag
+    # Punto de partida para seguir sincronizando con api/cambios/
+    response['X-Cursor-Cambios'] = cursor_actual(proveedor.id)
+    return response
+
+
+# ==================== HISTORIAL DE PRECIOS ====================
+
+def _rango_fechas(request):
+    """Lee ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD (ambos opcionales, días completos)."""
+    try:
+        desde = parse_date(request.GET.get('desde', ''))
+        hasta = parse_date(request.GET.get('hasta', ''))
+    except ValueError:
+        return None, None
+    if desde:
+        desde = timezone.make_aware(datetime.combine(desde, time.min))
+    if hasta:
+        hasta = timezone.make_aware(datetime.combine(hasta, time.max))
+    return desde, hasta
+
+
+@require_GET
+def historial_precios_producto(request, producto_id):
+    """
+    Serie de precios de un producto activo (JSON).
+    """
+    producto = get_object_or_404(
+        ProductoServicio,
+        id=producto_id,
+        activo=True,
+        proveedor__activo=True
+    )
+    desde, hasta = _rango_fechas(request)
+    serie = serie_producto(producto.id, desde=desde, hasta=hasta)
+    return JsonResponse({
+        'producto': producto.id,
+        'nombre': producto.nombre,
+        'precios': [
+            {'fecha': fecha.isoformat(), 'precio': str(precio)}
+            for fecha, precio in serie
+        ],
+    })
+
+
+@require_GET
+def indice_precios_categoria(request):
+    """
+    Índice de precios por categoría (base 100), opcionalmente de un solo proveedor.
+    ?categoria=ALIMENTOS&periodo=dia|semana|mes&desde=...&hasta=...&proveedor=<id>
+    """
+    categoria = request.GET.get('categoria', '')
+    if categoria not in dict(ProductoServicio.CATEGORIA_CHOICES):
+        return JsonResponse({'error': 'categoria inválida'}, status=400)
+
+    periodo = request.GET.get('periodo', 'mes')
+    if periodo not in PERIODOS:
+        periodo = 'mes'
+
+    proveedor_id = request.GET.get('proveedor', '')
+    proveedor = None
+    if proveedor_id.isdigit():
+        proveedor = get_object_or_404(Proveedor, id=proveedor_id, activo=True)
+
+    desde, hasta = _rango_fechas(request)
+    serie = indice_categoria(
+        categoria,
+        periodo=periodo,
+        desde=desde,
+        hasta=hasta,
+        proveedor=proveedor,
+    )
+    return JsonResponse({
+        'categoria': categoria,
+        'periodo': periodo,
+        'indice': [
+            {'periodo': punto['periodo'].isoformat(), 'indice': punto['indice'], 'productos': punto['productos']}
+            for punto in serie
+        ],
+    })
+
+
+# ==================== SINCRONIZACIÓN INCREMENTAL ====================
+
+@require_GET
+def cambios_catalogo(request):
+    """
+    Cambios de catálogo posteriores a un cursor (JSON).
+    ?proveedor=1&proveedor=2&since=<cursor>&limite=500
+
+    Sin `since` se entrega el registro desde el principio. Lo habitual es
+    partir del snapshot del catálogo (header X-Cursor-Cambios) y luego enviar
+    siempre el `cursor` de la última respuesta.
+    """
+    ids = []
+    for valor in request.GET.getlist('proveedor'):
+        ids.extend(v for v in valor.split(',') if v.strip().isdigit())
+    if not ids:
+        return JsonResponse({'error': 'proveedor requerido'}, status=400)
+    if len(ids) > MAX_PROVEEDORES_SINCRONIZACION:
+        return JsonResponse(
+            {'error': f'máximo {MAX_PROVEEDORES_SINCRONIZACION} proveedores por llamada'},
+            status=400
+        )
+
+    proveedor_ids = list(
+        Proveedor.objects.filter(id__in=ids, activo=True).values_list('id', flat=True)
+    )
+
+    limite = request.GET.get('limite', '')
+    limite = min(int(limite), MAX_CAMBIOS_POR_PAGINA) if limite.isdigit() and int(limite) > 0 else MAX_CAMBIOS_POR_PAGINA
+
+    cambios, cursor, hay_mas = cambios_desde(proveedor_ids, request.GET.get('since'), limite)
+    return JsonResponse({
+        'proveedores': proveedor_ids,
+        'cambios': cambios,
+        'cursor': cursor,
+        'hay_mas': hay_mas,
+    })
+
+
 # ==================== SOLICITUDES DE CONTACTO ====================
 
 @login_required
 def enviar_solicitud_contacto(request, comercio_id=None):
     """
     Enviar solicitud de contacto a un comercio.
-    comercio_id es opcional en caso de que aún no tengas el modelo Comercio.
+    comercio_id es opcional: sin él la solicitud queda sin destinatario.
     """
     proveedor, err = _get_proveedor_for_user(request)
     if err:
         messages.error(request, err)
         return redirect('proveedores:crear_perfil_proveedor')
 
+    comercio = None
+    if comercio_id:
+        comercio = get_object_or_404(Comerciante, id=comercio_id, rol='COMERCIANTE')
+
     if request.method == 'POST':
         form = SolicitudContactoForm(request.POST)
         if form.is_valid():
             try:
                 solicitud = form.save(commit=False)
                 solicitud.proveedor = proveedor
-                # si tienes comercio, asignarlo aquí: solicitud.comercio = comercio
-                solicitud.save()
-                proveedor.contactos_enviados = getattr(proveedor, 'contactos_enviados', 0) + 1
-                proveedor.save(update_fields=['contactos_enviados'])
+                solicitud.comercio = comercio
+                with transaction.atomic():
+                    solicitud.save()
+                    proveedor.sumar_contactos(enviados=1)
                 messages.success(request, 'Solicitud de contacto enviada exitosamente.')
                 return redirect('proveedores:mis_solicitudes')
             except Exception as e:
@@ -627,11 +1107,65 @@ def enviar_solicitud_contacto(request, comercio_id=None):
 
     context = {
         'form': form,
-        'proveedor': proveedor
+        'proveedor': proveedor,
+        'comercio': comercio,
     }
     return render(request, 'proveedores/solicitudes/enviar.html', context)
 
 
+@login_required
+def directorio_comercios(request):
+    """
+    Directorio de comercios para que el proveedor encuentre a quién
+    contactar: filtros por comuna, región, tipo de negocio e intereses.
+    """
+    proveedor, err = _get_proveedor_for_user(request)
+    if err:
+        messages.error(request, err)
+        return redirect('proveedores:crear_perfil_proveedor')
+
+    filtros = filtros_desde_get(request.GET)
+    comercios, siguiente = buscar_comercios(
+        filtros, request.GET.get('cursor'), excluir=proveedor.usuario_id
+    )
+    etiquetas = dict(INTERESTS_CHOICES)
+    for comercio in comercios:
+        comercio.etiquetas_intereses = [etiquetas.get(c, c) for c in comercio.codigos_intereses()]
+
+    context = {
+        'comercios': comercios,
+        'cursor_siguiente': siguiente,
+        'comuna_seleccionada': filtros['comuna'],
+        'region_seleccionada': filtros['region'],
+        'regiones': geografia.arbol().regiones,
+        'tipo_seleccionado': filtros['tipo_negocio'],
+        'intereses_seleccionados': filtros['intereses'],
+        'opciones_tipo': TIPO_NEGOCIO_CHOICES,
+        'opciones_intereses': INTERESTS_CHOICES,
+    }
+    return render(request, 'proveedores/solicitudes/comercios.html', context)
+
+
+@login_required
+@require_GET
+def api_comercios(request):
+    """
+    Misma búsqueda que directorio_comercios, en JSON.
+    ?comuna=..&region=..&tipo_negocio=..&intereses=A&intereses=B&cursor=..
+    """
+    proveedor, err = _get_proveedor_for_user(request)
+    if err:
+        return JsonResponse({'error': err}, status=403)
+
+    comercios, siguiente = buscar_comercios(
+        filtros_desde_get(request.GET), request.GET.get('cursor'), excluir=proveedor.usuario_id
+    )
+    return JsonResponse({
+        'comercios': [datos_publicos(c) for c in comercios],
+        'cursor': siguiente,
+    })
+
+
 @login_required
 def mis_solicitudes(request):
     proveedor, err = _get_proveedor_for_user(request)
@@ -641,36 +1175,138 @@ def mis_solicitudes(request):
 
     solicitudes = SolicitudContacto.objects.filter(
         proveedor=proveedor
-    ).order_by('-fecha_solicitud')
+    ).select_related('comercio', 'campana').order_by('-fecha_solicitud', '-id')
 
     estado = request.GET.get('estado')
     if estado:
         solicitudes = solicitudes.filter(estado=estado)
 
+    # Paginación: una campaña puede sumar miles de solicitudes
+    paginator = Paginator(solicitudes, SOLICITUDES_POR_PAGINA)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
     context = {
-        'solicitudes': solicitudes,
+        'solicitudes': page_obj,
+        'page_obj': page_obj,
         'estado_seleccionado': estado
     }
     return render(request, 'proveedores/solicitudes/mis_solicitudes.html', context)
 
 
+# ==================== CAMPAÑAS DE CONTACTO ====================
+
+@login_required
+def lista_campanas(request):
+    proveedor, err = _get_proveedor_for_user(request)
+    if err:
+        messages.error(request, err)
+        return redirect('proveedores:crear_perfil_proveedor')
+
+    context = {
+        'campanas': proveedor.campanas.select_related('region'),
+        'cupo_disponible': cupo_disponible(proveedor.id),
+        'cupo_diario': max_contactos_diarios(),
+    }
+    return render(request, 'proveedores/campanas/lista.html', context)
+
+
+@login_required
+def crear_campana(request):
+    """
+    Crea la campaña y deja el envío al comando `procesar_campanas`; aquí
+    solo se cuenta el tamaño del segmento (una consulta COUNT).
+    """
+    proveedor, err = _get_proveedor_for_user(request)
+    if err:
+        messages.error(request, err)
+        return redirect('proveedores:crear_perfil_proveedor')
+
+    abiertas = proveedor.campanas.filter(estado__in=['pendiente', 'en_proceso']).count()
+
+    if request.method == 'POST':
+        form = CampanaContactoForm(request.POST)
+        if abiertas >= MAX_CAMPANAS_ABIERTAS:
+            messages.error(request, f'Puedes tener como máximo {MAX_CAMPANAS_ABIERTAS} campañas en curso.')
+        elif form.is_valid():
+            campana = form.save(commit=False)
+            campana.proveedor = proveedor
+            campana.total_objetivo = segmento(campana, proveedor.usuario_id).count()
+            campana.save()
+            messages.success(
+                request,
+                f'Campaña creada para {campana.total_objetivo} comercios. '
+                'Las solicitudes se enviarán por lotes en los próximos minutos.'
+            )
+            return redirect('proveedores:lista_campanas')
+        else:
+            messages.error(request, "Hay errores en el formulario. Revisa los campos.")
+    else:
+        form = CampanaContactoForm(initial=filtros_desde_get(request.GET))
+
+    context = {
+        'form': form,
+        'abiertas': abiertas,
+        'max_abiertas': MAX_CAMPANAS_ABIERTAS,
+        'cupo_diario': max_contactos_diarios(),
+    }
+    return render(request, 'proveedores/campanas/crear.html', context)
+
+
+@login_required
+@require_POST
+def cancelar_campana(request, campana_id):
+    proveedor, err = _get_proveedor_for_user(request)
+    if err:
+        messages.error(request, err)
+        return redirect('proveedores:crear_perfil_proveedor')
+
+    campana = get_object_or_404(CampanaContacto, id=campana_id, proveedor=proveedor)
+    if cancelar(campana):
+        messages.success(request, f'Campaña "{campana.nombre}" cancelada.')
+    else:
+        messages.info(request, 'La campaña ya había terminado.')
+    return redirect('proveedores:lista_campanas')
+
+
 # ==================== VISTAS AJAX ====================
 
 @require_GET
 def get_comunas_ajax(request):
     """
     Obtener comunas de una región (para filtros dinámicos).
-    No requiere login si lo quieres público; si lo quieres privado, añade @login_required.
+    Sale del árbol en memoria, con ETag por versión. Si el cliente pide la
+    versión vigente (?v=) la respuesta no cambia nunca y se cachea un año.
     """
     region_id = request.GET.get('region_id')
-    if not region_id:
+    if not region_id or not region_id.isdigit():
         return JsonResponse({'error': 'region_id requerido'}, status=400)
 
-    try:
-        comunas = Comuna.objects.filter(region_id=region_id).values('id', 'nombre')
-        return JsonResponse(list(comunas), safe=False)
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    arbol = geografia.arbol()
+    etag = f'"{arbol.version}-{region_id}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        comunas = [{'id': c.id, 'nombre': c.nombre} for c in geografia.comunas_de(int(region_id))]
+        response = JsonResponse(comunas, safe=False)
+
+    response['ETag'] = etag
+    if request.GET.get('v') == arbol.version:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.GEOGRAFIA_MAX_AGE)
+    return response
+
+
+@require_GET
+def autocompletar_view(request):
+    """
+    Sugerencias para el buscador del directorio (proveedores, categorías y
+    productos) desde el índice de prefijos en memoria; no consulta la base.
+    """
+    sugerencias = autocompletar.sugerencias(request.GET.get('q', ''))
+    response = JsonResponse({'sugerencias': sugerencias})
+    patch_cache_control(response, private=True, max_age=60)
+    return response
 
 
 @login_required
@@ -743,9 +1379,7 @@ def eliminar_foto_perfil(request):
 
     try:
         if proveedor.foto_perfil:
-            # delete() del FileField/BLOB; save=True/False depende de tu versión, usar solo delete() es más seguro
-            proveedor.foto_perfil.delete(save=False)
-            # Si quieres limpiar el campo en el modelo:
+            # Al guardar sin foto la señal de proyect libera el archivo anterior
             proveedor.foto_perfil = None
             proveedor.save(update_fields=['foto_perfil'])
             messages.success(request, '✓ Foto de perfil eliminada.')
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ProyectConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'proyect'
+
+    def ready(self):
+        from . import signals
+        signals.conectar()
@@ -0,0 +1,181 @@
+"""
+Recolector de archivos huérfanos en MEDIA_ROOT.
+
+    python manage.py limpiar_media              # solo reporta
+    python manage.py limpiar_media --eliminar   # borra los huérfanos
+
+El árbol se recorre con os.scandir como generador, así que la memoria solo
+depende de la cantidad de rutas referenciadas en la base de datos, no de la
+cantidad de archivos en disco. Un blob de cas/ que ningún registro nombra
+es huérfano aunque su fila de ArchivoMedia diga que tiene referencias (el
+contador pudo quedar alto por borrados que no lo liberaron); solo se
+conserva si su fila cambió hace poco, porque un blob deduplicado mantiene su
+mtime viejo aunque se acabe de volver a subir. Al eliminarlo se borra
+también su fila. MEDIA_ROOT/.tmp no se recorre.
+"""
+import os
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+
+from proyect.models import ArchivoMedia
+from proyect.signals import CAMPOS_URL_MEDIA
+from proyect.storage import DIRECTORIO_TMP, es_inmutable, nombre_desde_url
+
+
+class Command(BaseCommand):
+    help = 'Reporta o elimina archivos de MEDIA_ROOT que ningún registro referencia.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--eliminar',
+            action='store_true',
+            help='Eliminar los archivos huérfanos (por defecto solo se reportan).',
+        )
+        parser.add_argument(
+            '--antiguedad-minima',
+            type=int,
+            default=24,
+            help='Ignorar archivos modificados hace menos de N horas (subidas en curso).',
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=2000,
+            help='Tamaño de lote para las consultas a la base de datos.',
+        )
+
+    def handle(self, *args, **options):
+        raiz = os.path.abspath(settings.MEDIA_ROOT)
+        eliminar = options['eliminar']
+        limite = time.time() - options['antiguedad_minima'] * 3600
+        desde = timezone.now() - timedelta(hours=options['antiguedad_minima'])
+
+        referenciados = self._rutas_referenciadas(options['chunk'])
+        self.stdout.write(f'{len(referenciados)} rutas referenciadas en la base de datos.')
+
+        revisados = huerfanos = bytes_huerfanos = 0
+        blobs = {}
+
+        for entrada in self._recorrer(raiz):
+            revisados += 1
+            relativa = os.path.relpath(entrada.path, raiz).replace(os.sep, '/')
+            if relativa in referenciados:
+                continue
+
+            stat = entrada.stat(follow_symlinks=False)
+            if stat.st_mtime > limite:
+                continue
+
+            if es_inmutable(relativa):
+                # Un blob deduplicado conserva su mtime viejo aunque se acabe
+                # de volver a subir: se decide por su fila, en lotes
+                blobs[relativa] = (entrada.path, stat.st_size)
+                if len(blobs) >= options['chunk']:
+                    cantidad, tamano = self._procesar_blobs(blobs, desde, eliminar)
+                    huerfanos += cantidad
+                    bytes_huerfanos += tamano
+                    blobs = {}
+                continue
+
+            huerfanos += 1
+            bytes_huerfanos += stat.st_size
+            if eliminar:
+                os.remove(entrada.path)
+            else:
+                self.stdout.write(relativa)
+
+        if blobs:
+            cantidad, tamano = self._procesar_blobs(blobs, desde, eliminar)
+            huerfanos += cantidad
+            bytes_huerfanos += tamano
+
+        accion = 'eliminados' if eliminar else 'encontrados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{revisados} archivos revisados, {huerfanos} huérfanos {accion} '
+            f'({bytes_huerfanos / (1024 * 1024):.1f} MB).'
+        ))
+
+    def _procesar_blobs(self, blobs, desde, eliminar):
+        """
+        Reporta o borra los blobs de un lote, que ningún registro nombra. Con
+        las filas bloqueadas se salta los que tienen un cambio reciente (una
+        subida que aún no guarda su registro); los demás se borran con su
+        fila, sin importar el contador. Devuelve (cantidad, bytes).
+        """
+        cantidad = tamano = 0
+        with transaction.atomic():
+            filas = {
+                a.nombre: a for a in
+                ArchivoMedia.objects.select_for_update().filter(nombre__in=list(blobs))
+            }
+            olvidar = []
+            for nombre, (ruta, bytes_blob) in blobs.items():
+                archivo = filas.get(nombre)
+                if archivo is not None and archivo.fecha_actualizacion > desde:
+                    continue
+                cantidad += 1
+                tamano += bytes_blob
+                if not eliminar:
+                    self.stdout.write(nombre)
+                    continue
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+                if archivo is not None:
+                    olvidar.append(nombre)
+            if olvidar:
+                ArchivoMedia.objects.filter(nombre__in=olvidar).delete()
+        return cantidad, tamano
+
+    def _recorrer(self, directorio):
+        """Genera los archivos bajo `directorio` sin cargar el árbol completo."""
+        directorio_tmp = os.path.join(directorio, DIRECTORIO_TMP)
+        pendientes = [directorio]
+        while pendientes:
+            actual = pendientes.pop()
+            try:
+                with os.scandir(actual) as entradas:
+                    for entrada in entradas:
+                        if entrada.is_dir(follow_symlinks=False):
+                            # Temporales de subidas en curso del storage
+                            if entrada.path != directorio_tmp:
+                                pendientes.append(entrada.path)
+                        elif entrada.is_file(follow_symlinks=False):
+                            yield entrada
+            except FileNotFoundError:
+                continue
+
+    def _rutas_referenciadas(self, chunk):
+        referenciados = set()
+
+        for modelo in apps.get_models():
+            for campo in modelo._meta.concrete_fields:
+                if not isinstance(campo, models.FileField):
+                    continue
+                valores = (
+                    modelo._base_manager
+                    .exclude(**{f'{campo.attname}__isnull': True})
+                    .exclude(**{campo.attname: ''})
+                    .values_list(campo.attname, flat=True)
+                    .iterator(chunk_size=chunk)
+                )
+                referenciados.update(valores)
+
+        for app_label, nombre_modelo, campo in CAMPOS_URL_MEDIA:
+            modelo = apps.get_model(app_label, nombre_modelo)
+            valores = (
+                modelo._base_manager
+                .filter(**{f'{campo}__contains': settings.MEDIA_URL})
+                .values_list(campo, flat=True)
+                .iterator(chunk_size=chunk)
+            )
+            referenciados.update(n for n in map(nombre_desde_url, valores) if n)
+
+        return referenciados
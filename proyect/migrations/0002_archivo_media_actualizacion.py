@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyect', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivomedia',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
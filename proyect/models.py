@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class ArchivoMedia(models.Model):
+    """
+    Blob almacenado por ContentAddressedStorage.
+    El nombre es el digest del contenido, así que un mismo archivo subido
+    varias veces se guarda una sola vez y solo aumenta `referencias`.
+    """
+    nombre = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    tamano = models.BigIntegerField(default=0)
+    referencias = models.PositiveIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Último cambio de `referencias` (limpiar_media respeta los recientes)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'archivo_media'
+        verbose_name = 'Archivo Media'
+        verbose_name_plural = 'Archivos Media'
+
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias})"
@@ -149,6 +149,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Los archivos subidos se guardan por digest (media/cas/..) y se deduplican
+STORAGES = {
+    'default': {
+        'BACKEND': 'proyect.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Cache-Control para blobs inmutables (1 año). En producción el servidor web
+# debe aplicar la misma cabecera a /media/cas/
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Snapshots gzip de catálogos de proveedores (no se sirven como media)
+CATALOGO_SNAPSHOTS_ROOT = os.path.join(BASE_DIR, 'var', 'snapshots')
+
+# Zona horaria en la que cambia el día para la vigencia de las promociones
+PROMOCIONES_ZONA_HORARIA = 'America/Santiago'
+
+# Segundos que cada proceso reutiliza el índice de promociones vigentes (sin
+# CACHES compartido, la señal que lo invalida solo llega a un proceso)
+PROMOCIONES_CACHE_TTL = 60
+
+# Campañas de contacto: máximo de solicitudes por proveedor en 24 horas y
+# tamaño del lote que procesa cada pasada de `procesar_campanas`
+CAMPANAS_MAX_CONTACTOS_DIARIOS = 500
+CAMPANAS_TAMANO_LOTE = 200
+
+# Cantidad de proveedores recomendados que se guardan por comerciante
+RECOMENDACIONES_TOP = 6
+
+# Árbol País > Región > Comuna en memoria: segundos antes de que cada proceso
+# lo recargue (la señal solo invalida el proceso donde se guardó), max-age de
+# la vista AJAX de comunas y carpeta del JSON versionado de `exportar_geografia`
+GEOGRAFIA_TTL = 300
+GEOGRAFIA_MAX_AGE = 60 * 60
+GEOGRAFIA_STATIC_ROOT = os.path.join(BASE_DIR, 'static', 'geografia')
+
+# Índice de autocompletado en memoria: segundos antes de que cada proceso lo
+# recargue (las señales solo lo corrigen en el proceso donde se guardó)
+AUTOCOMPLETAR_TTL = 300
+
 # Ruta de la imagen de perfil por defecto (debe existir en usuarios/static/img/)
 DEFAULT_PROFILE_IMAGE = 'usuarios/img/default_profile.png'
 
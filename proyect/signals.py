@@ -0,0 +1,106 @@
+"""
+Liberación de referencias de ContentAddressedStorage.
+
+Subir un archivo suma una referencia a su blob; estas señales la restan
+cuando el registro que lo nombra deja de hacerlo:
+- post_delete: el registro se borró (también en cascada),
+- pre_save: el archivo se reemplazó por otro o se quitó. Una subida nueva
+  suma su propia referencia al guardarse, así que la anterior se libera
+  aunque el contenido sea el mismo.
+
+La liberación corre tras el commit: si la transacción se revierte el
+registro sigue nombrando el archivo y el contador no cambia. Se conectan
+para cada FileField que usa el storage y para los campos de texto con URLs
+de media de CAMPOS_URL_MEDIA.
+"""
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models.signals import post_delete, pre_save
+
+from .storage import ContentAddressedStorage, nombre_desde_url
+
+# Campos de texto que guardan URLs de media en vez de un FileField
+CAMPOS_URL_MEDIA = [
+    ('usuarios', 'Post', 'imagen_url'),
+]
+
+
+def campos_archivo(modelo):
+    return [
+        campo for campo in modelo._meta.concrete_fields
+        if isinstance(campo, models.FileField) and isinstance(campo.storage, ContentAddressedStorage)
+    ]
+
+
+def _liberar(storage, nombres):
+    nombres = [n for n in nombres if n]
+    if not nombres:
+        return
+
+    def liberar():
+        for nombre in nombres:
+            storage.delete(nombre)
+
+    transaction.on_commit(liberar)
+
+
+def _archivos_borrados(sender, instance, **kwargs):
+    for campo in campos_archivo(sender):
+        _liberar(campo.storage, [getattr(instance, campo.attname).name])
+
+
+def _archivos_reemplazados(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None:
+        return
+    campos = [
+        c for c in campos_archivo(sender)
+        if update_fields is None or c.name in update_fields
+    ]
+    if not campos:
+        return
+    anteriores = sender._base_manager.filter(pk=instance.pk).values(*[c.attname for c in campos]).first()
+    if anteriores is None:
+        return
+    for campo in campos:
+        anterior = anteriores[campo.attname]
+        archivo = getattr(instance, campo.attname)
+        if anterior and (not archivo._committed or archivo.name != anterior):
+            _liberar(campo.storage, [anterior])
+
+
+def _url_borrada(campo, storage):
+    def receptor(sender, instance, **kwargs):
+        _liberar(storage, [nombre_desde_url(getattr(instance, campo))])
+    return receptor
+
+
+def _url_reemplazada(campo, storage):
+    def receptor(sender, instance, raw=False, update_fields=None, **kwargs):
+        if raw or instance.pk is None or (update_fields is not None and campo not in update_fields):
+            return
+        anterior = sender._base_manager.filter(pk=instance.pk).values_list(campo, flat=True).first()
+        if anterior and anterior != getattr(instance, campo):
+            _liberar(storage, [nombre_desde_url(anterior)])
+    return receptor
+
+
+def conectar():
+    from django.core.files.storage import default_storage
+
+    for modelo in apps.get_models():
+        if campos_archivo(modelo):
+            etiqueta = modelo._meta.label
+            post_delete.connect(_archivos_borrados, sender=modelo, dispatch_uid=f'media_borrada_{etiqueta}')
+            pre_save.connect(_archivos_reemplazados, sender=modelo, dispatch_uid=f'media_reemplazada_{etiqueta}')
+
+    if not isinstance(default_storage, ContentAddressedStorage):
+        return
+    for app_label, nombre_modelo, campo in CAMPOS_URL_MEDIA:
+        modelo = apps.get_model(app_label, nombre_modelo)
+        uid = f'{modelo._meta.label}.{campo}'
+        post_delete.connect(
+            _url_borrada(campo, default_storage), sender=modelo, weak=False, dispatch_uid=f'url_borrada_{uid}'
+        )
+        pre_save.connect(
+            _url_reemplazada(campo, default_storage), sender=modelo, weak=False, dispatch_uid=f'url_reemplazada_{uid}'
+        )
@@ -0,0 +1,151 @@
+"""
+Storage de media direccionado por contenido.
+
+Cada archivo subido se guarda como `cas/<aa>/<sha256><ext>`: el stream se
+hashea mientras se escribe a un temporal (una sola pasada) y, si el blob ya
+existía, el temporal se descarta y solo se incrementa el contador de
+referencias. Como el nombre depende del contenido, la URL nunca cambia de
+significado y se puede servir con cache de largo plazo.
+
+El contador y el blob se tocan siempre con la fila de ArchivoMedia bloqueada
+(select_for_update): al guardar se bloquea antes de decidir si el blob ya
+existe, y el blob sin referencias se borra recién tras el commit, volviendo a
+bloquear y comprobando que nadie lo haya vuelto a subir entretanto.
+
+Las referencias se liberan desde las señales de proyect/signals.py: al borrar
+un registro con archivos y al reemplazar o quitar uno de sus archivos.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+PREFIJO_CAS = 'cas'
+DIRECTORIO_TMP = '.tmp'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre final lo decide el digest; nunca agregar sufijos aleatorios
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        directorio_tmp = self.path(DIRECTORIO_TMP)
+        os.makedirs(directorio_tmp, exist_ok=True)
+
+        fd, ruta_tmp = tempfile.mkstemp(dir=directorio_tmp)
+        hasher = hashlib.sha256()
+        tamano = 0
+        try:
+            with os.fdopen(fd, 'wb') as destino:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    destino.write(chunk)
+                    tamano += len(chunk)
+
+            digest = hasher.hexdigest()
+            nombre = posixpath.join(PREFIJO_CAS, digest[:2], digest + extension)
+            with transaction.atomic():
+                self._sumar_referencia(nombre, digest, tamano)
+                self._colocar_blob(ruta_tmp, self.path(nombre))
+        except Exception:
+            if os.path.exists(ruta_tmp):
+                os.remove(ruta_tmp)
+            raise
+        return nombre
+
+    def _colocar_blob(self, ruta_tmp, ruta_final):
+        """Mueve el temporal a su ruta final, o lo descarta si el blob ya existe."""
+        if os.path.exists(ruta_final):
+            os.remove(ruta_tmp)
+            return
+        os.makedirs(os.path.dirname(ruta_final), exist_ok=True)
+        os.replace(ruta_tmp, ruta_final)
+        if self.file_permissions_mode is not None:
+            os.chmod(ruta_final, self.file_permissions_mode)
+
+    def delete(self, name):
+        """Libera una referencia; el blob se borra cuando ya nadie lo usa."""
+        if not name:
+            return
+        if not name.startswith(PREFIJO_CAS + '/'):
+            # Archivos anteriores al storage direccionado por contenido
+            return super().delete(name)
+
+        from proyect.models import ArchivoMedia
+
+        with transaction.atomic():
+            archivo = ArchivoMedia.objects.select_for_update().filter(nombre=name).first()
+            if archivo is None:
+                return
+            if archivo.referencias > 1:
+                ArchivoMedia.objects.filter(pk=archivo.pk).update(
+                    referencias=F('referencias') - 1, fecha_actualizacion=timezone.now()
+                )
+                return
+            archivo.delete()
+            transaction.on_commit(lambda: self.borrar_blob_sin_referencias(name))
+
+    def borrar_blob_sin_referencias(self, name):
+        """
+        Borra el blob si no tiene fila en ArchivoMedia. El bloqueo impide que
+        un _save concurrente cuente con el blob mientras se borra; si alguien
+        lo volvió a subir, la fila existe y el blob se conserva.
+        """
+        from proyect.models import ArchivoMedia
+
+        with transaction.atomic():
+            if ArchivoMedia.objects.select_for_update().filter(nombre=name).exists():
+                return False
+            super().delete(name)
+        return True
+
+    def _sumar_referencia(self, nombre, digest, tamano):
+        """Suma una referencia con la fila bloqueada hasta el final de la transacción."""
+        from proyect.models import ArchivoMedia
+
+        if ArchivoMedia.objects.select_for_update().filter(nombre=nombre).exists():
+            ArchivoMedia.objects.filter(nombre=nombre).update(
+                referencias=F('referencias') + 1, fecha_actualizacion=timezone.now()
+            )
+            return
+        try:
+            with transaction.atomic():
+                ArchivoMedia.objects.create(
+                    nombre=nombre, digest=digest, tamano=tamano, referencias=1
+                )
+        except IntegrityError:
+            # Otra subida concurrente creó la fila primero
+            ArchivoMedia.objects.filter(nombre=nombre).update(
+                referencias=F('referencias') + 1, fecha_actualizacion=timezone.now()
+            )
+
+
+def nombre_desde_url(url):
+    """Nombre en el storage de una URL de MEDIA_URL, o None si apunta a otro lado."""
+    for prefijo in ('/' + settings.MEDIA_URL.lstrip('/'), settings.MEDIA_URL):
+        posicion = (url or '').find(prefijo)
+        if posicion != -1:
+            return unquote(url[posicion + len(prefijo):])
+    return None
+
+
+def es_inmutable(name):
+    """True si `name` es un blob direccionado por contenido (URL inmutable)."""
+    return name.startswith(PREFIJO_CAS + '/')
+
+
+def cache_control_inmutable():
+    max_age = getattr(settings, 'MEDIA_CACHE_MAX_AGE', 60 * 60 * 24 * 365)
+    return f'public, max-age={max_age}, immutable'
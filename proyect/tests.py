@@ -0,0 +1,206 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from proveedor.models import ProductoServicio, Proveedor
+from proyect.models import ArchivoMedia
+from proyect.storage import ContentAddressedStorage
+from usuarios.models import Comerciante
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.raiz, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.raiz)
+
+    def test_mismo_contenido_se_guarda_una_vez(self):
+        primero = self.storage.save('a.txt', ContentFile(b'hola'))
+        segundo = self.storage.save('otro/b.TXT', ContentFile(b'hola'))
+
+        self.assertEqual(primero, segundo)
+        self.assertTrue(primero.startswith('cas/'))
+        self.assertEqual(ArchivoMedia.objects.get(nombre=primero).referencias, 2)
+        self.assertEqual(os.listdir(os.path.join(self.raiz, '.tmp')), [])
+
+    def test_delete_borra_el_blob_con_la_ultima_referencia(self):
+        nombre = self.storage.save('a.txt', ContentFile(b'hola'))
+        self.storage.save('b.txt', ContentFile(b'hola'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(nombre)
+        self.assertTrue(self.storage.exists(nombre))
+        self.assertEqual(ArchivoMedia.objects.get(nombre=nombre).referencias, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(nombre)
+        self.assertFalse(self.storage.exists(nombre))
+        self.assertFalse(ArchivoMedia.objects.filter(nombre=nombre).exists())
+
+    def test_blob_resubido_antes_del_commit_no_se_borra(self):
+        nombre = self.storage.save('a.txt', ContentFile(b'hola'))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.storage.delete(nombre)
+            # Otra subida del mismo contenido antes de que corra el borrado
+            self.storage.save('b.txt', ContentFile(b'hola'))
+        for callback in callbacks:
+            callback()
+
+        self.assertTrue(self.storage.exists(nombre))
+        self.assertEqual(ArchivoMedia.objects.get(nombre=nombre).referencias, 1)
+
+
+class LiberarReferenciasTests(TestCase):
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.raiz, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.raiz)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        comerciante = Comerciante.objects.create(
+            nombre_apellido='Proveedor', email='prov@ejemplo.cl', password_hash='x',
+            relacion_negocio='DUEÑO', tipo_negocio='ALMACEN', comuna='Santiago',
+        )
+        self.proveedor = Proveedor.objects.create(
+            usuario=comerciante, nombre_empresa='Distribuidora', descripcion='Abarrotes',
+            whatsapp='+56912345678', email='prov@ejemplo.cl',
+        )
+
+    def crear_producto(self, contenido):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProductoServicio.objects.create(
+                proveedor=self.proveedor, nombre='Leche', descripcion='Caja',
+                imagen=ContentFile(contenido, name='foto.png'),
+            )
+
+    def referencias(self, nombre):
+        return ArchivoMedia.objects.filter(nombre=nombre).values_list('referencias', flat=True).first() or 0
+
+    def test_borrar_el_producto_libera_su_imagen(self):
+        producto = self.crear_producto(b'imagen')
+        nombre = producto.imagen.name
+        self.assertEqual(self.referencias(nombre), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.delete()
+
+        self.assertEqual(self.referencias(nombre), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.raiz, nombre)))
+
+    def test_reemplazar_la_imagen_libera_la_anterior(self):
+        producto = self.crear_producto(b'imagen')
+        otro = self.crear_producto(b'imagen')
+        anterior = producto.imagen.name
+        self.assertEqual(self.referencias(anterior), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.imagen = ContentFile(b'otra imagen', name='nueva.png')
+            producto.save()
+        self.assertEqual(self.referencias(anterior), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            otro.imagen = None
+            otro.save(update_fields=['imagen'])
+        self.assertEqual(self.referencias(anterior), 0)
+        self.assertEqual(self.referencias(producto.imagen.name), 1)
+
+
+class LimpiarMediaTests(TestCase):
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.raiz, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.raiz)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.storage = ContentAddressedStorage(location=self.raiz)
+
+    def _envejecer(self, nombre):
+        viejo = time.time() - 48 * 3600
+        os.utime(os.path.join(self.raiz, nombre), (viejo, viejo))
+
+    def _olvidar_cambio(self, nombre):
+        ArchivoMedia.objects.filter(nombre=nombre).update(fecha_actualizacion=timezone.now() - timedelta(days=3))
+
+    def _crear_producto(self, contenido):
+        comerciante = Comerciante.objects.create(
+            nombre_apellido='Proveedor', email='prov@ejemplo.cl', password_hash='x',
+            relacion_negocio='DUEÑO', tipo_negocio='ALMACEN', comuna='Santiago',
+        )
+        proveedor = Proveedor.objects.create(
+            usuario=comerciante, nombre_empresa='Distribuidora', descripcion='Abarrotes',
+            whatsapp='+56912345678', email='prov@ejemplo.cl',
+        )
+        return ProductoServicio.objects.create(
+            proveedor=proveedor, nombre='Leche', descripcion='Caja', imagen=ContentFile(contenido, name='foto.png'),
+        )
+
+    def _limpiar(self):
+        call_command('limpiar_media', '--eliminar', stdout=StringIO())
+
+    def test_no_borra_blob_con_cambio_reciente(self):
+        # Subida deduplicada cuyo registro todavía no se guarda
+        nombre = self.storage.save('a.txt', ContentFile(b'hola'))
+        self._envejecer(nombre)
+
+        self._limpiar()
+
+        self.assertTrue(self.storage.exists(nombre))
+        self.assertTrue(ArchivoMedia.objects.filter(nombre=nombre).exists())
+
+    def test_no_borra_blob_que_un_registro_nombra(self):
+        producto = self._crear_producto(b'imagen')
+        nombre = producto.imagen.name
+        self._envejecer(nombre)
+        self._olvidar_cambio(nombre)
+
+        self._limpiar()
+
+        self.assertTrue(self.storage.exists(nombre))
+
+    def test_borra_imagen_de_producto_borrado_aunque_el_contador_siga_alto(self):
+        producto = self._crear_producto(b'imagen')
+        nombre = producto.imagen.name
+        # Contador inflado por borrados anteriores que no lo liberaron
+        ArchivoMedia.objects.filter(nombre=nombre).update(referencias=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.delete()
+        self._envejecer(nombre)
+        self._olvidar_cambio(nombre)
+
+        self._limpiar()
+
+        self.assertFalse(self.storage.exists(nombre))
+        self.assertFalse(ArchivoMedia.objects.filter(nombre=nombre).exists())
+
+    def test_borra_blob_sin_referencias_y_olvida_su_fila(self):
+        nombre = self.storage.save('a.txt', ContentFile(b'hola'))
+        self._envejecer(nombre)
+        self._olvidar_cambio(nombre)
+
+        self._limpiar()
+
+        self.assertFalse(self.storage.exists(nombre))
+        self.assertFalse(ArchivoMedia.objects.filter(nombre=nombre).exists())
+
+    def test_no_recorre_temporales(self):
+        os.makedirs(os.path.join(self.raiz, '.tmp'))
+        temporal = os.path.join('.tmp', 'subida')
+        with open(os.path.join(self.raiz, temporal), 'wb') as archivo:
+            archivo.write(b'parcial')
+        self._envejecer(temporal)
+
+        self._limpiar()
+
+        self.assertTrue(os.path.exists(os.path.join(self.raiz, temporal)))
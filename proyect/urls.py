@@ -4,10 +4,12 @@ URL configuration for proyect project.
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings 
 from django.conf.urls.static import static
 
+from .views import servir_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('usuarios.urls')),
@@ -18,5 +20,7 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), servir_media),
+    ]
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
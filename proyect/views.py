@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.views.static import serve
+
+from .storage import es_inmutable, cache_control_inmutable
+
+
+def servir_media(request, path):
+    """
+    Sirve MEDIA_ROOT en desarrollo. Los blobs direccionados por contenido
+    nunca cambian, así que se entregan con cache de largo plazo.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if es_inmutable(path):
+        response['Cache-Control'] = cache_control_inmutable()
+    return response
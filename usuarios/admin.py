@@ -70,5 +70,5 @@ class ProveedorAdmin(admin.ModelAdmin):
 @admin.register(Propuesta)
 class PropuestaAdmin(admin.ModelAdmin):
     list_display = ('titulo', 'proveedor', 'zona_geografica')
-    list_filter = ('zona_geografica',)
+    list_filter = ('zona_geografica', 'rubros_indexados__codigo')
     search_fields = ('titulo', 'proveedor__nombre', 'rubros_ofertados')
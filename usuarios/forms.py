@@ -6,16 +6,13 @@ from .models import (
     RELACION_NEGOCIO_CHOICES, TIPO_NEGOCIO_CHOICES, 
     CATEGORIA_POST_CHOICES, INTERESTS_CHOICES
 ) 
-# Opciones de comuna
-COMUNA_CHOICES = [
-    ('', 'Selecciona tu comuna'),
-    ('ARICA', 'Arica'),
-    ('SANTIAGO', 'Santiago'),
-    ('PROVIDENCIA', 'Providencia'),
-    ('LA_SERENA', 'La Serena'),
-    ('VALPARAISO', 'Valparaíso'),
-    ('OTRO_COMUNA', '...'),
-]
+from proveedor import geografia
+
+
+def opciones_comuna():
+    """Comunas de la tabla de comunas, agrupadas por región."""
+    return [('', 'Selecciona tu comuna')] + geografia.comunas_agrupadas()
+
 
 class RegistroComercianteForm(forms.ModelForm):
     password = forms.CharField(
@@ -29,7 +26,7 @@ class RegistroComercianteForm(forms.ModelForm):
         max_length=255
     )
     comuna_select = forms.ChoiceField(
-        choices=COMUNA_CHOICES,
+        choices=opciones_comuna,
         label='Comuna',
         widget=forms.Select(attrs={'id': 'commune'})
     )
@@ -259,16 +256,7 @@ class SocialSignupForm(SignupForm):
     )
     
     comuna_select = forms.ChoiceField(
-        choices=[
-            ('', 'Selecciona tu comuna'),
-            ('Santiago', 'Santiago'),
-            ('Las Condes', 'Las Condes'),
-            ('Providencia', 'Providencia'),
-            ('Maipú', 'Maipú'),
-            ('La Florida', 'La Florida'),
-            ('Puente Alto', 'Puente Alto'),
-            # Agregar más comunas
-        ],
+        choices=opciones_comuna,
         required=True,
         widget=forms.Select(attrs={
             'class': 'w-full pl-12 pr-4 py-3.5 border-2 border-gray-200 rounded-xl focus:border-primary focus:outline-none appearance-none bg-white'
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0006_alter_post_categoria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='beneficio',
+            index=models.Index(fields=['estado', 'vence'], name='beneficio_estado_vence_idx'),
+        ),
+    ]
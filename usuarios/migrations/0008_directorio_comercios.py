@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def indexar_intereses(apps, schema_editor):
+    Comerciante = apps.get_model('usuarios', 'Comerciante')
+    InteresComerciante = apps.get_model('usuarios', 'InteresComerciante')
+    lote = []
+    filas = Comerciante.objects.exclude(intereses='').values_list('id', 'intereses')
+    for comerciante_id, intereses in filas.iterator(chunk_size=1000):
+        for codigo in {c for c in intereses.split(',') if c}:
+            lote.append(InteresComerciante(comerciante_id=comerciante_id, codigo=codigo[:30]))
+        if len(lote) >= 1000:
+            InteresComerciante.objects.bulk_create(lote, ignore_conflicts=True)
+            lote = []
+    if lote:
+        InteresComerciante.objects.bulk_create(lote, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0007_indice_estado_beneficio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InteresComerciante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(choices=[('MARKETING', 'Marketing Digital'), ('INVENTARIO', 'Gestión de Inventario'), ('PROVEEDORES', 'Proveedores Locales'), ('FINANZAS', 'Finanzas y Contabilidad'), ('CLIENTES', 'Atención al Cliente'), ('LEYES', 'Normativa y Leyes'), ('TECNOLOGIA', 'Uso de Tecnología y Apps'), ('REDES_SOCIALES', 'Redes Sociales para Negocios'), ('VENTAS', 'Técnicas de Ventas'), ('CREDITOS', 'Créditos y Préstamos Pyme'), ('IMPUESTOS', 'Impuestos y Contabilidad Básica'), ('DECORACION', 'Decoración y Merchandising'), ('SOSTENIBILIDAD', 'Sostenibilidad y Reciclaje'), ('SEGURIDAD', 'Seguridad del Negocio'), ('LOGISTICA', 'Logística y Reparto'), ('INNOVACION', 'Innovación en Productos'), ('EMPRENDIMIENTO', 'Modelos de Emprendimiento'), ('SEGUROS', 'Seguros para Negocios')], max_length=30)),
+            ],
+            options={
+                'verbose_name': 'Interés de Comerciante',
+                'verbose_name_plural': 'Intereses de Comerciantes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comerciante',
+            index=models.Index(fields=['rol', 'comuna', 'tipo_negocio', 'id'], name='comerciante_rol_comuna_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comerciante',
+            index=models.Index(fields=['rol', 'tipo_negocio', 'id'], name='comerciante_rol_tipo_idx'),
+        ),
+        migrations.AddField(
+            model_name='interescomerciante',
+            name='comerciante',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intereses_indexados', to='usuarios.comerciante'),
+        ),
+        migrations.AddIndex(
+            model_name='interescomerciante',
+            index=models.Index(fields=['codigo', 'comerciante'], name='interes_codigo_comerciante_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='interescomerciante',
+            constraint=models.UniqueConstraint(fields=('comerciante', 'codigo'), name='interes_comerciante_unico'),
+        ),
+        migrations.RunPython(indexar_intereses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedor', '0015_codigos_territoriales'),
+        ('usuarios', '0008_directorio_comercios'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comerciante',
+            name='comerciante_rol_comuna_idx',
+        ),
+        migrations.AddField(
+            model_name='comerciante',
+            name='comuna_oficial',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='comerciantes', to='proveedor.comuna'),
+        ),
+        migrations.AddIndex(
+            model_name='comerciante',
+            index=models.Index(fields=['rol', 'comuna_oficial', 'tipo_negocio', 'id'], name='comerciante_comuna_ofi_idx'),
+        ),
+    ]
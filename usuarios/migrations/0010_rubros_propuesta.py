@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:44
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia fija de RUBROS_CHOICES al momento de la migración
+RUBROS = [
+    ('ABARROTES', 'Abarrotes'),
+    ('CARNES', 'Carnes'),
+    ('LACTEOS', 'Lácteos'),
+    ('FRUTAS', 'Frutas y Verduras'),
+    ('LIMPIEZA', 'Limpieza'),
+    ('PANADERIA', 'Panadería'),
+    ('VARIOS', 'Varios'),
+]
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode()
+    return ' '.join(texto.lower().split())
+
+
+def _codigos(texto):
+    codigos = set()
+    for parte in (texto or '').split(','):
+        parte = _normalizar(parte)
+        for codigo, etiqueta in RUBROS:
+            etiqueta = _normalizar(etiqueta)
+            if parte and (parte in (codigo.lower(), etiqueta) or etiqueta.startswith(parte + ' ')):
+                codigos.add(codigo)
+                break
+    return codigos
+
+
+def indexar_rubros(apps, schema_editor):
+    Propuesta = apps.get_model('usuarios', 'Propuesta')
+    RubroPropuesta = apps.get_model('usuarios', 'RubroPropuesta')
+    lote = []
+    filas = Propuesta.objects.exclude(rubros_ofertados='').values_list('id', 'rubros_ofertados')
+    for propuesta_id, rubros in filas.iterator(chunk_size=1000):
+        lote.extend(RubroPropuesta(propuesta_id=propuesta_id, codigo=c) for c in _codigos(rubros))
+        if len(lote) >= 1000:
+            RubroPropuesta.objects.bulk_create(lote, ignore_conflicts=True)
+            lote = []
+    if lote:
+        RubroPropuesta.objects.bulk_create(lote, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_comuna_oficial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RubroPropuesta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(choices=[('ABARROTES', 'Abarrotes'), ('CARNES', 'Carnes'), ('LACTEOS', 'Lácteos'), ('FRUTAS', 'Frutas y Verduras'), ('LIMPIEZA', 'Limpieza'), ('PANADERIA', 'Panadería'), ('VARIOS', 'Varios')], max_length=20)),
+                ('propuesta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rubros_indexados', to='usuarios.propuesta')),
+            ],
+            options={
+                'verbose_name': 'Rubro de Propuesta',
+                'verbose_name_plural': 'Rubros de Propuestas',
+                'indexes': [models.Index(fields=['codigo', 'propuesta'], name='rubro_codigo_propuesta_idx')],
+                'constraints': [models.UniqueConstraint(fields=('propuesta', 'codigo'), name='rubro_propuesta_unico')],
+            },
+        ),
+        migrations.RunPython(indexar_rubros, migrations.RunPython.noop),
+    ]
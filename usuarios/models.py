@@ -122,6 +122,15 @@ class Comerciante(models.Model):
     relacion_negocio = models.CharField(max_length=10, choices=RELACION_NEGOCIO_CHOICES)
     tipo_negocio = models.CharField(max_length=20, choices=TIPO_NEGOCIO_CHOICES)
     comuna = models.CharField(max_length=50)
+    # Comuna de la tabla de comunas que corresponde al texto de `comuna`
+    # (ver asignar_comunas_comerciantes); las consultas por comuna o región usan esta
+    comuna_oficial = models.ForeignKey(
+        'proveedor.Comuna',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='comerciantes',
+    )
     nombre_negocio = models.CharField(max_length=100, default='Mi Negocio Local', blank=True)
 
     # Auditoría
@@ -149,10 +158,44 @@ class Comerciante(models.Model):
     class Meta:
         verbose_name = 'Comerciante'
         verbose_name_plural = 'Comerciantes'
+        indexes = [
+            # Directorio de comercios para proveedores (paginado por id)
+            models.Index(fields=['rol', 'comuna_oficial', 'tipo_negocio', 'id'], name='comerciante_comuna_ofi_idx'),
+            models.Index(fields=['rol', 'tipo_negocio', 'id'], name='comerciante_rol_tipo_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_apellido} ({self.email})"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'comuna' in update_fields:
+            self.asignar_comuna_oficial()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'comuna_oficial'}
+        super().save(*args, **kwargs)
+        if update_fields is None or 'intereses' in update_fields:
+            self.sincronizar_intereses()
+
+    def asignar_comuna_oficial(self):
+        from proveedor.geografia import buscar_comuna
+        self.comuna_oficial_id = buscar_comuna(self.comuna)
+
+    def codigos_intereses(self):
+        return [c for c in (self.intereses or '').split(',') if c]
+
+    def sincronizar_intereses(self):
+        """Refleja el CSV de `intereses` en la tabla indexada InteresComerciante."""
+        nuevos = set(self.codigos_intereses())
+        actuales = set(self.intereses_indexados.values_list('codigo', flat=True))
+        if nuevos == actuales:
+            return
+        self.intereses_indexados.filter(codigo__in=actuales - nuevos).delete()
+        InteresComerciante.objects.bulk_create(
+            [InteresComerciante(comerciante=self, codigo=c) for c in nuevos - actuales],
+            ignore_conflicts=True,
+        )
+
     def get_profile_picture_url(self):
         DEFAULT_IMAGE_PATH = 'usuarios/img/default_profile.png'
         if self.foto_perfil and self.foto_perfil.name and self.foto_perfil.name != DEFAULT_IMAGE_PATH:
@@ -160,6 +203,28 @@ class Comerciante(models.Model):
         return static('img/default_profile.png')
 
 
+class InteresComerciante(models.Model):
+    """
+    Un interés de un comerciante por fila (copia normalizada del CSV
+    `Comerciante.intereses`), para poder filtrar por interés con índice.
+    """
+    comerciante = models.ForeignKey(Comerciante, on_delete=models.CASCADE, related_name='intereses_indexados')
+    codigo = models.CharField(max_length=30, choices=INTERESTS_CHOICES)
+
+    class Meta:
+        verbose_name = 'Interés de Comerciante'
+        verbose_name_plural = 'Intereses de Comerciantes'
+        constraints = [
+            models.UniqueConstraint(fields=['comerciante', 'codigo'], name='interes_comerciante_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['codigo', 'comerciante'], name='interes_codigo_comerciante_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.comerciante_id} - {self.codigo}"
+
+
 class Post(models.Model):
     comerciante = models.ForeignKey(
         Comerciante,
@@ -263,6 +328,9 @@ class Beneficio(models.Model):
         verbose_name = 'Beneficio y Promoción'
         verbose_name_plural = 'Beneficios y Promociones'
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'vence'], name='beneficio_estado_vence_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.get_categoria_display()}] {self.titulo}"
@@ -315,4 +383,66 @@ class Propuesta(models.Model):
         verbose_name_plural = "Propuestas de Proveedores"
 
     def __str__(self):
-        return f"{self.titulo} - {self.proveedor.nombre}"
\ No newline at end of file
+        return f"{self.titulo} - {self.proveedor.nombre}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'rubros_ofertados' in update_fields:
+            self.sincronizar_rubros()
+
+    def sincronizar_rubros(self):
+        """Refleja el CSV de `rubros_ofertados` en la tabla indexada RubroPropuesta."""
+        nuevos = set(codigos_rubro(self.rubros_ofertados))
+        actuales = set(self.rubros_indexados.values_list('codigo', flat=True))
+        if nuevos == actuales:
+            return
+        self.rubros_indexados.filter(codigo__in=actuales - nuevos).delete()
+        RubroPropuesta.objects.bulk_create(
+            [RubroPropuesta(propuesta=self, codigo=c) for c in nuevos - actuales],
+            ignore_conflicts=True,
+        )
+
+
+def codigos_rubro(texto):
+    """
+    Códigos de RUBROS_CHOICES presentes en un CSV escrito a mano. Cada
+    elemento puede ser el código ('LACTEOS'), la etiqueta ('Lácteos') o el
+    comienzo de ella ('Frutas'); lo que no calza con ningún rubro se ignora.
+    """
+    from proveedor.texto import normalizar
+
+    codigos = []
+    for parte in (texto or '').split(','):
+        parte = normalizar(parte)
+        if not parte:
+            continue
+        for codigo, etiqueta in RUBROS_CHOICES:
+            etiqueta = normalizar(etiqueta)
+            if parte in (codigo.lower(), etiqueta) or etiqueta.startswith(parte + ' '):
+                if codigo not in codigos:
+                    codigos.append(codigo)
+                break
+    return codigos
+
+
+class RubroPropuesta(models.Model):
+    """
+    Un rubro de una propuesta por fila (copia normalizada del CSV
+    `Propuesta.rubros_ofertados`), para filtrar el directorio por rubro con índice.
+    """
+    propuesta = models.ForeignKey(Propuesta, on_delete=models.CASCADE, related_name='rubros_indexados')
+    codigo = models.CharField(max_length=20, choices=RUBROS_CHOICES)
+
+    class Meta:
+        verbose_name = 'Rubro de Propuesta'
+        verbose_name_plural = 'Rubros de Propuestas'
+        constraints = [
+            models.UniqueConstraint(fields=['propuesta', 'codigo'], name='rubro_propuesta_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['codigo', 'propuesta'], name='rubro_codigo_propuesta_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.propuesta_id} - {self.codigo}"
\ No newline at end of file
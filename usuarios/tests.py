@@ -1,3 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from proveedor import geografia
+from proveedor.models import Comuna
+
+from .forms import RegistroComercianteForm
+from .models import Comerciante, Propuesta, Proveedor, codigos_rubro
+
+
+class RegistroComercianteFormTests(TestCase):
+
+    def setUp(self):
+        geografia.invalidar()
+        self.addCleanup(geografia.invalidar)
+
+    def test_instalacion_nueva_ofrece_las_comunas(self):
+        # Las carga la migración 0021 de proveedor, sin correr cargar_territorio
+        grupos = dict(RegistroComercianteForm().fields['comuna_select'].choices[1:])
+
+        self.assertEqual(len(grupos), 16)
+        self.assertEqual(sum(len(comunas) for comunas in grupos.values()), 346)
+        self.assertIn(('Las Condes', 'Las Condes'), grupos['Metropolitana'])
+
+
+class ComunaOficialTests(TestCase):
+
+    def setUp(self):
+        geografia.invalidar()
+        self.addCleanup(geografia.invalidar)
+
+    def crear_comerciante(self, email, comuna):
+        return Comerciante.objects.create(
+            nombre_apellido='Dueño', email=email, password_hash='x',
+            relacion_negocio='DUEÑO', tipo_negocio='ALMACEN', comuna=comuna,
+        )
+
+    def test_texto_escrito_a_mano_se_enlaza_a_la_comuna(self):
+        casos = {
+            'providensia': 'Providencia',
+            'Stgo': 'Santiago',
+            'comuna de ñuñoa': 'Ñuñoa',
+            'LAS_CONDES': 'Las Condes',
+        }
+        for numero, (texto, nombre) in enumerate(casos.items()):
+            with self.subTest(texto=texto):
+                comerciante = self.crear_comerciante(f'c{numero}@ejemplo.cl', texto)
+                self.assertEqual(comerciante.comuna_oficial.nombre, nombre)
+
+    def test_comando_enlaza_a_los_existentes_y_lista_los_sin_calce(self):
+        enlazable = self.crear_comerciante('a@ejemplo.cl', 'Providencia')
+        self.crear_comerciante('b@ejemplo.cl', 'Mi barrio')
+        Comerciante.objects.update(comuna_oficial=None)
+
+        salida = StringIO()
+        call_command('asignar_comunas_comerciantes', stdout=salida)
+
+        enlazable.refresh_from_db()
+        self.assertEqual(enlazable.comuna_oficial, Comuna.objects.get(codigo='13123'))
+        self.assertIn("'Mi barrio': 1", salida.getvalue())
+
+
+class RubroPropuestaTests(TestCase):
+
+    def test_codigos_desde_codigo_etiqueta_o_comienzo(self):
+        codigos = codigos_rubro('LACTEOS, lacteos, Frutas, Panaderia, Otra cosa')
+        self.assertEqual(codigos, ['LACTEOS', 'FRUTAS', 'PANADERIA'])
+
+    def test_guardar_la_propuesta_sincroniza_sus_rubros(self):
+        proveedor = Proveedor.objects.create(nombre='Distribuidora')
+        propuesta = Propuesta.objects.create(
+            proveedor=proveedor, titulo='Oferta', rubros_ofertados='Lácteos, Carnes', zona_geografica='Maipú',
+        )
+        self.assertEqual(set(propuesta.rubros_indexados.values_list('codigo', flat=True)), {'LACTEOS', 'CARNES'})
+
+        propuesta.rubros_ofertados = 'Carnes, Limpieza'
+        propuesta.save(update_fields=['rubros_ofertados'])
+
+        self.assertEqual(set(propuesta.rubros_indexados.values_list('codigo', flat=True)), {'CARNES', 'LIMPIEZA'})
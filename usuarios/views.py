@@ -4,12 +4,13 @@ from django.contrib import messages
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.files.storage import default_storage
 from django.db import IntegrityError
-from django.db.models import Count, Q
+from django.db.models import Count, Prefetch, Q
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 import feedparser 
 from django.utils.html import strip_tags # Necesaria para fetch_news_preview
-from proveedor.models import Region, Comuna # RESTAURADO: Importación para filtros de región
+from proveedor import geografia
+from proveedor.recomendaciones import recomendados_para
 
 from .models import (
     Comerciante,
@@ -361,7 +362,7 @@ def plataforma_comerciante_view(request):
 
     # NUEVO: Carga de regiones para la barra lateral
     try:
-        regiones = Region.objects.all().order_by('nombre')
+        regiones = geografia.arbol().regiones  # árbol en memoria, sin consulta por request
     except Exception:
         regiones = [] # Retorna lista vacía si la tabla no existe o falla la importación
 
@@ -370,6 +371,10 @@ def plataforma_comerciante_view(request):
     ).exclude(rol='ADMIN').order_by('-post_count')[:5] #
 
     news_preview = fetch_news_preview() 
+
+    # Top de proveedores precalculado por `calcular_recomendaciones`
+    proveedores_recomendados = recomendados_para(current_logged_in_user.id)
+
     context = {
         'comerciante': current_logged_in_user,
         'rol_usuario': ROLES.get(current_logged_in_user.rol, 'Usuario'),
@@ -389,6 +394,7 @@ def plataforma_comerciante_view(request):
         'regiones': regiones, # AÑADIDO al contexto
         'user_can_post': user_can_post, # NUEVA VARIABLE DE CONTEXTO
         'top_posters': top_posters,  # AÑADIDO: Lista de usuarios más activos
+        'proveedores_recomendados': proveedores_recomendados,
     }
 
     return render(request, 'usuarios/plataforma_comerciante.html', context)
@@ -594,51 +600,44 @@ def proveedor_dashboard_view(request):
 # --- Directorio de proveedores ---
 
 def directorio_view(request):
-    
+    from proveedor import directorio
+
     rubro_filter = request.GET.get('rubro', 'TODOS')
     # AÑADIDO: Obtener filtro de región
     region_filter_id = request.GET.get('region') 
 
-    propuestas_queryset = Propuesta.objects.select_related('proveedor').all()
+    # Fichas aplanadas de ambos modelos de proveedor (proveedor/directorio.py)
+    fichas = directorio.fichas_activas()
 
+    # Rubro: semijoin por RubroPropuesta y por las categorías de la plataforma
     if rubro_filter and rubro_filter != 'TODOS':
-        propuestas_queryset = propuestas_queryset.filter(
-            rubros_ofertados__icontains=rubro_filter
-        )
-    
-    # NUEVO: Lógica de filtrado por Región en el Directorio
-    if region_filter_id and region_filter_id != '':
-        try:
-            # Asumiendo que Proveedor tiene una FK a Region.
-            propuestas_queryset = propuestas_queryset.filter(
-                proveedor__region__id=region_filter_id
-            )
-        except Exception:
-            # Si el modelo Proveedor no tiene la FK a Region (por si hubo errores de migración),
-            # simplemente se omite el filtro.
-            pass
-
-
-    # ELIMINADO: zona_filter (Charfield) para usar region_filter (FK)
-    # y el sort_by (se simplifica la lógica)
+        fichas = directorio.con_rubro(fichas, rubro_filter)
+
+    # Filtrado por Región: la ficha trae la región del proveedor
+    if region_filter_id and region_filter_id.isdigit():
+        fichas = fichas.filter(region_id=region_filter_id)
+
+    # Los valores del <select> se mantienen por compatibilidad con enlaces guardados
+    orden_por_opcion = {
+        'proveedor__nombre': 'nombre',
+        '-proveedor__nombre': '-nombre',
+        '-fecha_creacion': '-fecha_registro',
+        'relevancia': '-ranking_score',
+    }
     sort_by = request.GET.get('ordenar_por', 'proveedor__nombre') 
-    valid_sort_fields = ['proveedor__nombre', '-proveedor__nombre']
-    
-    if sort_by in valid_sort_fields:
-        propuestas_queryset = propuestas_queryset.order_by(sort_by)
-    else:
+    if sort_by not in orden_por_opcion:
         sort_by = 'proveedor__nombre'
-        propuestas_queryset = propuestas_queryset.order_by(sort_by)
+    fichas = fichas.order_by(orden_por_opcion[sort_by], 'id')
         
 
     # NUEVO: Carga de regiones para el contexto del directorio
     try:
-        regiones = Region.objects.all().order_by('nombre')
+        regiones = geografia.arbol().regiones  # árbol en memoria, sin consulta por request
     except Exception:
         regiones = []
 
     context = {
-        'propuestas': propuestas_queryset,
+        'fichas': fichas,
         'RUBROS_CHOICES': RUBROS_CHOICES,
         'ZONAS': [
             'Santiago Centro',
@@ -660,18 +659,23 @@ def directorio_view(request):
 
 
 def proveedor_perfil_view(request, pk):
-    proveedor = get_object_or_404(Proveedor, pk=pk)
+    # Proveedor, propuestas y rubros en un solo prefetch; el resto se arma en memoria
+    proveedor = get_object_or_404(
+        Proveedor.objects.prefetch_related(
+            Prefetch('propuestas', queryset=Propuesta.objects.order_by('id').prefetch_related('rubros_indexados'))
+        ),
+        pk=pk,
+    )
 
     is_online_status = is_online(proveedor.ultima_conexion)
 
-    propuestas = Propuesta.objects.filter(proveedor=proveedor)
+    propuestas = list(proveedor.propuestas.all())
 
-    rubros_list = propuestas.values_list('rubros_ofertados', flat=True)
+    codigos = {r.codigo for p in propuestas for r in p.rubros_indexados.all()}
+    rubros_list = [etiqueta for codigo, etiqueta in RUBROS_CHOICES if codigo in codigos]
     rubros_ofertados = ', '.join(rubros_list) if rubros_list else 'No especificados'
 
-    zona_geografica = (
-        propuestas.first().zona_geografica if propuestas.exists() else 'No especificada'
-    )
+    zona_geografica = propuestas[0].zona_geografica if propuestas else 'No especificada'
 
     context = {
         'proveedor': proveedor,